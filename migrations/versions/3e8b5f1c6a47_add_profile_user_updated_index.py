@@ -0,0 +1,36 @@
+"""add_profile_user_updated_index
+
+Revision ID: 3e8b5f1c6a47
+Revises: 9c1e4a7b2d30
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8b5f1c6a47'
+down_revision: Union[str, Sequence[str], None] = '9c1e4a7b2d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - composite index for listing a user's profiles."""
+
+    # Profile.get_by_name is already served by the UNIQUE(user_id, name)
+    # constraint's index. Profile.list_by_user orders by updated_at, which
+    # idx_profile_user_id alone can only satisfy with a temp B-tree sort.
+    op.execute('''
+        CREATE INDEX IF NOT EXISTS idx_profile_user_updated
+        ON profile(user_id, updated_at DESC)
+    ''')
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the profile listing index."""
+
+    op.execute('DROP INDEX IF EXISTS idx_profile_user_updated')
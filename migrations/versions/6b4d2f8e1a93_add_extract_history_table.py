@@ -0,0 +1,46 @@
+"""add_extract_history_table
+
+Revision ID: 6b4d2f8e1a93
+Revises: 3e8b5f1c6a47
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b4d2f8e1a93'
+down_revision: Union[str, Sequence[str], None] = '3e8b5f1c6a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add per-user extraction history for re-uploaded files."""
+
+    # Items are encrypted like conversation content; the primary key doubles
+    # as the lookup index for (user, file hash, item type, provider, model)
+    op.execute('''
+        CREATE TABLE IF NOT EXISTS extract_history (
+            user_id INTEGER NOT NULL,
+            file_sha256 TEXT NOT NULL,
+            item_type TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL DEFAULT '',
+            prompt_version TEXT NOT NULL,
+            items TEXT NOT NULL,
+            items_iv TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, file_sha256, item_type, provider, model),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    ''')
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop extraction history."""
+
+    op.execute('DROP TABLE IF EXISTS extract_history')
@@ -0,0 +1,37 @@
+"""add_conversations_history_index
+
+Revision ID: 9c1e4a7b2d30
+Revises: f7d2e3b4a5c6
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1e4a7b2d30'
+down_revision: Union[str, Sequence[str], None] = 'f7d2e3b4a5c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - composite index for per-profile advisor history."""
+
+    # Conversation.list_by_profile filters on (user_id, profile_id) and orders
+    # by created_at; one composite index serves both without a sort step.
+    # SQLite scans the index in either direction, so it also covers the
+    # newest-first history queries.
+    op.execute('''
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_profile_created
+        ON conversations(user_id, profile_id, created_at DESC)
+    ''')
+
+
+def downgrade() -> None:
+    """Downgrade schema - drop the composite history index."""
+
+    op.execute('DROP INDEX IF EXISTS idx_conversations_user_profile_created')
@@ -51,30 +51,41 @@ class Conversation:
 
     def save(self):
         """Save conversation message (encrypts content)."""
+        with db.get_connection() as conn:
+            self._save_with_cursor(conn.cursor())
+        return self
+
+    @staticmethod
+    def save_many(messages):
+        """Save several conversation messages in a single transaction."""
         with db.get_connection() as conn:
             cursor = conn.cursor()
+            for message in messages:
+                message._save_with_cursor(cursor)
+        return messages
 
-            # Encrypt content if needed
-            if self._decrypted_content is not None:
-                self.content, self.content_iv = encrypt(self._decrypted_content)
-            elif isinstance(self.content, str) and not self.content_iv:
-                # Plain string content, encrypt it
-                self.content, self.content_iv = encrypt(self.content)
+    def _save_with_cursor(self, cursor):
+        """Encrypt and write this message using an open cursor (caller commits)."""
+        # Encrypt content if needed
+        if self._decrypted_content is not None:
+            self.content, self.content_iv = encrypt(self._decrypted_content)
+        elif isinstance(self.content, str) and not self.content_iv:
+            # Plain string content, encrypt it
+            self.content, self.content_iv = encrypt(self.content)
 
-            if self.id is None:
-                cursor.execute('''
-                    INSERT INTO conversations (user_id, profile_id, role, content, content_iv, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (self.user_id, self.profile_id, self.role, self.content, self.content_iv, self.created_at))
-                self.id = cursor.lastrowid
-            else:
-                # Conversations typically aren't updated, but support it anyway
-                cursor.execute('''
-                    UPDATE conversations
-                    SET role = ?, content = ?, content_iv = ?
-                    WHERE id = ? AND user_id = ?
-                ''', (self.role, self.content, self.content_iv, self.id, self.user_id))
-        return self
+        if self.id is None:
+            cursor.execute('''
+                INSERT INTO conversations (user_id, profile_id, role, content, content_iv, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (self.user_id, self.profile_id, self.role, self.content, self.content_iv, self.created_at))
+            self.id = cursor.lastrowid
+        else:
+            # Conversations typically aren't updated, but support it anyway
+            cursor.execute('''
+                UPDATE conversations
+                SET role = ?, content = ?, content_iv = ?
+                WHERE id = ? AND user_id = ?
+            ''', (self.role, self.content, self.content_iv, self.id, self.user_id))
 
     def delete(self):
         """Delete conversation message."""
@@ -0,0 +1,52 @@
+"""Extraction history model: earlier AI extraction results per uploaded file."""
+from datetime import datetime
+from src.database.connection import db
+from src.services.encryption_service import get_encryption_service
+
+
+class ExtractHistory:
+    """Extracted items for a file a user has already uploaded.
+
+    Keyed by (user, SHA-256 of the file bytes, item type, provider, model), so
+    re-uploading the same statement to the same model returns the earlier
+    extraction without another LLM call, while picking another provider or
+    model extracts afresh. Items are encrypted at rest. Rows written under a different prompt version
+    are ignored, so editing the extraction prompts invalidates them.
+    """
+
+    @staticmethod
+    def get(user_id: int, file_sha256: str, item_type: str, provider: str, model: str,
+            prompt_version: str, service=None):
+        """Return the stored items for this file, or None if it hasn't been extracted."""
+        row = db.execute_one(
+            '''SELECT items, items_iv FROM extract_history
+               WHERE user_id = ? AND file_sha256 = ? AND item_type = ? AND provider = ? AND model = ?
+                 AND prompt_version = ?''',
+            (user_id, file_sha256, item_type, provider, model or '', prompt_version)
+        )
+        if not row:
+            return None
+        service = service or get_encryption_service()
+        try:
+            return service.decrypt_list(row['items'], row['items_iv'])
+        except Exception:
+            # Written under another key (e.g. before a DEK change): treat as a miss
+            return None
+
+    @staticmethod
+    def save(user_id: int, file_sha256: str, item_type: str, provider: str, model: str,
+             prompt_version: str, items: list, service=None):
+        """Store (or replace) the extracted items for this file.
+
+        Pass the request's encryption service when saving from outside the
+        request context, so the row is encrypted with the user's key.
+        """
+        service = service or get_encryption_service()
+        items_enc, items_iv = service.encrypt_list(items)
+        with db.get_connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO extract_history
+                    (user_id, file_sha256, item_type, provider, model, prompt_version, items, items_iv, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, file_sha256, item_type, provider, model or '', prompt_version, items_enc, items_iv,
+                  datetime.now().isoformat()))
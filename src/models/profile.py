@@ -138,12 +138,13 @@ class Profile:
                 log_create('profile', self.id, self.user_id, f'Created profile: {self.name}')
             else:
                 # Update existing profile
+                self.updated_at = datetime.now().isoformat()
                 cursor.execute('''
                     UPDATE profile
                     SET name = ?, birth_date = ?, retirement_date = ?, data = ?, data_iv = ?, updated_at = ?
                     WHERE id = ? AND user_id = ?
                 ''', (self.name, self.birth_date, self.retirement_date, self._data, self.data_iv,
-                      datetime.now().isoformat(), self.id, self.user_id))
+                      self.updated_at, self.id, self.user_id))
                 # Log update
                 log_update('profile', self.id, self.user_id, f'Updated profile: {self.name}')
         return self
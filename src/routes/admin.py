@@ -1112,6 +1112,9 @@ def delete_user(user_id: int):
             cursor.execute('DELETE FROM conversations WHERE user_id = ?', (user_id,))
             conversations_deleted = cursor.rowcount
 
+            # Delete user's stored extraction results
+            cursor.execute('DELETE FROM extract_history WHERE user_id = ?', (user_id,))
+
             # Delete user's feedback submissions
             cursor.execute('DELETE FROM feedback WHERE user_id = ?', (user_id,))
             feedback_deleted = cursor.rowcount
@@ -1,96 +1,533 @@
 """AI services routes for image extraction and analysis."""
 import base64
+import binascii
+import hashlib
 import json
+import logging
+import re
 import requests
+from requests.adapters import HTTPAdapter
 import os
-from io import BytesIO
-from flask import Blueprint, request, jsonify, Response
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Blueprint, request, jsonify, Response, stream_with_context, copy_current_request_context
 from flask_login import login_required, current_user
-from PIL import Image
 try:
     import fitz  # PyMuPDF
 except ImportError:
     fitz = None
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import pybase64 as _b64  # SIMD base64 for multi-MB image/PDF payloads
+except ImportError:
+    _b64 = base64
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _loads = json.loads
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 from src.models.profile import Profile
 from src.models.conversation import Conversation
+from src.models.extract_history import ExtractHistory
+from src.services.encryption_service import get_encryption_service
 from google import genai
 from google.genai import types
 from src.services.enhanced_audit_logger import enhanced_audit_logger
+from src.services.llm_cache import llm_cache
+from src.services.llm_batch import BATCH_PROVIDERS, submit_batch, poll_batch
 from src.extensions import limiter
 
 ai_services_bp = Blueprint('ai_services', __name__, url_prefix='/api')
+logger = logging.getLogger(__name__)
+
+# Max concurrent LLM calls for PDF chunk extraction, process-wide. A local
+# server (Ollama etc.) generates one response at a time, so extra requests
+# only queue there; hosted APIs tolerate more parallelism, tunable with
+# LLM_MAX_PARALLEL to match the account's provider rate limits.
+LOCAL_CHUNK_WORKERS = max(2, min(os.cpu_count() or 1, 4))
+REMOTE_CHUNK_WORKERS = max(1, int(os.environ.get('LLM_MAX_PARALLEL', 8)))
+_LOCAL_LLM_SEMAPHORE = threading.BoundedSemaphore(LOCAL_CHUNK_WORKERS)
+_REMOTE_LLM_SEMAPHORE = threading.BoundedSemaphore(REMOTE_CHUNK_WORKERS)
+
+# Advisor chat LLM calls run on a shared pool so a stuck provider is cut off
+# at a hard deadline (a little above the per-request HTTP timeouts) rather
+# than pinning the request for every model fallback it walks through
+_LLM_POOL = ThreadPoolExecutor(max_workers=64, thread_name_prefix='llm')
+ADVISOR_LLM_TIMEOUT = 65
+LOCAL_ADVISOR_LLM_TIMEOUT = 185
+
+# Largest base64 upload accepted for extraction (~30MB decoded). Independent
+# of the app-wide MAX_CONTENT_LENGTH so it still holds if that is raised.
+MAX_UPLOAD_B64_CHARS = 40_000_000
+
+# Worker processes used to text-extract / rasterize PDF pages
+PDF_RENDER_WORKERS = min(os.cpu_count() or 1, 4)
+
+# Below this many pages, process start-up outweighs parallel text extraction
+PARALLEL_TEXT_MIN_PAGES = 40
+
+# Shared keep-alive session for hosted providers (Gemini, Claude, OpenAI-style
+# APIs) and LM Studio / LocalAI, so model fallbacks and repeated calls reuse
+# pooled connections instead of paying a TCP+TLS handshake each time
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+
+# Shared keep-alive session for the local Ollama server so chunked extractions
+# and chat turns reuse pooled connections instead of reconnecting per call
+_OLLAMA_SESSION = requests.Session()
+_OLLAMA_SESSION.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+_OLLAMA_SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+_OLLAMA_SESSION.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': 'gzip, deflate'})
+
+# Ollama served over TLS (e.g. behind a reverse proxy) can multiplex the
+# concurrent PDF chunk requests over one HTTP/2 connection when httpx + h2 are
+# installed; plain-http local servers keep using the pooled session above
+_OLLAMA_HTTP2_CLIENT = httpx.Client(
+    http2=True,
+    timeout=300,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+) if httpx and HTTP2_AVAILABLE else None
+
+
+def _ndjson_line(obj):
+    """Serialize one line of an NDJSON stream to bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b'\n'
+    return (json.dumps(obj) + '\n').encode('utf-8')
+
+
+def _response_json(response):
+    """Parse an HTTP response body as JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def _post_json(url, payload, headers=None, timeout=60):
+    """POST a JSON body on the shared session, serialized with orjson when installed."""
+    if orjson is None:
+        return _SESSION.post(url, headers=headers, json=payload, timeout=timeout)
+    return _SESSION.post(
+        url,
+        headers={'Content-Type': 'application/json', **(headers or {})},
+        data=orjson.dumps(payload),
+        timeout=timeout
+    )
+
+
+def _ollama_post(url, **kwargs):
+    """POST to an Ollama server, over HTTP/2 when the server and client support it.
+
+    httpx errors are re-raised as their requests equivalents, so callers
+    handle one exception hierarchy whichever transport carried the call.
+    """
+    if _OLLAMA_HTTP2_CLIENT is None or not url.startswith('https://'):
+        return _OLLAMA_SESSION.post(url, **kwargs)
+    try:
+        return _OLLAMA_HTTP2_CLIENT.post(url, **kwargs)
+    except httpx.ConnectTimeout as e:
+        raise requests.exceptions.ConnectTimeout(str(e)) from e
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.ConnectError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.exceptions.RequestException(str(e)) from e
+
+
+# Gemini model fallback: a failed model (429 quota, 5xx, ...) hands over to
+# the next one immediately. A model that is merely slow is hedged only once it
+# has run past GEMINI_HEDGE_DELAY seconds, which should sit near the observed
+# p95 generation latency so the extra request is paid for the tail alone. At
+# most GEMINI_MAX_INFLIGHT models run at once, on threads owned by the call,
+# so a busy upload cannot starve other users' requests.
+GEMINI_HEDGE_DELAY = float(os.environ.get('GEMINI_HEDGE_DELAY', 25))
+GEMINI_MAX_INFLIGHT = 2
+
+
+def _hedged_first_success(candidates, attempt, should_fallback=lambda exc: True):
+    """Run attempt(candidate) over candidates, hedging slow ones; return the first success.
+
+    A failed attempt for which should_fallback(exc) is true starts the next
+    candidate immediately; any other failure is re-raised. When every
+    candidate fails, the last error is raised.
+    """
+    remaining = iter(candidates)
+    pending = {}
+    last_error = None
+    executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_INFLIGHT, thread_name_prefix='gemini-hedge')
+
+    def launch():
+        candidate = next(remaining, None)
+        if candidate is not None:
+            pending[executor.submit(attempt, candidate)] = candidate
+
+    try:
+        launch()
+        while pending:
+            done, _ = wait(pending, timeout=GEMINI_HEDGE_DELAY, return_when=FIRST_COMPLETED)
+            if not done:
+                if len(pending) < GEMINI_MAX_INFLIGHT:
+                    launch()
+                continue
+            for future in done:
+                candidate = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not should_fallback(e):
+                        raise
+                    last_error = e
+                    logger.warning("Gemini model %s failed: %s", candidate, e)
+                    launch()
+                else:
+                    return result
+        raise last_error if last_error is not None else Exception("No Gemini models to try")
+    finally:
+        # A losing attempt still running finishes on its own thread and is discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Masking bullets the settings UI can leave in a saved URL: U+2022, U+25CF and
+# the UTF-8 mojibake of U+2022. Real URLs are ASCII, so only non-ASCII input
+# needs to be searched.
+_URL_MASK_MARKERS = ('\u2022', '\u25cf', '\u00e2\u20ac\u00a2')
 
 
 def sanitize_url(url, default_url):
     """Clean up corrupted URLs that might contain masking bullets."""
     if not url or not isinstance(url, str):
         return default_url
-    if '•' in url:
+    if not url.isascii() and any(marker in url for marker in _URL_MASK_MARKERS):
         return default_url
     return url
 
 
-def process_pdf_content(pdf_bytes, max_pages=150):
+# Leading magic bytes -> MIME type for the formats sent to Gemini inline
+_MAGIC = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'%PDF', 'application/pdf'),
+)
+
+
+def _sniff_mime(head, default='image/png'):
+    """Identify a file from its first 12 bytes without parsing it."""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return next((mime for magic, mime in _MAGIC if head.startswith(magic)), default)
+
+
+# Plain-text extraction flags: ligatures expanded to their letters (cleaner
+# prompt text) and no reading-order sort, which chunking does not need
+_PDF_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_LIGATURES if fitz else 0
+
+
+def _page_text(page):
+    """Extract stripped plain text from a PDF page in fast mode."""
+    return page.get_text("text", flags=_PDF_TEXT_FLAGS, sort=False).strip()
+
+
+def _render_page_to_jpeg(page, zoom=2.0):
+    """Rasterize a single PDF page to JPEG bytes."""
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat, alpha=False)
+    # Encode with PyMuPDF's own JPEG writer; no PIL copy of the pixels
+    jpeg_bytes = pix.tobytes("jpeg", jpg_quality=80)
+    pix = None  # release the C-side pixmap promptly
+    return jpeg_bytes
+
+
+def _open_pdf(pdf_source):
+    """Open a PDF from a filesystem path or an in-memory bytes buffer."""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        # MuPDF reads the file on demand instead of holding it all in memory
+        return fitz.open(pdf_source, filetype="pdf")
+    # Bytes streams are read in place by MuPDF, without a second copy
+    return fitz.open(stream=pdf_source, filetype="pdf")
+
+
+# Document opened once per render worker process by _init_render_worker
+_worker_pdf = None
+
+
+def _init_render_worker(pdf_source):
+    """Worker-process initializer: open the PDF once for every page it renders."""
+    global _worker_pdf
+    _worker_pdf = _open_pdf(pdf_source)
+
+
+def _render_worker_page(page_index):
+    """Worker-process entry point: render one page of the worker's PDF."""
+    return _render_page_to_jpeg(_worker_pdf[page_index])
+
+
+def _iter_rendered_pages(pdf_document, pdf_source, page_indices, num_workers):
+    """Yield JPEG bytes per page, in page order, as soon as each page is rendered.
+
+    Owns `pdf_document` and closes it once the pages are exhausted (or the
+    consumer stops early).
+    """
+    try:
+        # Process start-up costs more than rendering a handful of pages inline
+        if num_workers > 1 and len(page_indices) >= 4:
+            # Rasterizing is CPU-bound and PyMuPDF is not thread-safe, so pages go
+            # to worker processes that each open the document once; single-page
+            # tasks let finished pages stream back while later ones render
+            with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_render_worker,
+                                     initargs=(pdf_source,)) as executor:
+                yield from executor.map(_render_worker_page, page_indices)
+        else:
+            for i in page_indices:
+                yield _render_page_to_jpeg(pdf_document[i])
+    finally:
+        pdf_document.close()
+
+
+def _extract_pdf_page_texts(pdf_source, page_indices):
+    """Worker-process entry point: extract stripped text for the given pages."""
+    pdf_document = _open_pdf(pdf_source)
+    try:
+        return [_page_text(pdf_document[i]) for i in page_indices]
+    finally:
+        pdf_document.close()
+
+
+def process_pdf_content(pdf_source, max_pages=150, num_workers=1, stream=False):
     """
     Intelligently processes PDF content for LLMs.
-    Returns (chunks, content_type) where chunks is a list of strings or images.
+    `pdf_source` is the PDF as bytes or a path to it; worker processes are
+    handed the path as-is rather than a pickled copy of the document.
+    Returns (chunks, content_type) where chunks is a list of text strings or,
+    for scanned PDFs, raw JPEG bytes per page (base64-encode at the call site).
+    With `num_workers` > 1, long documents are text-extracted and scanned
+    pages rendered across that many processes.
+    With `stream=True`, scanned pages come back as a generator that renders
+    lazily, so callers can start on the first page while the rest render.
     """
     if not fitz:
         raise Exception("PyMuPDF (fitz) is not installed. PDF processing not available.")
     
+    pdf_document = None
     try:
-        pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
+        pdf_document = _open_pdf(pdf_source)
         if pdf_document.page_count == 0:
             raise Exception("PDF has no pages.")
         
         # 1. Try text extraction first
         # We'll group pages into larger chunks to keep context manageable but efficient
         text_chunks = []
-        current_chunk = ""
+        chunk_parts = []
+        chunk_len = 0
         pages_in_chunk = 0
-        
-        for i in range(min(pdf_document.page_count, max_pages)):
-            page_text = pdf_document[i].get_text().strip()
+        has_significant_text = False
+
+        text_pages = min(pdf_document.page_count, max_pages)
+        if num_workers > 1 and text_pages >= PARALLEL_TEXT_MIN_PAGES:
+            # PyMuPDF documents can't be shared across threads, so each worker
+            # process opens its own copy and handles a contiguous page range
+            step = -(-text_pages // num_workers)
+            batches = [list(range(start, min(start + step, text_pages))) for start in range(0, text_pages, step)]
+            with ProcessPoolExecutor(max_workers=len(batches)) as executor:
+                page_texts = [text for batch_texts in executor.map(_extract_pdf_page_texts, [pdf_source] * len(batches), batches)
+                              for text in batch_texts]
+        else:
+            page_texts = [_page_text(pdf_document[i]) for i in range(text_pages)]
+
+        for i, page_text in enumerate(page_texts):
             if page_text:
-                current_chunk += f"--- Page {i+1} ---\n{page_text}\n\n"
+                page_block = f"--- Page {i+1} ---\n{page_text}\n\n"
+                chunk_parts.append(page_block)
+                # Track the running length instead of re-measuring the joined chunk
+                chunk_len += len(page_block)
                 pages_in_chunk += 1
-                
+
                 # Close chunk every 50 pages or if it gets very large (30k chars)
-                if pages_in_chunk >= 50 or len(current_chunk) > 30000:
-                    text_chunks.append(current_chunk)
-                    current_chunk = ""
+                if pages_in_chunk >= 50 or chunk_len > 30000:
+                    text_chunks.append("".join(chunk_parts))
+                    # Blocks start with "---" and end in "\n\n", so the stripped
+                    # chunk is chunk_len - 2 chars: no need to strip() a copy
+                    has_significant_text = has_significant_text or chunk_len - 2 > 50
+                    chunk_parts.clear()
+                    chunk_len = 0
                     pages_in_chunk = 0
-        
-        if current_chunk:
-            text_chunks.append(current_chunk)
+
+        if chunk_parts:
+            text_chunks.append("".join(chunk_parts))
+            has_significant_text = has_significant_text or chunk_len - 2 > 50
         
         # If we extracted significant text, return chunks
-        if any(len(c.strip()) > 50 for c in text_chunks):
-            print(f"Extracted {len(text_chunks)} text chunks from {pdf_document.page_count} pages.")
-            pdf_document.close()
+        if has_significant_text:
+            logger.debug("Extracted %d text chunks from %d pages.", len(text_chunks), pdf_document.page_count)
             return text_chunks, "text"
         
         # 2. Fallback to images (scanned PDF)
-        print("Scanned PDF detected. Rendering pages to images...")
-        images = []
+        logger.debug("Scanned PDF detected. Rendering pages to images...")
         # Limit image conversion to 20 pages for more data coverage
-        for i in range(min(pdf_document.page_count, 20)):
-            page = pdf_document[i]
-            zoom = 2.0
-            mat = fitz.Matrix(zoom, zoom)
-            pix = page.get_pixmap(matrix=mat)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            buffered = BytesIO()
-            img.save(buffered, format="JPEG", quality=80)
-            images.append(base64.b64encode(buffered.getvalue()).decode('utf-8'))
-        
-        pdf_document.close()
-        # For images, each image is its own chunk
+        page_indices = list(range(min(pdf_document.page_count, 20)))
+        num_workers = max(1, min(num_workers, len(page_indices)))
+
+        # For images, each image is its own chunk; the page generator now owns
+        # (and will close) the document
+        images = _iter_rendered_pages(pdf_document, pdf_source, page_indices, num_workers)
+        pdf_document = None
+        if not stream:
+            images = list(images)
         return images, "images"
     except Exception as e:
-        print(f"PDF processing error: {str(e)}")
+        logger.error("PDF processing error: %s", e)
         raise Exception(f"Failed to process PDF: {str(e)}")
+    finally:
+        if pdf_document is not None:
+            pdf_document.close()
+
+
+# Recently processed PDFs, keyed by (sha256 of bytes, max_pages). Re-extracting
+# the same document (e.g. retrying with another provider) skips PyMuPDF entirely.
+_pdf_chunk_cache = OrderedDict()
+_PDF_CHUNK_CACHE_MAX = 16
+_pdf_chunk_cache_lock = threading.Lock()
+
+
+def _cache_pdf_chunks(cache_key, chunks, content_type):
+    """Pass chunks through as they are produced; cache the full set once exhausted."""
+    produced = []
+    for chunk in chunks:
+        produced.append(chunk)
+        yield chunk
+
+    with _pdf_chunk_cache_lock:
+        _pdf_chunk_cache[cache_key] = (tuple(produced), content_type)
+        while len(_pdf_chunk_cache) > _PDF_CHUNK_CACHE_MAX:
+            _pdf_chunk_cache.popitem(last=False)
+
+
+def process_pdf_content_cached(pdf_bytes, max_pages=150, num_workers=1):
+    """
+    process_pdf_content with a small in-memory LRU keyed by content hash.
+    On a miss, chunks are yielded as they are produced (scanned pages stream
+    while later pages still render) and cached once all have been consumed.
+    Hits and misses both return an iterator, so callers consume them the same way.
+    """
+    cache_key = (hashlib.sha256(pdf_bytes).hexdigest(), max_pages)
+    with _pdf_chunk_cache_lock:
+        cached = _pdf_chunk_cache.get(cache_key)
+        if cached is not None:
+            _pdf_chunk_cache.move_to_end(cache_key)
+            chunks, content_type = cached
+            return iter(chunks), content_type
+
+    chunks, content_type = process_pdf_content(pdf_bytes, max_pages=max_pages, num_workers=num_workers, stream=True)
+    return _cache_pdf_chunks(cache_key, chunks, content_type), content_type
+
+
+# Patterns used by resilient_parse_llm_json, compiled once at import
+_ARRAY_RE = re.compile(r'\[\s*\{.*\}\s*\]', re.DOTALL)
+_NAME_RE = re.compile(r'"?(?:name|description|payee|institution)"?\s*[:=-]\s*"?([^"\n,]+)"?', re.IGNORECASE)
+_AMOUNT_RE = re.compile(r'"?(?:amount|value|balance|price|total)"?\s*[:=-]\s*"?([\d,.]+)"?', re.IGNORECASE)
+_TYPE_RE = re.compile(r'"?(?:type|category)"?\s*:\s*"([^"]+)"', re.IGNORECASE)
+_FREQ_RE = re.compile(r'"?frequency"?\s*:\s*"([^"]+)"', re.IGNORECASE)
+# All four field patterns as one alternation, so the fallback scans the text once
+_FIELDS_RE = re.compile(
+    r'"?(?:(?:name|description|payee|institution)"?\s*[:=-]\s*"?(?P<name>[^"\n,]+)"?'
+    r'|(?:amount|value|balance|price|total)"?\s*[:=-]\s*"?(?P<amount>[\d,.]+)"?'
+    r'|(?:type|category)"?\s*:\s*"(?P<type>[^"]+)"'
+    r'|frequency"?\s*:\s*"(?P<frequency>[^"]+)")',
+    re.IGNORECASE
+)
+_FIELD_RES = {'name': _NAME_RE, 'amount': _AMOUNT_RE, 'type': _TYPE_RE, 'frequency': _FREQ_RE}
+
+
+def _first_json_object(text):
+    """Return the first brace-balanced {...} span in text (single O(n) pass), or None."""
+    start = text.find('{')
+    if start == -1:
+        return None
+    depth = 0
+    in_str = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+class _StreamedItemParser:
+    """Incrementally pull item objects out of a JSON array as response text arrives.
+
+    feed() takes the next piece of text and returns the objects completed by it.
+    Items are the objects directly inside the first array that holds objects,
+    so both a bare [...] and a {"assets": [...]} wrapper work, and markdown
+    fences or preamble text are skipped. Nested arrays inside an item are part
+    of that item. This only drives progress updates; the full response is
+    still run through resilient_parse_llm_json for the final result.
+    """
+
+    def __init__(self):
+        self._stack = []
+        self._in_str = False
+        self._escaped = False
+        self._item_depth = None
+        self._item = None
+
+    def feed(self, text):
+        items = []
+        for ch in text:
+            if self._item is not None:
+                self._item.append(ch)
+            if self._in_str:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in '[{':
+                if (ch == '{' and self._item is None and self._stack and self._stack[-1] == '['
+                        and self._item_depth in (None, len(self._stack))):
+                    self._item_depth = len(self._stack)
+                    self._item = [ch]
+                self._stack.append(ch)
+            elif ch in ']}' and self._stack:
+                self._stack.pop()
+                if ch == '}' and self._item is not None and len(self._stack) == self._item_depth:
+                    try:
+                        item = _loads(''.join(self._item))
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._item = None
+        return items
 
 
 def resilient_parse_llm_json(text_response, list_key):
@@ -105,7 +542,7 @@ def resilient_parse_llm_json(text_response, list_key):
     
     # 1. Try direct JSON parse first (fastest)
     try:
-        data = json.loads(clean_text)
+        data = _loads(clean_text)
         return normalize_to_list(data, list_key)
     except json.JSONDecodeError:
         pass
@@ -114,70 +551,73 @@ def resilient_parse_llm_json(text_response, list_key):
     if "```json" in clean_text:
         try:
             markdown_content = clean_text.split("```json")[1].split("```")[0].strip()
-            data = json.loads(markdown_content)
+            data = _loads(markdown_content)
             return normalize_to_list(data, list_key)
         except:
             pass
     elif "```" in clean_text:
         try:
             markdown_content = clean_text.split("```")[1].split("```")[0].strip()
-            data = json.loads(markdown_content)
+            data = _loads(markdown_content)
             return normalize_to_list(data, list_key)
         except:
             pass
 
     # 3. Use regex to find the first JSON-like structure
-    import re
-    
     # Look for an array first [ ... ]
-    array_match = re.search(r'\[\s*\{.*\}\s*\]', clean_text, re.DOTALL)
+    array_match = _ARRAY_RE.search(clean_text)
     if array_match:
         try:
-            data = json.loads(array_match.group(0))
+            data = _loads(array_match.group(0))
             return normalize_to_list(data, list_key)
         except:
             pass
 
-    # Look for a single object { ... }
-    obj_match = re.search(r'\{.*\}', clean_text, re.DOTALL)
-    if obj_match:
+    # Look for a single object { ... }: take the first balanced object
+    obj_text = _first_json_object(clean_text)
+    if obj_text:
         try:
-            full_potential = obj_match.group(0)
-            for i in range(len(full_potential), 0, -1):
-                if full_potential[i-1] == '}':
-                    try:
-                        data = json.loads(full_potential[:i])
-                        return normalize_to_list(data, list_key)
-                    except:
-                        continue
-        except:
+            data = _loads(obj_text)
+            return normalize_to_list(data, list_key)
+        except json.JSONDecodeError:
             pass
 
     # 4. Final Fallback: Regex-based field extraction (for non-JSON or badly malformed output)
     # This is useful if the LLM just lists "Name: X, Amount: Y"
     try:
-        # Extract name/description - now with optional quotes
-        name_match = re.search(r'"?(?:name|description|payee|institution)"?\s*[:=-]\s*"?([^"\n,]+)"?', clean_text, re.IGNORECASE)
-        # Extract amount/value - now with optional quotes
-        amount_match = re.search(r'"?(?:amount|value|balance|price|total)"?\s*[:=-]\s*"?([\d,.]+)"?', clean_text, re.IGNORECASE)
-        
-        if name_match and amount_match:
-            name = name_match.group(1)
+        # First value seen for each field, in one pass over the text
+        fields = {}
+        for match in _FIELDS_RE.finditer(clean_text):
+            field = match.lastgroup
+            if field not in fields:
+                fields[field] = match.group(field)
+                if len(fields) == len(_FIELD_RES):
+                    break
+
+        if fields:
+            # A match can swallow a later field's text (e.g. a name running on
+            # into "amount: 5"), so look the required ones up individually too
+            for field in ('name', 'amount'):
+                if field not in fields:
+                    field_match = _FIELD_RES[field].search(clean_text)
+                    if field_match:
+                        fields[field] = field_match.group(1)
+
+        if 'name' in fields and 'amount' in fields:
             # Clean amount (remove commas)
-            amount_str = amount_match.group(1).replace(',', '')
+            amount_str = fields['amount'].replace(',', '')
             try:
                 amount = float(amount_str)
                 # Map other common fields
-                type_match = re.search(r'"?(?:type|category)"?\s*:\s*"([^"]+)"', clean_text, re.IGNORECASE)
-                freq_match = re.search(r'"?frequency"?\s*:\s*"([^"]+)"', clean_text, re.IGNORECASE)
-                
+                item_type = fields.get('type', 'other')
+
                 dummy_obj = {
-                    'name': name,
+                    'name': fields['name'],
                     'amount': amount,
                     'value': amount,
-                    'type': type_match.group(1) if type_match else 'other',
-                    'category': type_match.group(1) if type_match else 'other',
-                    'frequency': freq_match.group(1) if freq_match else 'monthly'
+                    'type': item_type,
+                    'category': item_type,
+                    'frequency': fields.get('frequency', 'monthly')
                 }
                 return [dummy_obj]
             except:
@@ -185,7 +625,7 @@ def resilient_parse_llm_json(text_response, list_key):
     except:
         pass
 
-    print(f"Failed to parse LLM response as JSON: {text_response[:200]}...")
+    logger.warning("Failed to parse LLM response as JSON: %s...", text_response[:200])
     return []
 
 def normalize_to_list(data, list_key):
@@ -251,126 +691,113 @@ def call_gemini_with_fallback(prompt, api_key, image_data=None, mime_type=None,
             models.remove(model)
         models.insert(0, model)
 
-    last_error = None
-
-    for model_name in models:
-        try:
-            # DESTROY 404s: Ensure model name is formatted correctly for v1beta
-            # Must be 'models/model-id'
-            model_id = model_name.replace('models/', '')
-            full_model_path = f"models/{model_id}"
-            
-            print(f"Attempting Gemini model: {full_model_path}")
-
-            # Build request based on whether we have image data
-            if image_data:
-                # File extraction case (images, PDFs, etc.)
-                if isinstance(image_data, str):
-                    file_bytes = base64.b64decode(image_data)
-                else:
-                    file_bytes = image_data
-
-                # Convert to base64 for API
-                file_b64 = base64.b64encode(file_bytes).decode('utf-8')
+    # Check for invalid API key (contains masking characters)
+    if '•' in api_key or '●' in api_key or not api_key.isascii():
+        raise Exception("API key contains invalid characters (possibly masked). Please re-enter your API key in Settings → AI Settings.")
+
+    # Build the request payload once; only the model in the URL changes between attempts
+    if image_data:
+        # File extraction case (images, PDFs, etc.). Base64 input is sent as-is;
+        # it is only decoded when the raw bytes are actually needed.
+        if isinstance(image_data, str):
+            file_b64 = image_data
+            file_bytes = None
+        else:
+            file_b64 = None
+            file_bytes = image_data
 
-                # Determine MIME type if not provided
-                if not mime_type:
-                    mime_type = 'image/png'
-                    try:
-                        img = Image.open(BytesIO(file_bytes))
-                        if img.format == 'JPEG':
-                            mime_type = 'image/jpeg'
-                        elif img.format == 'PNG':
-                            mime_type = 'image/png'
-                        elif img.format == 'WEBP':
-                            mime_type = 'image/webp'
-                    except:
-                        # If it's not an image, check for PDF magic bytes
-                        if file_bytes[:4] == b'%PDF':
-                            mime_type = 'application/pdf'
-
-                # For text files (CSV, TXT, etc.), include content in the prompt
-                if mime_type in ['text/csv', 'text/plain']:
-                    text_content = file_bytes.decode('utf-8', errors='replace')
-                    enhanced_prompt = f"{prompt}\n\nDocument Data:\n```\n{text_content}\n```"
-                    payload = {
-                        'contents': [{
-                            'parts': [{'text': enhanced_prompt}]
-                        }],
-                        'generationConfig': {
-                            'response_mime_type': 'application/json'
-                        }
-                    }
-                else:
-                    # Images and PDFs can be sent as inline_data
-                    payload = {
-                        'contents': [{
-                            'parts': [
-                                {'text': prompt},
-                                {
-                                    'inline_data': {
-                                        'mime_type': mime_type,
-                                        'data': file_b64
-                                    }
-                                }
-                            ]
-                        }],
-                        'generationConfig': {
-                            'response_mime_type': 'application/json'
+        # Determine MIME type if not provided
+        if not mime_type:
+            # Only the header is needed; 16 base64 chars decode to 12 bytes
+            try:
+                head = file_bytes[:12] if file_bytes is not None else _b64.b64decode(file_b64[:16])
+            except (binascii.Error, ValueError):
+                head = b''
+            mime_type = _sniff_mime(head)
+
+        # For text files (CSV, TXT, etc.), include content in the prompt
+        if mime_type in ['text/csv', 'text/plain']:
+            if file_bytes is None:
+                file_bytes = _b64.b64decode(file_b64)
+            text_content = file_bytes.decode('utf-8', errors='replace')
+            enhanced_prompt = f"{prompt}\n\nDocument Data:\n```\n{text_content}\n```"
+            payload = {
+                'contents': [{
+                    'parts': [{'text': enhanced_prompt}]
+                }],
+                'generationConfig': {
+                    'response_mime_type': 'application/json'
+                }
+            }
+        else:
+            # Images and PDFs can be sent as inline_data
+            if file_b64 is None:
+                file_b64 = _b64.b64encode(file_bytes).decode('ascii')
+            payload = {
+                'contents': [{
+                    'parts': [
+                        {'text': prompt},
+                        {
+                            'inline_data': {
+                                'mime_type': mime_type,
+                                'data': file_b64
+                            }
                         }
-                    }
-            else:
-                # Text-only case
-                payload = {
-                    'contents': [{
-                        'parts': [{'text': prompt}]
-                    }],
-                    'generationConfig': {
-                        'response_mime_type': 'application/json'
-                    }
+                    ]
+                }],
+                'generationConfig': {
+                    'response_mime_type': 'application/json'
                 }
+            }
+    else:
+        # Text-only case
+        payload = {
+            'contents': [{
+                'parts': [{'text': prompt}]
+            }],
+            'generationConfig': {
+                'response_mime_type': 'application/json'
+            }
+        }
 
-            # Use v1beta for all calls - it's more robust and required for PDF/Document support
-            api_version = 'v1beta'
-
-            # Check for invalid API key (contains masking characters)
-            if '•' in api_key or '●' in api_key or not api_key.isascii():
-                raise Exception("API key contains invalid characters (possibly masked). Please re-enter your API key in Settings → AI Settings.")
+    # Use v1beta for all calls - it's more robust and required for PDF/Document support
+    api_version = 'v1beta'
 
-            # Call Gemini REST API
-            url = f'https://generativelanguage.googleapis.com/{api_version}/{full_model_path}:generateContent?key={api_key}'
+    def attempt(model_name):
+        # DESTROY 404s: Ensure model name is formatted correctly for v1beta
+        # Must be 'models/model-id'
+        model_id = model_name.replace('models/', '')
+        full_model_path = f"models/{model_id}"
 
-            response = requests.post(url, json=payload, timeout=60)
+        logger.debug("Attempting Gemini model: %s", full_model_path)
 
-            print(f"  Gemini API Response: status={response.status_code}")
+        # Call Gemini REST API
+        url = f'https://generativelanguage.googleapis.com/{api_version}/{full_model_path}:generateContent?key={api_key}'
 
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    text = result['candidates'][0]['content']['parts'][0]['text']
-                    print(f"  Success with model: {model_name}, response length: {len(text)}")
-                    return text
-                else:
-                    print(f"  No candidates in response: {json.dumps(result)[:500]}")
-                    raise Exception(f"No candidates in response: {result}")
-            else:
-                error_text = response.text[:500] if response.text else 'No response body'
-                print(f"  Gemini API Error: {response.status_code} - {error_text}")
-                error_detail = response.json() if response.text else {'error': response.text}
-                raise Exception(f"{response.status_code} {error_detail}")
+        response = _post_json(url, payload)
 
-        except Exception as e:
-            last_error = e
-            error_str = str(e)
-            print(f"Model {model_name} failed: {error_str}")
+        logger.debug("Gemini API response: status=%s", response.status_code)
 
-            # Check for quota errors - try other models if quota exceeded on this specific one
-            if '429' in error_str or 'quota' in error_str.lower() or 'RESOURCE_EXHAUSTED' in error_str:
-                # Often flash is rate limited but pro isn't, or vice-versa
-                continue
-
-            # Continue trying other models
-            continue
+        if response.status_code == 200:
+            result = response.json()
+            if 'candidates' in result and len(result['candidates']) > 0:
+                text = result['candidates'][0]['content']['parts'][0]['text']
+                logger.debug("Success with model: %s, response length: %d", model_name, len(text))
+                return text
+            logger.warning("No candidates in Gemini response: %s", json.dumps(result)[:500])
+            raise Exception(f"No candidates in response: {result}")
+
+        error_text = response.text[:500] if response.text else 'No response body'
+        logger.warning("Gemini API error: %s - %s", response.status_code, error_text)
+        error_detail = response.json() if response.text else {'error': response.text}
+        raise Exception(f"{response.status_code} {error_detail}")
+
+    # Any failure (including per-model quota errors - often flash is rate
+    # limited but pro isn't, or vice-versa) falls through to the next model
+    try:
+        return _hedged_first_success(models, attempt)
+    except Exception as e:
+        last_error = e
 
     # If all models failed
     last_error_str = str(last_error)
@@ -379,6 +806,21 @@ def call_gemini_with_fallback(prompt, api_key, image_data=None, mime_type=None,
     raise Exception(f"All Gemini models failed. Last error: {last_error_str}")
 
 
+def _claude_cached_text(text):
+    """A text content block marked as a point Anthropic may prompt-cache up to.
+
+    Repeated extraction prompts and advisor turns then reuse the server-side
+    prefix instead of paying for it again; prompts below the provider's
+    minimum cacheable length are simply processed uncached.
+    """
+    return {'type': 'text', 'text': text, 'cache_control': {'type': 'ephemeral'}}
+
+
+def _claude_cached_system(text):
+    """Wrap a static system prompt as a cacheable system block."""
+    return [_claude_cached_text(text)]
+
+
 def call_claude_with_vision(prompt, api_key, image_b64, mime_type, model=None):
     """Calls Anthropic Claude with vision support."""
     url = 'https://api.anthropic.com/v1/messages'
@@ -394,14 +836,17 @@ def call_claude_with_vision(prompt, api_key, image_b64, mime_type, model=None):
     # Handle CSV case: Include as text in the prompt instead of an image
     if mime_type == 'text/csv':
         try:
-            csv_content = base64.b64decode(image_b64).decode('utf-8', errors='replace')
+            csv_content = _b64.b64decode(image_b64).decode('utf-8', errors='replace')
             payload = {
                 'model': model_name,
                 'max_tokens': 4096,
                 'messages': [
                     {
                         'role': 'user',
-                        'content': f"{prompt}\n\nCSV Data:\n```\n{csv_content}\n```"
+                        'content': [
+                            _claude_cached_text(prompt),
+                            {'type': 'text', 'text': f"CSV Data:\n```\n{csv_content}\n```"}
+                        ]
                     }
                 ]
             }
@@ -414,6 +859,8 @@ def call_claude_with_vision(prompt, api_key, image_b64, mime_type, model=None):
         if mime_type == 'image/jpg':
             anthropic_mime = 'image/jpeg'
 
+        # The extraction instructions lead the user turn as the cached prefix;
+        # only the image after them varies between calls
         payload = {
             'model': model_name,
             'max_tokens': 4096,
@@ -421,6 +868,7 @@ def call_claude_with_vision(prompt, api_key, image_b64, mime_type, model=None):
                 {
                     'role': 'user',
                     'content': [
+                        _claude_cached_text(prompt),
                         {
                             'type': 'image',
                             'source': {
@@ -428,10 +876,6 @@ def call_claude_with_vision(prompt, api_key, image_b64, mime_type, model=None):
                                 'media_type': anthropic_mime,
                                 'data': image_b64,
                             },
-                        },
-                        {
-                            'type': 'text',
-                            'text': prompt
                         }
                     ],
                 }
@@ -439,7 +883,7 @@ def call_claude_with_vision(prompt, api_key, image_b64, mime_type, model=None):
         }
     
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
+        response = _post_json(url, payload, headers=headers)
         if response.status_code == 200:
             return response.json()['content'][0]['text']
         else:
@@ -462,7 +906,7 @@ def call_openai_with_vision(prompt, api_key, image_b64, mime_type, model=None):
     # Handle CSV case: Include as text in the prompt instead of an image URL
     if mime_type == 'text/csv':
         try:
-            csv_content = base64.b64decode(image_b64).decode('utf-8', errors='replace')
+            csv_content = _b64.b64decode(image_b64).decode('utf-8', errors='replace')
             payload = {
                 "model": model_name,
                 "messages": [
@@ -496,7 +940,7 @@ def call_openai_with_vision(prompt, api_key, image_b64, mime_type, model=None):
         }
     
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
+        response = _post_json(url, payload, headers=headers)
         if response.status_code == 200:
             return response.json()['choices'][0]['message']['content']
         else:
@@ -505,10 +949,6 @@ def call_openai_with_vision(prompt, api_key, image_b64, mime_type, model=None):
         raise Exception(f"Failed to call OpenAI Vision: {str(e)}")
 
 
-from src.models.profile import Profile
-from src.models.conversation import Conversation
-from flask_login import current_user
-
 def call_llm(provider, prompt, api_key, history=None, system_prompt=None, lmstudio_url=None, localai_url=None, ollama_url=None, model=None):
     """Unified interface to call various LLM providers."""
     if provider == 'gemini':
@@ -526,9 +966,71 @@ def call_llm(provider, prompt, api_key, history=None, system_prompt=None, lmstud
         return call_openai_compatible(provider, prompt, api_key, history, system_prompt, model=model)
 
 
+# genai.Client instances, one per API key. Each client owns its own HTTP
+# connection pool, so building one per call re-did the TLS handshake every
+# time; reusing it keeps connections warm across chat turns and PDF pages.
+_gemini_clients = OrderedDict()
+_gemini_clients_lock = threading.Lock()
+_GEMINI_CLIENTS_MAX = 32
+
+
+def _gemini_client(api_key):
+    """Return the shared genai.Client for this API key, creating it on first use."""
+    # Keyed on the client class as well, so a replaced genai module never
+    # gets an instance built from the previous one
+    key = (genai.Client, api_key)
+    with _gemini_clients_lock:
+        client = _gemini_clients.get(key)
+        if client is not None:
+            _gemini_clients.move_to_end(key)
+            return client
+        client = genai.Client(api_key=api_key)
+        _gemini_clients[key] = client
+        while len(_gemini_clients) > _GEMINI_CLIENTS_MAX:
+            _gemini_clients.popitem(last=False)
+        return client
+
+
+# Chat models in fallback order; a requested model is tried first
+_GEMINI_CHAT_MODELS = (
+    'models/gemini-2.5-flash',
+    'models/gemini-2.0-flash',
+    'models/gemini-3-flash-preview',
+    'models/gemini-3-pro-preview'
+)
+_CLAUDE_CHAT_MODELS = (
+    'claude-opus-4-5-20251101',
+    'claude-sonnet-4-5-20250929',
+    'claude-sonnet-4-20250514',
+    'claude-3-5-sonnet-20241022'
+)
+
+
+def _models_to_try(models, model=None):
+    """Models in the order to try them, the requested one first."""
+    models = list(models)
+    if model:
+        if model in models:
+            models.remove(model)
+        models.insert(0, model)
+    return models
+
+
+def _gemini_models_to_try(model=None):
+    """Gemini chat models in fallback order, with the API's models/ prefix."""
+    if model and not model.startswith('models/'):
+        model = f'models/{model}'
+    return _models_to_try(_GEMINI_CHAT_MODELS, model)
+
+
+def _gemini_rate_limited(e):
+    """Only quota errors move Gemini on to the next model."""
+    return '429' in str(e) or 'quota' in str(e).lower()
+
+
 def call_gemini(prompt, api_key, history=None, system_prompt=None, model=None):
     """Calls Gemini using the official client."""
-    client = genai.Client(api_key=api_key)
+    client = _gemini_client(api_key)
     
     contents = []
     if history:
@@ -540,38 +1042,28 @@ def call_gemini(prompt, api_key, history=None, system_prompt=None, model=None):
     
     contents.append(types.Content(role='user', parts=[types.Part(text=prompt)]))
 
-    models_to_try = [
-        'models/gemini-2.5-flash',
-        'models/gemini-2.0-flash',
-        'models/gemini-3-flash-preview',
-        'models/gemini-3-pro-preview'
-    ]
+    models_to_try = _gemini_models_to_try(model)
 
-    # If specific model requested, try it first
-    if model:
-        if not model.startswith('models/'):
-            model = f'models/{model}'
-        if model in models_to_try:
-            models_to_try.remove(model)
-        models_to_try.insert(0, model)
+    config = types.GenerateContentConfig(
+        system_instruction=system_prompt,
+        temperature=0.7,
+        response_mime_type="application/json"
+    )
 
-    for model_name in models_to_try:
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    system_instruction=system_prompt,
-                    temperature=0.7,
-                    response_mime_type="application/json"
-                )
-            )
-            return response.text
-        except Exception as e:
-            if '429' in str(e) or 'quota' in str(e).lower():
-                continue
-            raise e
-    raise Exception("All Gemini models failed or rate limited.")
+    def attempt(model_name):
+        response = client.models.generate_content(
+            model=model_name,
+            contents=contents,
+            config=config
+        )
+        return response.text
+
+    try:
+        return _hedged_first_success(models_to_try, attempt, should_fallback=_gemini_rate_limited)
+    except Exception as e:
+        if _gemini_rate_limited(e):
+            raise Exception("All Gemini models failed or rate limited.")
+        raise
 
 
 def call_claude(prompt, api_key, history=None, system_prompt=None, model=None):
@@ -582,19 +1074,7 @@ def call_claude(prompt, api_key, history=None, system_prompt=None, model=None):
             messages.append({'role': msg.role, 'content': msg.content})
     messages.append({'role': 'user', 'content': prompt})
 
-    models = [
-        'claude-opus-4-5-20251101',
-        'claude-sonnet-4-5-20250929',
-        'claude-sonnet-4-20250514',
-        'claude-3-5-sonnet-20241022'
-    ]
-    
-    if model:
-        if model in models:
-            models.remove(model)
-        models.insert(0, model)
-
-    for model in models:
+    for model in _models_to_try(_CLAUDE_CHAT_MODELS, model):
         try:
             payload = {
                 'model': model,
@@ -603,42 +1083,43 @@ def call_claude(prompt, api_key, history=None, system_prompt=None, model=None):
             }
             # Only include system if provided (Anthropic API rejects null)
             if system_prompt:
-                payload['system'] = system_prompt
+                payload['system'] = _claude_cached_system(system_prompt)
 
-            response = requests.post(
+            response = _post_json(
                 'https://api.anthropic.com/v1/messages',
+                payload,
                 headers={
                     'x-api-key': api_key,
                     'anthropic-version': '2023-06-01',
                     'content-type': 'application/json'
-                },
-                json=payload,
-                timeout=60
+                }
             )
             if response.status_code == 200:
                 return response.json()['content'][0]['text']
             else:
-                print(f"Claude API error for {model}: {response.status_code} {response.text[:200]}")
+                logger.warning("Claude API error for %s: %s %s", model, response.status_code, response.text[:200])
         except Exception as e:
-            print(f"Claude API exception for {model}: {str(e)}")
+            logger.warning("Claude API exception for %s: %s", model, e)
             continue
     raise Exception("Claude API call failed.")
 
 
+# OpenAI-compatible chat endpoints and their default models
+_OPENAI_COMPATIBLE_ENDPOINTS = {
+    'openai': ('https://api.openai.com/v1/chat/completions', 'gpt-5.2'),
+    'deepseek': ('https://api.deepseek.com/chat/completions', 'deepseek-chat'), # Maps to V4
+    'openrouter': ('https://openrouter.ai/api/v1/chat/completions', 'google/gemini-2.5-flash'),
+    'grok': ('https://api.x.ai/v1/chat/completions', 'grok-5'),
+    'mistral': ('https://api.mistral.ai/v1/chat/completions', 'mistral-large-25.12'),
+    'together': ('https://api.together.xyz/v1/chat/completions', 'meta-llama/Llama-4-70b-instruct'),
+    'huggingface': ('https://api-inference.huggingface.co/v1/chat/completions', 'meta-llama/Llama-4-70b-chat'),
+    'zhipu': ('https://open.bigmodel.cn/api/paas/v4/chat/completions', 'glm-5-flash')
+}
+
+
 def call_openai_compatible(provider, prompt, api_key, history=None, system_prompt=None, model=None):
     """Calls OpenAI-compatible APIs (OpenAI, DeepSeek, OpenRouter, etc.)."""
-    endpoints = {
-        'openai': ('https://api.openai.com/v1/chat/completions', 'gpt-5.2'),
-        'deepseek': ('https://api.deepseek.com/chat/completions', 'deepseek-chat'), # Maps to V4
-        'openrouter': ('https://openrouter.ai/api/v1/chat/completions', 'google/gemini-2.5-flash'),
-        'grok': ('https://api.x.ai/v1/chat/completions', 'grok-5'),
-        'mistral': ('https://api.mistral.ai/v1/chat/completions', 'mistral-large-25.12'),
-        'together': ('https://api.together.xyz/v1/chat/completions', 'meta-llama/Llama-4-70b-instruct'),
-        'huggingface': ('https://api-inference.huggingface.co/v1/chat/completions', 'meta-llama/Llama-4-70b-chat'),
-        'zhipu': ('https://open.bigmodel.cn/api/paas/v4/chat/completions', 'glm-5-flash')
-    }
-    
-    url, default_model = endpoints.get(provider, (None, None))
+    url, default_model = _OPENAI_COMPATIBLE_ENDPOINTS.get(provider, (None, None))
     if not url:
         raise Exception(f"Unsupported provider: {provider}")
 
@@ -654,18 +1135,17 @@ def call_openai_compatible(provider, prompt, api_key, history=None, system_promp
     messages.append({'role': 'user', 'content': prompt})
 
     try:
-        response = requests.post(
+        response = _post_json(
             url,
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
+            {
                 'model': active_model,
                 'messages': messages,
                 'temperature': 0.7
             },
-            timeout=60
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json'
+            }
         )
         if response.status_code == 200:
             return response.json()['choices'][0]['message']['content']
@@ -689,9 +1169,9 @@ def call_lmstudio(prompt, url, history=None, system_prompt=None):
     messages.append({'role': 'user', 'content': prompt})
 
     try:
-        response = requests.post(
+        response = _post_json(
             f"{url}/v1/chat/completions",
-            json={
+            {
                 'messages': messages,
                 'temperature': 0.7
             },
@@ -719,9 +1199,9 @@ def call_localai(prompt, url, history=None, system_prompt=None):
     messages.append({'role': 'user', 'content': prompt})
 
     try:
-        response = requests.post(
+        response = _post_json(
             f"{url}/v1/chat/completions",
-            json={
+            {
                 'messages': messages,
                 'temperature': 0.7
             },
@@ -753,7 +1233,7 @@ def call_ollama(prompt, url, history=None, system_prompt=None, model=None):
 
     try:
         # Use Ollama's OpenAI-compatible endpoint
-        response = requests.post(
+        response = _ollama_post(
             f"{url}/v1/chat/completions",
             json={
                 'model': model_name,
@@ -764,7 +1244,7 @@ def call_ollama(prompt, url, history=None, system_prompt=None, model=None):
             timeout=180  # Local models can be slow
         )
         if response.status_code == 200:
-            return response.json()['choices'][0]['message']['content']
+            return _response_json(response)['choices'][0]['message']['content']
         else:
             raise Exception(f"Ollama error: {response.status_code} {response.text}")
     except requests.exceptions.ConnectionError:
@@ -773,6 +1253,272 @@ def call_ollama(prompt, url, history=None, system_prompt=None, model=None):
         raise Exception(f"Failed to connect to Ollama at {url}: {str(e)}")
 
 
+def _chat_messages(prompt, history=None, system_prompt=None):
+    """Build an OpenAI/Claude style message list with decrypted history."""
+    messages = []
+    if system_prompt:
+        messages.append({'role': 'system', 'content': system_prompt})
+    if history:
+        for msg in history:
+            msg_content = msg.to_dict().get('content', '')
+            if msg_content:
+                messages.append({'role': msg.role, 'content': msg_content})
+    messages.append({'role': 'user', 'content': prompt})
+    return messages
+
+
+def _iter_sse_events(response):
+    """Yield the decoded JSON payload of each `data:` line in an SSE response."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            break
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            continue
+
+
+def _stream_openai_style(url, payload, headers=None, timeout=60, label='LLM', session=_SESSION):
+    """Stream content deltas from an OpenAI-compatible chat completions endpoint."""
+    payload = dict(payload, stream=True)
+    with session.post(url, headers=headers, json=payload, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"{label} API error: {response.status_code} {response.text[:200]}")
+        for event in _iter_sse_events(response):
+            choices = event.get('choices') or []
+            if choices:
+                delta = choices[0].get('delta', {}).get('content')
+                if delta:
+                    yield delta
+
+
+def _stream_first_available(models, start_stream, should_fallback=lambda e: True):
+    """Yield from the first model whose stream produces any text.
+
+    A model that fails before its first chunk hands over to the next one, as
+    call_gemini and call_claude do; once text has reached the caller the
+    stream is committed to that model and later errors propagate.
+    """
+    last_error = None
+    for model_name in models:
+        stream = start_stream(model_name)
+        try:
+            first = next(stream)
+        except StopIteration:
+            return
+        except Exception as e:
+            if not should_fallback(e):
+                raise
+            logger.warning("Streaming with %s failed, trying next model: %s", model_name, e)
+            last_error = e
+            continue
+        yield first
+        yield from stream
+        return
+    raise last_error
+
+
+def stream_llm(provider, prompt, api_key, history=None, system_prompt=None, lmstudio_url=None, localai_url=None, ollama_url=None, model=None):
+    """Streaming counterpart of call_llm: yields response text as it is generated."""
+    if provider == 'gemini':
+        client = _gemini_client(api_key)
+        contents = []
+        for msg in _chat_messages(prompt, history):
+            role = 'user' if msg['role'] == 'user' else 'model'
+            contents.append(types.Content(role=role, parts=[types.Part(text=msg['content'])]))
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            temperature=0.7
+        )
+
+        def gemini_stream(model_name):
+            for chunk in client.models.generate_content_stream(
+                model=model_name,
+                contents=contents,
+                config=config
+            ):
+                if chunk.text:
+                    yield chunk.text
+
+        try:
+            yield from _stream_first_available(_gemini_models_to_try(model), gemini_stream,
+                                               should_fallback=_gemini_rate_limited)
+        except Exception as e:
+            if _gemini_rate_limited(e):
+                raise Exception("All Gemini models failed or rate limited.")
+            raise
+
+    elif provider == 'claude':
+        messages = _chat_messages(prompt, history)
+
+        def claude_stream(model_name):
+            payload = {
+                'model': model_name,
+                'max_tokens': 4096,
+                'messages': messages,
+                'stream': True
+            }
+            # Only include system if provided (Anthropic API rejects null)
+            if system_prompt:
+                payload['system'] = _claude_cached_system(system_prompt)
+            with _SESSION.post(
+                'https://api.anthropic.com/v1/messages',
+                headers={
+                    'x-api-key': api_key,
+                    'anthropic-version': '2023-06-01',
+                    'content-type': 'application/json'
+                },
+                json=payload,
+                timeout=60,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Claude API error: {response.status_code} {response.text[:200]}")
+                for event in _iter_sse_events(response):
+                    if event.get('type') == 'content_block_delta':
+                        delta = event.get('delta', {}).get('text')
+                        if delta:
+                            yield delta
+
+        yield from _stream_first_available(_models_to_try(_CLAUDE_CHAT_MODELS, model), claude_stream)
+
+    elif provider in _LOCAL_PROVIDERS:
+        defaults = {
+            'lmstudio': (lmstudio_url, 'http://localhost:1234', 'LM Studio'),
+            'localai': (localai_url, 'http://localhost:8080', 'LocalAI'),
+            'ollama': (ollama_url, 'http://localhost:11434', 'Ollama'),
+        }
+        base_url, default_url, label = defaults[provider]
+        payload = {
+            'messages': _chat_messages(prompt, history, system_prompt),
+            'temperature': 0.7
+        }
+        if provider == 'ollama':
+            payload['model'] = model or 'llama3.2'
+        yield from _stream_openai_style(f"{base_url or default_url}/v1/chat/completions", payload,
+                                        timeout=180, label=label,
+                                        session=_OLLAMA_SESSION if provider == 'ollama' else _SESSION)
+
+    else:
+        url, default_model = _OPENAI_COMPATIBLE_ENDPOINTS.get(provider, (None, None))
+        if not url:
+            raise Exception(f"Unsupported provider: {provider}")
+        payload = {
+            'model': model or default_model,
+            'messages': _chat_messages(prompt, history, system_prompt),
+            'temperature': 0.7
+        }
+        yield from _stream_openai_style(
+            url,
+            payload,
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json'
+            },
+            label=provider.capitalize()
+        )
+
+
+# Provider auto-detect order for the advisor, paired with the settings key that enables it
+_PROVIDER_KEY_NAMES = (
+    ('gemini', 'gemini_api_key'),
+    ('claude', 'claude_api_key'),
+    ('openai', 'openai_api_key'),
+    ('grok', 'grok_api_key'),
+    ('openrouter', 'openrouter_api_key'),
+    ('deepseek', 'deepseek_api_key'),
+    ('mistral', 'mistral_api_key'),
+    ('together', 'together_api_key'),
+    ('huggingface', 'huggingface_api_key'),
+    ('zhipu', 'zhipu_api_key'),
+    ('lmstudio', 'lmstudio_url'),
+    ('localai', 'localai_url'),
+    ('ollama', 'ollama_url'),
+)
+
+# Self-hosted providers are configured with a URL instead of an API key
+_LOCAL_PROVIDERS = frozenset({'lmstudio', 'localai', 'ollama'})
+
+# Providers whose extraction path accepts images directly
+_VISION_PROVIDERS = frozenset({'gemini', 'claude', 'openai'})
+
+# Hosted provider -> settings key holding its API key
+_PROVIDER_KEYS = {p: key_name for p, key_name in _PROVIDER_KEY_NAMES if p not in _LOCAL_PROVIDERS}
+
+# Advisor profile context cache, keyed by (profile id, updated_at) so any save
+# of the profile naturally invalidates the entry. Least recently used entries
+# are evicted; the lock guards it across concurrent request threads.
+_profile_context_cache = OrderedDict()
+_profile_context_lock = threading.Lock()
+_PROFILE_CONTEXT_CACHE_MAX = 256
+
+
+def _build_profile_context(profile):
+    """Render the profile summary that is prepended to the advisor system prompt."""
+    profile_data = profile.data_dict
+    financial = profile_data.get('financial', {})
+    assets = profile_data.get('assets', {})
+
+    totals = {'retirement_accounts': 0, 'taxable_accounts': 0, 'real_estate': 0}
+    for key in totals:
+        totals[key] = sum(a.get('value', 0) for a in assets.get(key, []))
+
+    return f"""
+        USER PROFILE CONTEXT:
+        Name: {profile.name}
+        Birth Date: {profile.birth_date}
+        Retirement Date: {profile.retirement_date}
+        
+        FINANCIALS:
+        Annual Income: ${financial.get('annual_income', 0):,}
+        Annual Expenses: ${financial.get('annual_expenses', 0):,}
+        Social Security (monthly): ${financial.get('social_security_benefit', 0):,}
+        
+        ASSETS:
+        Retirement: ${totals['retirement_accounts']:,}
+        Taxable: ${totals['taxable_accounts']:,}
+        Real estate: ${totals['real_estate']:,}
+        """
+
+
+def _get_profile_context(profile):
+    """Return the advisor context for a profile, rebuilding only when the profile changed."""
+    cache_key = (profile.id, profile.updated_at)
+    with _profile_context_lock:
+        context = _profile_context_cache.get(cache_key)
+        if context is not None:
+            _profile_context_cache.move_to_end(cache_key)
+            return context
+
+    context = _build_profile_context(profile)
+    with _profile_context_lock:
+        _profile_context_cache[cache_key] = context
+        while len(_profile_context_cache) > _PROFILE_CONTEXT_CACHE_MAX:
+            _profile_context_cache.popitem(last=False)
+    return context
+
+
+def _record_failed_advisor_turn(user_msg, profile_name, error, streamed=False):
+    """Shared advisor_chat error handling: log, keep the user's message, audit.
+
+    Call from inside an except block so the traceback is logged.
+    """
+    logger.exception("Advisor chat stream error" if streamed else "Advisor chat error")
+    # The LLM call failed: still keep the user's side of the turn
+    if user_msg is not None:
+        try:
+            user_msg.save()
+        except Exception as save_error:
+            logger.error("Failed to save user message: %s", save_error)
+    details = {'profile_name': profile_name, 'error': str(error)}
+    if streamed:
+        details['streamed'] = True
+    enhanced_audit_logger.log(action='AI_ADVISOR_CHAT_ERROR', details=details, status_code=500)
+
+
 @ai_services_bp.route('/advisor/chat', methods=['POST'])
 @login_required
 @limiter.limit("20 per hour")
@@ -787,6 +1533,8 @@ def advisor_chat():
     if not profile_name or not user_message:
         return jsonify({'error': 'profile_name and message are required'}), 400
 
+    user_msg = None
+    assistant_text = None
     try:
         profile = Profile.get_by_name(profile_name, current_user.id)
         if not profile:
@@ -798,24 +1546,18 @@ def advisor_chat():
         # Determine provider: priority = request > profile preference > Gemini (if key exists)
         provider = requested_provider or data_dict.get('preferred_ai_provider')
         
-        # If no preferred provider, find first available key
+        # If no preferred provider, use the first with a configured key, else Gemini
         if not provider:
-            for p in ['gemini', 'claude', 'openai', 'grok', 'openrouter', 'deepseek', 'mistral', 'together', 'huggingface', 'zhipu', 'lmstudio', 'localai', 'ollama']:
-                key_name = f"{p}_api_key" if p not in ['lmstudio', 'localai', 'ollama'] else f"{p}_url"
-                if api_keys.get(key_name):
-                    provider = p
-                    break
-        
-        if not provider:
-            provider = 'gemini' # Fallback to gemini
+            provider = next((p for p, key_name in _PROVIDER_KEY_NAMES if api_keys.get(key_name)), 'gemini')
 
         # Get the appropriate key/url
-        api_key = api_keys.get(f"{provider}_api_key")
+        key_field = _PROVIDER_KEYS.get(provider)
+        api_key = api_keys.get(key_field) if key_field else None
         lmstudio_url = sanitize_url(api_keys.get("lmstudio_url"), "http://localhost:1234")
         localai_url = sanitize_url(api_keys.get("localai_url"), "http://localhost:8080")
         ollama_url = sanitize_url(api_keys.get("ollama_url"), "http://localhost:11434")
 
-        if not api_key and provider not in ['lmstudio', 'localai', 'ollama']:
+        if not api_key and provider not in _LOCAL_PROVIDERS:
             return jsonify({
                 'error': f'{provider.capitalize()} API key not configured. Please configure in AI Settings.'
             }), 400
@@ -824,26 +1566,7 @@ def advisor_chat():
         history = Conversation.list_by_profile(current_user.id, profile.id)
         
         # Prepare context from profile
-        profile_data = profile.data_dict
-        financial = profile_data.get('financial', {})
-        assets = profile_data.get('assets', {})
-        
-        context = f"""
-        USER PROFILE CONTEXT:
-        Name: {profile.name}
-        Birth Date: {profile.birth_date}
-        Retirement Date: {profile.retirement_date}
-        
-        FINANCIALS:
-        Annual Income: ${financial.get('annual_income', 0):,}
-        Annual Expenses: ${financial.get('annual_expenses', 0):,}
-        Social Security (monthly): ${financial.get('social_security_benefit', 0):,}
-        
-        ASSETS:
-        Retirement: ${sum(a.get('value', 0) for a in assets.get('retirement_accounts', [])):,}
-        Taxable: ${sum(a.get('value', 0) for a in assets.get('taxable_accounts', [])):,}
-        Real estate: ${sum(a.get('value', 0) for a in assets.get('real_estate', [])):,}
-        """
+        context = _get_profile_context(profile)
 
         system_prompt = f"""You are an expert financial advisor specializing in retirement planning, tax optimization, and estate planning.
         {context}
@@ -851,26 +1574,76 @@ def advisor_chat():
         Provide professional, clear, and actionable advice. Always include a disclaimer that you are an AI and the user should consult with a human professional for final decisions.
         """
 
-        # Save user message
+        # Build the user message now (keeps its timestamp) but defer the write
+        # so both sides of the turn are committed together after the LLM returns
         user_msg = Conversation(
             user_id=current_user.id,
             profile_id=profile.id,
             role='user',
             content=user_message
         )
-        user_msg.save()
 
-        # Call the selected LLM
-        assistant_text = call_llm(provider, user_message, api_key, history, system_prompt, lmstudio_url, localai_url, model=data.get('llm_model'))
+        if data.get('stream'):
+            # Server-Sent Events: forward tokens as they arrive and persist the
+            # turn once the provider has finished
+            user_id = current_user.id
+
+            def generate():
+                parts = []
+                try:
+                    for delta in stream_llm(provider, user_message, api_key, history, system_prompt,
+                                            lmstudio_url, localai_url, ollama_url, model=data.get('llm_model')):
+                        parts.append(delta)
+                        yield f"data: {json.dumps({'delta': delta})}\n\n"
+                except Exception as e:
+                    _record_failed_advisor_turn(user_msg, profile_name, e, streamed=True)
+                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                    return
+
+                streamed_text = "".join(parts)
+                assistant_msg = Conversation(
+                    user_id=user_id,
+                    profile_id=profile.id,
+                    role='assistant',
+                    content=streamed_text
+                )
+                Conversation.save_many([user_msg, assistant_msg])
+                enhanced_audit_logger.log(
+                    action='AI_ADVISOR_CHAT',
+                    table_name='conversation',
+                    record_id=profile.id,
+                    details={
+                        'profile_name': profile_name,
+                        'provider': provider,
+                        'message_length': len(user_message),
+                        'response_length': len(streamed_text),
+                        'streamed': True
+                    },
+                    status_code=200
+                )
+                yield f"data: {json.dumps({'done': True, 'provider': provider, 'status': 'success'})}\n\n"
+
+            return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        # Call the selected LLM; the copied request context keeps the session
+        # DEK available for decrypting history in the worker thread
+        timeout = LOCAL_ADVISOR_LLM_TIMEOUT if provider in _LOCAL_PROVIDERS else ADVISOR_LLM_TIMEOUT
+        future = _LLM_POOL.submit(copy_current_request_context(call_llm), provider, user_message, api_key,
+                                  history, system_prompt, lmstudio_url, localai_url, ollama_url,
+                                  model=data.get('llm_model'))
+        try:
+            assistant_text = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"{provider} did not respond within {timeout} seconds")
 
-        # Save assistant message
         assistant_msg = Conversation(
             user_id=current_user.id,
             profile_id=profile.id,
             role='assistant',
             content=assistant_text
         )
-        assistant_msg.save()
+        Conversation.save_many([user_msg, assistant_msg])
 
         enhanced_audit_logger.log(
             action='AI_ADVISOR_CHAT',
@@ -891,17 +1664,8 @@ def advisor_chat():
         }), 200
 
     except Exception as e:
-        print(f"Advisor chat error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
-
-    except Exception as e:
-        print(f"Advisor chat error: {str(e)}")
-        enhanced_audit_logger.log(
-            action='AI_ADVISOR_CHAT_ERROR',
-            details={'profile_name': profile_name, 'error': str(e)},
-            status_code=500
-        )
-        return jsonify({'error': str(e)}), 500
+        _record_failed_advisor_turn(user_msg if assistant_text is None else None, profile_name, e)
+        return jsonify({'error': str(e)}), 504 if isinstance(e, TimeoutError) else 500
 
 
 @ai_services_bp.route('/advisor/history', methods=['GET'])
@@ -962,10 +1726,8 @@ def clear_advisor_history(profile_id: int):
     return jsonify({'message': 'History cleared'}), 200
 
 
-EXTRACT_CONFIGS = {
-    'assets': {
-        'list_key': 'assets',
-        'prompt': """
+# Extraction prompts
+_ASSETS_PROMPT = """
             TASK: Extract all investment accounts, bank accounts, or assets from this document.
             FORMAT: You must return a JSON array of objects.
             FIELDS PER OBJECT:
@@ -978,12 +1740,9 @@ EXTRACT_CONFIGS = {
             [{"name": "Savings", "type": "savings", "value": 5000, "institution": "Chase"}]
             
             CRITICAL: Return ONLY the JSON array. Do not include any other text.
-            """,
-        'log_action': 'EXTRACT_ASSETS'
-    },
-    'income': {
-        'list_key': 'income',
-        'prompt': """
+            """
+
+_INCOME_PROMPT = """
             TASK: Extract all regular income streams from this document.
             FORMAT: You must return a JSON array of objects.
             FIELDS PER OBJECT:
@@ -1000,12 +1759,9 @@ EXTRACT_CONFIGS = {
             Output ONE entry: {"name": "Employer Direct Deposit", "amount": 2837.50, "frequency": "bi-weekly"}
 
             CRITICAL: Return ONLY the JSON array. Do not include any other text.
-            """,
-        'log_action': 'EXTRACT_INCOME'
-    },
-    'expenses': {
-        'list_key': 'expenses',
-        'prompt': """
+            """
+
+_EXPENSES_PROMPT = """
             TASK: Extract all recurring or significant expenses from this document.
             FORMAT: You must return a JSON array of objects.
             FIELDS PER OBJECT:
@@ -1025,11 +1781,103 @@ EXTRACT_CONFIGS = {
             Output ONE entry: {"name": "Netflix", "amount": 16.66, "frequency": "monthly", "category": "subscriptions"}
 
             CRITICAL: Return ONLY the JSON array. Do not include any other text.
-            """,
+            """
+
+# Fingerprint of the prompts: editing any of them invalidates cached responses
+PROMPT_VERSION = hashlib.sha256(
+    (_ASSETS_PROMPT + _INCOME_PROMPT + _EXPENSES_PROMPT).encode('utf-8')
+).hexdigest()[:12]
+
+EXTRACT_CONFIGS = {
+    'assets': {
+        'list_key': 'assets',
+        'prompt': _ASSETS_PROMPT,
+        'log_action': 'EXTRACT_ASSETS'
+    },
+    'income': {
+        'list_key': 'income',
+        'prompt': _INCOME_PROMPT,
+        'log_action': 'EXTRACT_INCOME'
+    },
+    'expenses': {
+        'list_key': 'expenses',
+        'prompt': _EXPENSES_PROMPT,
         'log_action': 'EXTRACT_EXPENSES'
     }
 }
 
+# The prompts are static, so build the prompt + separator prefixes once rather
+# than formatting them into every page's request
+for _config in EXTRACT_CONFIGS.values():
+    _config['text_prefix'] = _config['prompt'] + "\n\nTEXT:\n"
+    _config['data_prefix'] = _config['prompt'] + "\n\nDATA:\n"
+del _config
+
+def _stream_extraction(provider, prompt, api_key, llm_kwargs):
+    """Stream a text extraction, yielding an NDJSON progress line per item as it completes.
+
+    Use with ``yield from``; evaluates to the full response text.
+    """
+    parser = _StreamedItemParser()
+    pieces = []
+    found = 0
+    for piece in stream_llm(provider, prompt, api_key, **llm_kwargs):
+        pieces.append(piece)
+        for item in parser.feed(piece):
+            found += 1
+            yield _ndjson_line({'status': 'processing', 'partial_item': item, 'message': f'Found {found} item(s)...'})
+    return ''.join(pieces)
+
+
+def _extract_pdf_chunk(chunk, content_type, provider, prompt, api_key, model=None,
+                       lmstudio_url=None, localai_url=None, ollama_url=None, text_prefix=None):
+    """Send one PDF chunk (page text, or JPEG bytes of a scanned page) to a provider."""
+    # Bound in-flight calls across all requests, not just within this PDF
+    semaphore = _LOCAL_LLM_SEMAPHORE if provider in _LOCAL_PROVIDERS else _REMOTE_LLM_SEMAPHORE
+    with semaphore:
+        return _call_provider_for_chunk(chunk, content_type, provider, prompt, api_key, model,
+                                        lmstudio_url, localai_url, ollama_url, text_prefix)
+
+
+def _call_provider_for_chunk(chunk, content_type, provider, prompt, api_key, model,
+                             lmstudio_url, localai_url, ollama_url, text_prefix=None):
+    """Provider dispatch for _extract_pdf_chunk."""
+    if content_type == "text":
+        text_prompt = (text_prefix or prompt + "\n\nTEXT:\n") + chunk
+        if provider == 'gemini':
+            return call_gemini_with_fallback(text_prompt, api_key, model=model)
+        return call_llm(provider, text_prompt, api_key, model=model, lmstudio_url=lmstudio_url,
+                        localai_url=localai_url, ollama_url=ollama_url)
+
+    if provider == 'gemini':
+        return call_gemini_with_fallback(prompt, api_key, image_data=chunk, mime_type="image/jpeg", model=model)
+    if provider in ['claude', 'openai']:
+        fn = call_claude_with_vision if provider == 'claude' else call_openai_with_vision
+        # Page images stay as bytes until a provider needs base64
+        return fn(prompt, api_key, _b64.b64encode(chunk).decode('ascii'), "image/jpeg", model=model)
+
+    # Other providers (deepseek, grok, mistral, local, etc.) - text extraction only
+    logger.warning("Provider '%s' cannot process image chunks from scanned PDF", provider)
+    return ""
+
+
+# MIME types inferred from the upload's file extension
+_EXT_MIME = {'.csv': 'text/csv', '.txt': 'text/plain', '.pdf': 'application/pdf'}
+
+
+def _batch_jobs(file_bytes, image_b64, mime_type, prompt):
+    """Split an upload into batch jobs: one per PDF chunk, or one for the whole file."""
+    if mime_type == 'application/pdf' or file_bytes[:5] == b'%PDF-':
+        chunks, content_type = process_pdf_content_cached(file_bytes, num_workers=PDF_RENDER_WORKERS)
+        if content_type == 'text':
+            return [{'custom_id': f'page_{i}', 'prompt': prompt, 'text': chunk} for i, chunk in enumerate(chunks)]
+        return [{'custom_id': f'page_{i}', 'prompt': prompt, 'mime_type': 'image/jpeg',
+                 'image_b64': _b64.b64encode(chunk).decode('ascii')} for i, chunk in enumerate(chunks)]
+    if mime_type in ['text/csv', 'text/plain']:
+        return [{'custom_id': 'page_0', 'prompt': prompt, 'text': file_bytes.decode('utf-8', errors='replace')}]
+    return [{'custom_id': 'page_0', 'prompt': prompt, 'image_b64': image_b64, 'mime_type': mime_type}]
+
+
 @ai_services_bp.route('/extract-items/<item_type>', methods=['POST'])
 @login_required
 @limiter.limit("50 per hour")
@@ -1046,16 +1894,19 @@ def extract_items(item_type):
     requested_provider = data.get('llm_provider')
     requested_model = data.get('llm_model')
     profile_name = data.get('profile_name')
+    # force=true re-extracts with the LLM and overwrites any stored result
+    force = bool(data.get('force'))
 
-    # Detect TXT/CSV
-    if not mime_type:
-        if file_name.lower().endswith('.csv'): mime_type = 'text/csv'
-        elif file_name.lower().endswith('.txt'): mime_type = 'text/plain'
-        elif file_name.lower().endswith('.pdf'): mime_type = 'application/pdf'
+    # Detect TXT/CSV/PDF from the extension when the client sent no MIME type
+    mime_type = mime_type or _EXT_MIME.get(os.path.splitext(file_name)[1].lower())
 
     if not image_b64 or not profile_name:
         return jsonify({'error': 'image and profile_name are required'}), 400
 
+    # O(1) size guard before any lookup or decoding work
+    if len(image_b64) > MAX_UPLOAD_B64_CHARS:
+        return jsonify({'error': 'Payload too large (>30MB decoded)'}), 413
+
     try:
         profile = Profile.get_by_name(profile_name, current_user.id)
         if not profile: return jsonify({'error': 'Profile not found'}), 404
@@ -1065,57 +1916,150 @@ def extract_items(item_type):
         provider = requested_provider or data_dict.get('preferred_ai_provider') or 'gemini'
         
         # Get the appropriate key/url
-        api_key = api_keys.get(f"{provider}_api_key")
+        key_field = _PROVIDER_KEYS.get(provider)
+        api_key = api_keys.get(key_field) if key_field else None
         lmstudio_url = sanitize_url(api_keys.get("lmstudio_url"), "http://localhost:1234")
         localai_url = sanitize_url(api_keys.get("localai_url"), "http://localhost:8080")
         ollama_url = sanitize_url(api_keys.get("ollama_url"), "http://localhost:11434")
 
-        if not api_key and provider not in ['lmstudio', 'localai', 'ollama']:
+        if provider not in _PROVIDER_KEYS and provider not in _LOCAL_PROVIDERS:
+            return jsonify({'error': f'Unsupported AI provider: {provider}'}), 400
+
+        if not api_key and provider not in _LOCAL_PROVIDERS:
             return jsonify({'error': f'{provider.capitalize()} API key not configured.'}), 400
 
+        if (mime_type or '').startswith('image/') and provider not in _VISION_PROVIDERS | _LOCAL_PROVIDERS:
+            return jsonify({'error': f"Provider '{provider}' does not support image extraction. Use Gemini, Claude, or OpenAI for images."}), 400
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    # Decode only once the request is known to be serviceable; every branch
+    # below works from these bytes
+    try:
+        file_bytes = _b64.b64decode(image_b64, validate=False)
+    except (binascii.Error, ValueError):
+        return jsonify({'error': 'image must be base64-encoded'}), 400
+
+    # Resolve an unknown MIME type here, from the decoded header, so no provider
+    # path has to decode the base64 again just to sniff it
+    mime_type = mime_type or _sniff_mime(file_bytes[:12])
+
     prompt = config['prompt']
 
-    def generate():
+    # Opt-in batch mode: submit at the provider's discounted batch rate and
+    # let the client poll /extract-items/status/<batch_id> for the results
+    if data.get('batch_mode'):
+        if provider not in BATCH_PROVIDERS:
+            return jsonify({'error': f"Batch mode is not supported for provider '{provider}'. Use Claude or OpenAI."}), 400
+        try:
+            jobs = _batch_jobs(file_bytes, image_b64, mime_type, prompt)
+            batch_id = submit_batch(provider, api_key, jobs, model=requested_model)
+        except Exception as e:
+            enhanced_audit_logger.log(action=f"{config['log_action']}_ERROR", details={'error': str(e), 'batch': True}, status_code=500)
+            return jsonify({'error': str(e)}), 500
+        enhanced_audit_logger.log(
+            action=f"{config['log_action']}_BATCH_SUBMITTED",
+            details={'provider': provider, 'batch_id': batch_id, 'jobs': len(jobs)},
+            status_code=202
+        )
+        return jsonify({'batch_id': batch_id, 'provider': provider, 'status': 'submitted', 'jobs': len(jobs)}), 202
+
+    # Re-uploads of a file this user already extracted with the same provider
+    # and model are answered from the stored history. The encryption service
+    # is resolved here because the generator runs after the request context
+    # is gone.
+    user_id = current_user.id
+    file_sha256 = hashlib.sha256(file_bytes).hexdigest()
+    history_service = get_encryption_service()
+    previous_items = None
+    if not force:
+        try:
+            previous_items = ExtractHistory.get(user_id, file_sha256, item_type, provider, requested_model,
+                                                PROMPT_VERSION, history_service)
+        except Exception as e:
+            logger.warning("Extraction history lookup failed: %s", e)
+
+    def remember(items):
+        try:
+            ExtractHistory.save(user_id, file_sha256, item_type, provider, requested_model,
+                                PROMPT_VERSION, items, history_service)
+        except Exception as e:
+            logger.warning("Failed to save extraction history: %s", e)
+
+    # The upload is handed to the generator as arguments rather than closed
+    # over, so the PDF path can drop it once it has been chunked
+    def generate(file_bytes, image_b64):
+        llm_kwargs = {'model': requested_model, 'lmstudio_url': lmstudio_url,
+                      'localai_url': localai_url, 'ollama_url': ollama_url}
         try:
+            if previous_items is not None:
+                enhanced_audit_logger.log(
+                    action=f"{config['log_action']}_HISTORY_HIT",
+                    details={'provider': provider},
+                    user_id=user_id,
+                    status_code=200
+                )
+                yield _ndjson_line({config['list_key']: previous_items, 'status': 'complete', 'cached': True})
+                return
+
             # Multi-page PDF Path
-            if mime_type == 'application/pdf' or image_b64.startswith('JVBERi'):
+            if mime_type == 'application/pdf' or file_bytes[:5] == b'%PDF-':
                 all_extracted = []
-                file_bytes = base64.b64decode(image_b64)
-                chunks, content_type = process_pdf_content(file_bytes)
-                
-                num_chunks = len(chunks)
-                for idx, chunk in enumerate(chunks):
-                    yield json.dumps({'status': 'processing', 'progress': int((idx / num_chunks) * 100), 'message': f'Analyzing page {idx+1}/{num_chunks}...'}) + '\n'
-                    
-                    response_text = ""
-                    if provider == 'gemini':
-                        img_data = base64.b64decode(chunk) if content_type == "images" else None
-                        p = prompt if content_type == "images" else f"{prompt}\n\nTEXT:\n{chunk}"
-                        response_text = call_gemini_with_fallback(p, api_key, image_data=img_data, mime_type="image/png" if content_type == "images" else None, model=requested_model)
-                    elif provider in ['claude', 'openai']:
-                        fn = call_claude_with_vision if provider == 'claude' else call_openai_with_vision
-                        if content_type == "images":
-                            response_text = fn(prompt, api_key, chunk, "image/png", model=requested_model)
-                        else:
-                            # Handle text chunk via unified caller if it's text
-                            response_text = call_llm(provider, f"{prompt}\n\nTEXT:\n{chunk}", api_key, model=requested_model, lmstudio_url=lmstudio_url, localai_url=localai_url, ollama_url=ollama_url)
-                    else:
-                        # Other providers (deepseek, grok, mistral, etc.) - text extraction only
-                        if content_type == "text":
-                            response_text = call_llm(provider, f"{prompt}\n\nTEXT:\n{chunk}", api_key, model=requested_model, lmstudio_url=lmstudio_url, localai_url=localai_url, ollama_url=ollama_url)
-                        else:
-                            # Skip image chunks for non-vision providers, continue with warning
-                            print(f"WARNING: Provider '{provider}' cannot process image chunks from scanned PDF")
-                            continue
-
-                    if response_text:
-                        chunk_items = resilient_parse_llm_json(response_text, config['list_key'])
+                chunks, content_type = process_pdf_content_cached(file_bytes, num_workers=PDF_RENDER_WORKERS)
+                # Only the chunks are needed from here on; drop our references to
+                # the raw upload (potentially tens of MB). A lazily rendering
+                # chunk stream holds the document only until it is exhausted.
+                del file_bytes, image_b64
+
+                def extract_and_parse(chunk):
+                    # Pages are cached individually, per user, so retrying a
+                    # document whose other chunks failed only re-sends the
+                    # missing ones
+                    chunk_key = llm_cache.make_key(PROMPT_VERSION, 'chunk', str(user_id), chunk, prompt,
+                                                   provider, requested_model)
+                    cached_items = None if force else llm_cache.get(chunk_key)
+                    if cached_items is not None:
+                        return json.loads(cached_items)
+                    # Parse in the worker so one chunk's JSON parsing overlaps
+                    # the network wait of the others
+                    response_text = _extract_pdf_chunk(chunk, content_type, provider, prompt, api_key,
+                                                       text_prefix=config['text_prefix'], **llm_kwargs)
+                    items = resilient_parse_llm_json(response_text, config['list_key']) if response_text else []
+                    if items:
+                        llm_cache.set(chunk_key, json.dumps(items))
+                    return items
+
+                # Chunk calls are independent network round-trips, so run a few at
+                # once; results are re-assembled in page order afterwards. Each
+                # chunk is dispatched as soon as it is produced, so the first
+                # call is in flight while later scanned pages are still rendering.
+                chunk_errors = []
+                max_workers = LOCAL_CHUNK_WORKERS if provider in _LOCAL_PROVIDERS else REMOTE_CHUNK_WORKERS
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {executor.submit(extract_and_parse, chunk): idx for idx, chunk in enumerate(chunks)}
+                    num_chunks = len(futures)
+                    responses = [None] * num_chunks
+                    yield _ndjson_line({'status': 'processing', 'progress': 0, 'message': f'Analyzing {num_chunks} page(s)...'})
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        idx = futures[future]
+                        try:
+                            responses[idx] = future.result()
+                        except Exception as e:
+                            # One failed chunk shouldn't throw away the others
+                            logger.warning("PDF chunk %d/%d failed: %s", idx + 1, num_chunks, e)
+                            chunk_errors.append(e)
+                        yield _ndjson_line({'status': 'processing', 'progress': int((done / num_chunks) * 100), 'message': f'Analyzed page {done}/{num_chunks}...'})
+
+                for chunk_items in responses:
+                    if chunk_items:
                         all_extracted.extend(chunk_items)
                 
-                yield json.dumps({config['list_key']: all_extracted, 'status': 'complete'}) + '\n'
+                if chunk_errors and len(chunk_errors) == num_chunks:
+                    raise chunk_errors[0]
+                if all_extracted and not chunk_errors:
+                    remember(all_extracted)
+                yield _ndjson_line({config['list_key']: all_extracted, 'status': 'complete', 'failed_chunks': len(chunk_errors)})
             
             # Single File Path (Images, CSV, TXT)
             else:
@@ -1123,35 +2067,88 @@ def extract_items(item_type):
                 is_text_file = mime_type in ['text/csv', 'text/plain']
 
                 if provider == 'gemini':
-                    file_bytes = base64.b64decode(image_b64)
-                    response_text = call_gemini_with_fallback(prompt, api_key, image_data=file_bytes, mime_type=mime_type, model=requested_model)
+                    # Images go out as the uploaded base64 (no re-encode); text
+                    # files are inlined from the already-decoded bytes
+                    file_data = file_bytes if is_text_file else image_b64
+                    response_text = call_gemini_with_fallback(prompt, api_key, image_data=file_data, mime_type=mime_type, model=requested_model)
                 elif provider in ['claude', 'openai']:
                     if is_text_file:
-                        text_content = base64.b64decode(image_b64).decode('utf-8', errors='replace')
-                        response_text = call_llm(provider, f"{prompt}\n\nDATA:\n{text_content}", api_key, model=requested_model, lmstudio_url=lmstudio_url, localai_url=localai_url, ollama_url=ollama_url)
+                        text_content = file_bytes.decode('utf-8', errors='replace')
+                        response_text = yield from _stream_extraction(provider, config['data_prefix'] + text_content, api_key, llm_kwargs)
                     else:
                         fn = call_claude_with_vision if provider == 'claude' else call_openai_with_vision
                         response_text = fn(prompt, api_key, image_b64, mime_type, model=requested_model)
-                elif provider in ['lmstudio', 'localai', 'ollama']:
+                elif provider in _LOCAL_PROVIDERS:
                     text_content = ""
                     if is_text_file:
-                        text_content = base64.b64decode(image_b64).decode('utf-8', errors='replace')
+                        text_content = file_bytes.decode('utf-8', errors='replace')
                     else:
                         text_content = "[Image provided - vision not supported via local AI yet. Use Gemini/Claude/OpenAI for images.]"
-                    response_text = call_llm(provider, f"{prompt}\n\nDATA:\n{text_content}", api_key, model=requested_model, lmstudio_url=lmstudio_url, localai_url=localai_url, ollama_url=ollama_url)
+                    response_text = yield from _stream_extraction(provider, config['data_prefix'] + text_content, api_key, llm_kwargs)
                 else:
                     if is_text_file:
-                        text_content = base64.b64decode(image_b64).decode('utf-8', errors='replace')
-                        response_text = call_llm(provider, f"{prompt}\n\nDATA:\n{text_content}", api_key, model=requested_model, lmstudio_url=lmstudio_url, localai_url=localai_url, ollama_url=ollama_url)
+                        text_content = file_bytes.decode('utf-8', errors='replace')
+                        response_text = yield from _stream_extraction(provider, config['data_prefix'] + text_content, api_key, llm_kwargs)
                     else:
                         raise Exception(f"Provider '{provider}' does not support image extraction. Use Gemini, Claude, or OpenAI for images.")
 
                 items = resilient_parse_llm_json(response_text, config['list_key'])
+                if items:
+                    remember(items)
 
-                yield json.dumps({config['list_key']: items, 'status': 'complete'}) + '\n'
+                yield _ndjson_line({config['list_key']: items, 'status': 'complete'})
 
         except Exception as e:
-            enhanced_audit_logger.log(action=f"{config['log_action']}_ERROR", details={'error': str(e)}, status_code=500)
-            yield json.dumps({'error': str(e)}) + '\n'
+            enhanced_audit_logger.log(action=f"{config['log_action']}_ERROR", details={'error': str(e)},
+                                      user_id=user_id, status_code=500)
+            yield _ndjson_line({'error': str(e)})
+
+    return Response(stream_with_context(generate(file_bytes, image_b64)), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@ai_services_bp.route('/extract-items/status/<batch_id>', methods=['GET'])
+@login_required
+@limiter.limit("120 per hour")
+def extract_batch_status(batch_id):
+    """Poll a batch submitted by extract_items; returns the parsed items once it has finished."""
+    item_type = request.args.get('item_type')
+    profile_name = request.args.get('profile_name')
+    provider = request.args.get('provider')
+
+    if item_type not in EXTRACT_CONFIGS:
+        return jsonify({'error': f'Invalid item type: {item_type}'}), 400
+    if not profile_name or provider not in BATCH_PROVIDERS:
+        return jsonify({'error': 'profile_name and a batch provider (claude or openai) are required'}), 400
+
+    config = EXTRACT_CONFIGS[item_type]
+    try:
+        profile = Profile.get_by_name(profile_name, current_user.id)
+        if not profile:
+            return jsonify({'error': 'Profile not found'}), 404
+
+        # Batches are only visible to the API key that created them
+        api_key = profile.data_dict.get('api_keys', {}).get(_PROVIDER_KEYS[provider])
+        if not api_key:
+            return jsonify({'error': f'{provider.capitalize()} API key not configured.'}), 400
+
+        batch = poll_batch(provider, api_key, batch_id)
+        if batch['status'] != 'completed':
+            return jsonify({'batch_id': batch_id, 'status': batch['status']}), 200
 
-    return Response(generate(), mimetype='application/x-ndjson')
+        # Reassemble in page order (custom ids are page_<index>)
+        results = batch['results']
+        items = []
+        for custom_id in sorted(results, key=lambda cid: int(cid.rsplit('_', 1)[-1])):
+            items.extend(resilient_parse_llm_json(results[custom_id], config['list_key']))
+
+        enhanced_audit_logger.log(
+            action=f"{config['log_action']}_BATCH_COMPLETE",
+            details={'provider': provider, 'batch_id': batch_id, 'items': len(items)},
+            status_code=200
+        )
+        return jsonify({config['list_key']: items, 'batch_id': batch_id, 'status': 'complete',
+                        'completed_jobs': len(results)}), 200
+    except Exception as e:
+        enhanced_audit_logger.log(action=f"{config['log_action']}_ERROR", details={'error': str(e), 'batch_id': batch_id}, status_code=500)
+        return jsonify({'error': str(e)}), 500
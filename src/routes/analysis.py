@@ -1,18 +1,84 @@
 """Analysis routes for running retirement simulations."""
-from flask import Blueprint, request, jsonify
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from functools import lru_cache
+from flask import Blueprint, Response, g, request, jsonify
 from flask_login import login_required, current_user
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from src.models.profile import Profile
 from src.services.retirement_model import (
-    Person, FinancialProfile, MarketAssumptions, RetirementModel
+    Person, FinancialProfile, MarketAssumptions, RetirementModel, SPENDING_MODELS,
+    EMPLOYMENT_INCOME_TYPES
 )
 from src.services.rebalancing_service import RebalancingService
+from src.services.llm_cache import LLMResponseCache
 from src.services.enhanced_audit_logger import enhanced_audit_logger
 
 analysis_bp = Blueprint('analysis', __name__, url_prefix='/api')
 
 
+def _json_response(payload, status=200):
+    """Like jsonify, but encoded with orjson when it is installed.
+
+    Monte Carlo timelines and cashflow ledgers carry thousands of floats,
+    which the stdlib encoder formats one at a time.
+    """
+    if orjson is None:
+        return jsonify(payload), status
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, status=status, mimetype='application/json')
+
+
+# Mapping from frontend asset type to the account names expected by retirement_model.py
+_ACCOUNT_MAPPING = {
+    # Retirement accounts
+    '401k': '401k',
+    'roth_401k': 'Roth IRA',  # Roth 401k treated as Roth
+    'traditional_ira': 'Traditional IRA',
+    'roth_ira': 'Roth IRA',
+    'sep_ira': 'Traditional IRA',
+    'simple_ira': 'Traditional IRA',
+    '403b': '403b',
+    '457': '457b',
+    # Taxable accounts
+    'brokerage': 'Taxable Brokerage',
+    'savings': 'Savings',
+    'checking': 'Checking',
+    'money_market': 'Savings',
+    'cd': 'Savings',
+    'cash': 'Checking',
+}
+# Other assets (HSA, crypto, etc.): HSA withdrawals are tax-free like Roth;
+# everything else is treated as taxable
+_OTHER_ASSET_MAPPING = {'hsa': 'Roth IRA'}
+_RETIREMENT_DEFAULT = 'Traditional IRA'
+_TAXABLE_DEFAULT = 'Taxable Brokerage'
+
+
+def _to_investment_types(assets, default_account, mapping=_ACCOUNT_MAPPING):
+    """Map one frontend asset list to investment_types entries."""
+    return [
+        {
+            'account': mapping.get((asset.get('type') or '').lower(), default_account),
+            'value': asset.get('value', 0),
+            'cost_basis': asset.get('cost_basis', asset.get('value', 0)),
+            'name': asset.get('name', '')
+        }
+        for asset in assets
+    ]
+
+
 def transform_assets_to_investment_types(assets_data):
     """Transform frontend asset structure to investment_types format for the retirement model.
 
@@ -23,73 +89,224 @@ def transform_assets_to_investment_types(assets_data):
     Model expects investment_types as:
         [{account: 'Traditional IRA', value: X, cost_basis: X}, ...]
     """
-    investment_types = []
-
-    # Mapping from frontend type to backend account names expected by retirement_model.py
-    ACCOUNT_MAPPING = {
-        # Retirement accounts
-        '401k': '401k',
-        'roth_401k': 'Roth IRA',  # Roth 401k treated as Roth
-        'traditional_ira': 'Traditional IRA',
-        'roth_ira': 'Roth IRA',
-        'sep_ira': 'Traditional IRA',
-        'simple_ira': 'Traditional IRA',
-        '403b': '403b',
-        '457': '457b',
-        # Taxable accounts
-        'brokerage': 'Taxable Brokerage',
-        'savings': 'Savings',
-        'checking': 'Checking',
-        'money_market': 'Savings',
-        'cd': 'Savings',
-        'cash': 'Checking',
-    }
-
-    # Process retirement accounts
-    for asset in assets_data.get('retirement_accounts', []):
-        asset_type = asset.get('type', '').lower()
-        account_name = ACCOUNT_MAPPING.get(asset_type, 'Traditional IRA')
-        investment_types.append({
-            'account': account_name,
-            'value': asset.get('value', 0),
-            'cost_basis': asset.get('cost_basis', asset.get('value', 0)),
-            'name': asset.get('name', '')
-        })
-
-    # Process taxable accounts
-    for asset in assets_data.get('taxable_accounts', []):
-        asset_type = asset.get('type', '').lower()
-        account_name = ACCOUNT_MAPPING.get(asset_type, 'Taxable Brokerage')
-        investment_types.append({
-            'account': account_name,
-            'value': asset.get('value', 0),
-            'cost_basis': asset.get('cost_basis', asset.get('value', 0)),
-            'name': asset.get('name', '')
-        })
-
-    # Process other assets (HSA, Crypto, etc.)
-    for asset in assets_data.get('other_assets', []):
-        asset_type = asset.get('type', '').lower()
-        # Map HSA to Roth (tax-free out), others to Taxable/Traditional
-        if asset_type == 'hsa':
-            account_name = 'Roth IRA'
-        elif asset_type in ['cryptocurrency', 'collectible', 'business_interest']:
-            account_name = 'Taxable Brokerage'
-        else:
-            account_name = 'Taxable Brokerage'
-            
-        investment_types.append({
-            'account': account_name,
-            'value': asset.get('value', 0),
-            'cost_basis': asset.get('cost_basis', asset.get('value', 0)),
-            'name': asset.get('name', '')
-        })
+    return (
+        _to_investment_types(assets_data.get('retirement_accounts', ()), _RETIREMENT_DEFAULT)
+        + _to_investment_types(assets_data.get('taxable_accounts', ()), _TAXABLE_DEFAULT)
+        + _to_investment_types(assets_data.get('other_assets', ()), _TAXABLE_DEFAULT, _OTHER_ASSET_MAPPING)
+    )
+
+
+# Models built from unchanged profiles, keyed by (profile id, updated_at).
+# Profile.save() bumps updated_at, so edits naturally miss the cache.
+MODEL_CACHE_SIZE = 256
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+# Monte Carlo results per (profile version, request); kept in memory only
+# because they describe the user's finances
+_analysis_cache = LLMResponseCache(max_entries=128, default_ttl=3600)
+
+# POST /analysis?background=true runs the simulation on this pool and returns
+# a job id at once, so a large run does not hold a web worker; clients poll
+# /analysis/jobs/<job_id>. Jobs map to (user id, future) and expire with the
+# result cache.
+ANALYSIS_WORKERS = max(1, int(os.environ.get('ANALYSIS_WORKERS', 2)))
+_analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+_analysis_jobs = LLMResponseCache(max_entries=256, default_ttl=3600)
+
+
+# Financial fields that fall back to zero when missing or explicitly null.
+# Valid zero values are kept as-is.
+_FIN_DEFAULTS = {
+    'pension_benefit': 0,
+    'annual_expenses': 0,
+    'annual_income': 0,
+    'annual_ira_contribution': 0,
+}
+
+# Stand-in dates for profiles that never set them
+_DEFAULT_BIRTH_DATE = datetime(1980, 1, 1)
+_DEFAULT_RETIREMENT_DATE = datetime(2045, 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def _fromisoformat(value):
+    # Profiles share a small set of date strings and datetimes are immutable,
+    # so parsed values can be handed out to every caller
+    return datetime.fromisoformat(value)
+
+
+def _parse_date(value, default):
+    """Parse a stored ISO date, or return ``default`` when it is unset."""
+    return _fromisoformat(value) if value else default
+
+
+def _build_financial_profile(profile):
+    """Construct the Person and FinancialProfile dataclasses from a stored profile."""
+    profile_data = profile.data_dict
+
+    # Extract person data
+    financial_data = profile_data.get('financial') or {}
+    financial = {**_FIN_DEFAULTS, **{k: v for k, v in financial_data.items() if v is not None}}
+    spouse_data = profile_data.get('spouse') or {}  # Handle None spouse for single profiles
+    children_data = profile_data.get('children') or []  # Handle None children
+
+    # Create person1 from profile birth_date and retirement_date
+    person1 = Person(
+        name=profile.name or 'Primary',
+        birth_date=_parse_date(profile.birth_date, _DEFAULT_BIRTH_DATE),
+        retirement_date=_parse_date(profile.retirement_date, _DEFAULT_RETIREMENT_DATE),
+        social_security=financial_data.get('social_security_benefit') or 0,  # Already monthly
+        ss_claiming_age=financial_data.get('ss_claiming_age') or 67
+    )
+
+    # Create person2 (spouse) if spouse data exists
+    person2 = Person(
+        name=spouse_data.get('name', 'Spouse'),
+        birth_date=_parse_date(spouse_data.get('birth_date'), _DEFAULT_BIRTH_DATE),
+        retirement_date=_parse_date(spouse_data.get('retirement_date'), _DEFAULT_RETIREMENT_DATE),
+        social_security=spouse_data.get('social_security_benefit') or 0,  # Already monthly
+        ss_claiming_age=spouse_data.get('ss_claiming_age') or 67
+    )
+
+    # Get assets from profile and transform to investment_types format
+    assets_data = profile_data.get('assets', {})
+    investment_types = transform_assets_to_investment_types(assets_data)
+
+    # Calculate totals from assets for display/fallback, classifying each
+    # retirement account once (Roth 401k counts as Roth, as in the transform)
+    # Entries saved with an explicit null value or type count as zero / untyped
+    liquid_assets = sum(a.get('value') or 0 for a in assets_data.get('taxable_accounts', ()))
+    traditional_ira = 0
+    roth_ira = 0
+    for asset in assets_data.get('retirement_accounts', ()):
+        asset_type = (asset.get('type') or '').lower()
+        value = asset.get('value') or 0
+        if 'roth' in asset_type:
+            roth_ira += value
+        elif 'traditional' in asset_type or '401' in asset_type or '403' in asset_type:
+            traditional_ira += value
+
+    # Fix: Ensure budget has income section populated from income_streams
+    # Many profiles have income_streams but no budget.income section
+    # This causes Monte Carlo to think employment income is $0, draining portfolio
+    # Copied so the derived income never lands in the (shared) profile data
+    budget_data = dict(profile_data.get('budget') or {})
+    if budget_data and not budget_data.get('income'):
+        # Calculate employment income from income_streams
+        income_streams = profile_data.get('income_streams', [])
+        primary_salary = 0
+        spouse_salary = 0
+
+        for stream in income_streams:
+            if stream.get('type') in EMPLOYMENT_INCOME_TYPES:
+                amount = stream.get('amount', 0)
+                freq = stream.get('frequency', 'monthly')
+                # Convert to annual
+                if freq == 'monthly':
+                    annual_amount = amount * 12
+                elif freq == 'annual':
+                    annual_amount = amount
+                else:
+                    annual_amount = amount * 12  # Default to monthly
+
+                # Assign to primary or spouse based on name/order
+                # First salary goes to primary, second to spouse
+                if primary_salary == 0:
+                    primary_salary = annual_amount
+                else:
+                    spouse_salary = annual_amount
+
+        # Populate budget.income.current.employment
+        if primary_salary > 0 or spouse_salary > 0:
+            budget_data['income'] = {
+                'current': {
+                    'employment': {
+                        'primary_person': primary_salary,
+                        'spouse': spouse_salary
+                    }
+                },
+                'future': {}
+            }
 
-    return investment_types
+    # Get tax settings with proper address fallback
+    address_data = profile_data.get('address', {})
+    tax_settings = profile_data.get('tax_settings', {})
+    
+    # Priority: explicit tax settings > address state > default NY
+    filing_status = tax_settings.get('filing_status') or 'mfj'
+    state = tax_settings.get('state') or address_data.get('state') or 'NY'
+
+    financial_profile = FinancialProfile(
+        person1=person1,
+        person2=person2,
+        children=children_data,
+        liquid_assets=liquid_assets,
+        traditional_ira=traditional_ira,
+        roth_ira=roth_ira,
+        pension_lump_sum=0,
+        pension_annual=financial['pension_benefit'] * 12,  # Convert monthly to annual
+        annual_expenses=financial['annual_expenses'],
+        target_annual_income=financial['annual_income'],
+        risk_tolerance='moderate',
+        asset_allocation={'stocks': 0.6, 'bonds': 0.4},
+        future_expenses=[],
+        investment_types=investment_types,
+        accounts=[],
+        income_streams=profile_data.get('income_streams', []),
+        home_properties=profile_data.get('home_properties', []),
+        budget=budget_data if budget_data else None,
+        annual_ira_contribution=financial['annual_ira_contribution'],
+        savings_allocation=profile_data.get('savings_allocation'),
+        filing_status=filing_status,
+        state=state
+    )
+
+    return person1, person2, financial_profile
+
+
+def build_model(profile):
+    """Build (or reuse) the retirement model for a profile.
+
+    Returns:
+        (person1, person2, financial_profile, model)
+    """
+    key = (profile.id, profile.updated_at)
+    with _model_cache_lock:
+        cached = _model_cache.get(key)
+        if cached is not None:
+            _model_cache.move_to_end(key)
+            return cached
+
+    person1, person2, financial_profile = _build_financial_profile(profile)
+    built = (person1, person2, financial_profile, RetirementModel(financial_profile))
+
+    with _model_cache_lock:
+        _model_cache[key] = built
+        _model_cache.move_to_end(key)
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return built
+
+
+def _load_profile(profile_name):
+    """Get the current user's profile by name, memoised on ``g``.
+
+    The profile keeps its decrypted data, so later lookups in the same
+    request skip both the query and the decrypt. Nothing is kept once the
+    request ends.
+    """
+    request_cache = g.setdefault('profile_cache', {})
+    key = (profile_name, current_user.id)
+    if key not in request_cache:
+        request_cache[key] = Profile.get_by_name(profile_name, current_user.id)
+    return request_cache[key]
 
 
 class MarketProfileSchema(BaseModel):
     """Schema for market assumptions profile."""
+    model_config = ConfigDict(extra='ignore')
+
     # Allocations
     stock_allocation: Optional[float] = 0.5
     bond_allocation: Optional[float] = 0.4
@@ -129,19 +346,159 @@ class MarketPeriodsSchema(BaseModel):
     pattern: Optional[list] = None  # For cycle type
     repeat: Optional[bool] = True  # For cycle type
 
-class AnalysisRequestSchema(BaseModel):
-    """Schema for analysis request."""
+@dataclass(slots=True)
+class AnalysisRequestSchema:
+    """Analysis request, validated by hand.
+
+    Only the nested market profile goes through Pydantic; the top-level
+    fields need one type check and one range check, which is cheaper to do
+    directly than to build a model for on every request.
+    """
     profile_name: str
-    simulations: Optional[int] = 10000
+    simulations: int = 10000
     market_profile: Optional[MarketProfileSchema] = None
     market_periods: Optional[dict] = None  # New: period-based market conditions
-    spending_model: Optional[str] = 'constant_real'
-
-    @validator('simulations')
-    def validate_simulations(cls, v):
-        if v < 100 or v > 50000:
+    spending_model: str = 'constant_real'
+
+    def __post_init__(self):
+        if not isinstance(self.profile_name, str):
+            raise ValueError('profile_name must be a string')
+        if self.simulations is None:
+            self.simulations = 10000
+        if isinstance(self.simulations, bool) or not isinstance(self.simulations, (int, float, str)):
+            raise ValueError('simulations must be an integer')
+        try:
+            simulations = int(self.simulations)
+            is_integer = simulations == float(self.simulations)
+        except (TypeError, ValueError, OverflowError):
+            # Non-numeric strings, NaN and Infinity
+            raise ValueError('simulations must be an integer') from None
+        if not is_integer:
+            raise ValueError('simulations must be an integer')
+        if simulations < 100 or simulations > 50000:
             raise ValueError('Simulations must be between 100 and 50,000')
-        return v
+        self.simulations = simulations
+        if isinstance(self.market_profile, dict):
+            self.market_profile = MarketProfileSchema.model_validate(self.market_profile)
+        if self.market_periods is not None and not isinstance(self.market_periods, dict):
+            raise ValueError('market_periods must be an object')
+        if self.spending_model is None:
+            self.spending_model = 'constant_real'
+        elif self.spending_model not in SPENDING_MODELS:
+            raise ValueError(f"spending_model must be one of: {', '.join(SPENDING_MODELS)}")
+
+    @classmethod
+    def from_json(cls, payload):
+        """Build from a request body, ignoring unknown keys."""
+        if not isinstance(payload, dict):
+            raise ValueError('Request body must be a JSON object')
+        if 'profile_name' not in payload:
+            raise ValueError('profile_name is required')
+        return cls(**{name: payload[name] for name in _ANALYSIS_REQUEST_FIELDS if name in payload})
+
+    def dict(self):
+        return {
+            'profile_name': self.profile_name,
+            'simulations': self.simulations,
+            'market_profile': self.market_profile.model_dump() if self.market_profile else None,
+            'market_periods': self.market_periods,
+            'spending_model': self.spending_model,
+        }
+
+
+_ANALYSIS_REQUEST_FIELDS = tuple(f.name for f in fields(AnalysisRequestSchema))
+
+
+# Allocation scenarios run by every analysis (Conservative, Moderate, Aggressive)
+_Scenario = namedtuple('_Scenario', 'key name stock_allocation description')
+_SCENARIOS = (
+    _Scenario('conservative', 'Conservative', 0.30,
+             '30% stocks / 70% bonds - Lower risk, lower expected returns'),
+    _Scenario('moderate', 'Moderate', 0.60,
+             '60% stocks / 40% bonds - Balanced risk and returns'),
+    _Scenario('aggressive', 'Aggressive', 0.80,
+             '80% stocks / 20% bonds - Higher risk, higher expected returns'),
+)
+
+
+def _prepare_model(profile):
+    """Model setup shared by the Monte Carlo and cashflow endpoints.
+
+    Returns:
+        (financial_profile, model, years)
+    """
+    _, _, financial_profile, model = build_model(profile)
+    return financial_profile, model, model.projection_years()
+
+
+def _market_kwargs(data):
+    """MarketAssumptions overrides from the request (empty for defaults)."""
+    return data.market_profile.model_dump() if data.market_profile else {}
+
+
+def run_scenarios(model, years, data):
+    """Run the Monte Carlo simulation for each allocation scenario."""
+    # Create base market assumptions from request or use defaults
+    base = MarketAssumptions(**_market_kwargs(data))
+    other_allocations = (base.bond_allocation, base.cash_allocation, base.reit_allocation,
+                         base.gold_allocation, base.crypto_allocation)
+    other_sum = sum(other_allocations)
+
+    # Build each scenario's assumptions
+    scenario_assumptions = []
+    for scenario in _SCENARIOS:
+        # FOR COMPARISON: Always use the scenario's stock allocation
+        target_stock = scenario.stock_allocation
+
+        # Proportional adjustment for the other assets based on new stock target
+        # (If stocks move from 60% to 30%, we need to scale up other assets)
+        remaining = 1.0 - target_stock
+        if remaining <= 0:
+            assumptions = replace(base, stock_allocation=target_stock, bond_allocation=0, cash_allocation=0)
+        elif other_sum > 0:
+            bond, cash, reit, gold, crypto = (a * (remaining / other_sum) for a in other_allocations)
+            assumptions = replace(base, stock_allocation=target_stock, bond_allocation=bond, cash_allocation=cash,
+                                  reit_allocation=reit, gold_allocation=gold, crypto_allocation=crypto)
+        else:
+            assumptions = replace(base, stock_allocation=target_stock)
+        scenario_assumptions.append(assumptions)
+
+    # Simulate all scenarios together against the same market draws
+    results = model.monte_carlo_simulation_multi(
+        years=years,
+        simulations=data.simulations,
+        assumptions_list=scenario_assumptions,
+        spending_model=data.spending_model,
+        market_periods=data.market_periods  # Pass period-based market conditions
+    )
+
+    scenario_results = {}
+    for scenario, scenario_result in zip(_SCENARIOS, results):
+        scenario_result['scenario_name'] = scenario.name
+        scenario_result['description'] = scenario.description
+        scenario_result['stock_allocation'] = scenario.stock_allocation
+        scenario_results[scenario.key] = scenario_result
+
+    return scenario_results
+
+
+def _analysis_response(data, timestamp, total_assets, years, scenario_results):
+    """Body returned for a completed Monte Carlo analysis."""
+    return {
+        'profile_name': data.profile_name,
+        'simulations': data.simulations,
+        'timestamp': timestamp,
+        'scenarios': scenario_results,
+        'total_assets': total_assets,
+        'years_projected': years
+    }
+
+
+def _analysis_job(model, years, data, cache_key, timestamp, total_assets):
+    """Run a queued analysis on the background pool."""
+    scenario_results = run_scenarios(model, years, data)
+    _analysis_cache.set(cache_key, scenario_results)
+    return _analysis_response(data, timestamp, total_assets, years, scenario_results)
 
 
 @analysis_bp.route('/analysis', methods=['POST'])
@@ -149,7 +506,7 @@ class AnalysisRequestSchema(BaseModel):
 def run_analysis():
     """Run Monte Carlo analysis for a profile."""
     try:
-        data = AnalysisRequestSchema(**request.json)
+        data = AnalysisRequestSchema.from_json(request.json)
     except Exception as e:
         enhanced_audit_logger.log(
             action='RUN_ANALYSIS_VALIDATION_ERROR',
@@ -160,7 +517,7 @@ def run_analysis():
 
     try:
         # Get profile with ownership check
-        profile = Profile.get_by_name(data.profile_name, current_user.id)
+        profile = _load_profile(data.profile_name)
         if not profile:
             enhanced_audit_logger.log(
                 action='RUN_ANALYSIS_PROFILE_NOT_FOUND',
@@ -173,218 +530,31 @@ def run_analysis():
         if not profile_data:
             return jsonify({'error': 'Profile data is empty'}), 400
 
-        # Import datetime for date conversion
-        from datetime import datetime
-
-        # Extract person data
-        financial_data = profile_data.get('financial', {})
-        spouse_data = profile_data.get('spouse') or {}  # Handle None spouse for single profiles
-        children_data = profile_data.get('children') or []  # Handle None children
-
-        # Create person1 from profile birth_date and retirement_date
-        birth_date_str = profile.birth_date if hasattr(profile, 'birth_date') and profile.birth_date else '1980-01-01'
-        retirement_date_str = profile.retirement_date if hasattr(profile, 'retirement_date') and profile.retirement_date else '2045-01-01'
-
-        person1 = Person(
-            name=profile.name or 'Primary',
-            birth_date=datetime.fromisoformat(birth_date_str) if birth_date_str else datetime(1980, 1, 1),
-            retirement_date=datetime.fromisoformat(retirement_date_str) if retirement_date_str else datetime(2045, 1, 1),
-            social_security=financial_data.get('social_security_benefit') or 0,  # Already monthly
-            ss_claiming_age=financial_data.get('ss_claiming_age') or 67
-        )
-
-        # Create person2 (spouse) if spouse data exists
-        spouse_birth = spouse_data.get('birth_date') if spouse_data.get('birth_date') else '1980-01-01'
-        spouse_retire = spouse_data.get('retirement_date') if spouse_data.get('retirement_date') else '2045-01-01'
-
-        person2 = Person(
-            name=spouse_data.get('name', 'Spouse'),
-            birth_date=datetime.fromisoformat(spouse_birth) if spouse_birth else datetime(1980, 1, 1),
-            retirement_date=datetime.fromisoformat(spouse_retire) if spouse_retire else datetime(2045, 1, 1),
-            social_security=spouse_data.get('social_security_benefit') or 0,  # Already monthly
-            ss_claiming_age=spouse_data.get('ss_claiming_age') or 67
-        )
-
-        # Get assets from profile and transform to investment_types format
-        assets_data = profile_data.get('assets', {})
-        investment_types = transform_assets_to_investment_types(assets_data)
-
-        # Calculate totals from assets for display/fallback
-        liquid_assets = sum(a.get('value', 0) for a in assets_data.get('taxable_accounts', []))
-        traditional_ira = sum(a.get('value', 0) for a in assets_data.get('retirement_accounts', []) if 'traditional' in a.get('type', '').lower() or '401' in a.get('type', '').lower() or '403' in a.get('type', '').lower())
-        roth_ira = sum(a.get('value', 0) for a in assets_data.get('retirement_accounts', []) if 'roth' in a.get('type', '').lower())
-
-        # Create financial profile matching the FinancialProfile dataclass
-        # Use explicit None checks to preserve valid zero values
-        pension_benefit = financial_data.get('pension_benefit') if financial_data.get('pension_benefit') is not None else 0
-        annual_expenses = financial_data.get('annual_expenses') if financial_data.get('annual_expenses') is not None else 0
-        annual_income = financial_data.get('annual_income') if financial_data.get('annual_income') is not None else 0
-        liquid_assets_val = liquid_assets if liquid_assets is not None else (financial_data.get('liquid_assets') if financial_data.get('liquid_assets') is not None else 0)
-        retirement_assets_val = traditional_ira if traditional_ira is not None else (financial_data.get('retirement_assets') if financial_data.get('retirement_assets') is not None else 0)
-
-        # Fix: Ensure budget has income section populated from income_streams
-        # Many profiles have income_streams but no budget.income section
-        # This causes Monte Carlo to think employment income is $0, draining portfolio
-        budget_data = profile_data.get('budget', {})
-        if budget_data and not budget_data.get('income'):
-            # Calculate employment income from income_streams
-            income_streams = profile_data.get('income_streams', [])
-            primary_salary = 0
-            spouse_salary = 0
-
-            employment_types = ['salary', 'hourly', 'wages', 'bonus']
-            for stream in income_streams:
-                if stream.get('type') in employment_types:
-                    amount = stream.get('amount', 0)
-                    freq = stream.get('frequency', 'monthly')
-                    # Convert to annual
-                    if freq == 'monthly':
-                        annual_amount = amount * 12
-                    elif freq == 'annual':
-                        annual_amount = amount
-                    else:
-                        annual_amount = amount * 12  # Default to monthly
-
-                    # Assign to primary or spouse based on name/order
-                    # First salary goes to primary, second to spouse
-                    if primary_salary == 0:
-                        primary_salary = annual_amount
-                    else:
-                        spouse_salary = annual_amount
-
-            # Populate budget.income.current.employment
-            if primary_salary > 0 or spouse_salary > 0:
-                budget_data['income'] = {
-                    'current': {
-                        'employment': {
-                            'primary_person': primary_salary,
-                            'spouse': spouse_salary
-                        }
-                    },
-                    'future': {}
-                }
-
-        # Get tax settings with proper address fallback
-        address_data = profile_data.get('address', {})
-        tax_settings = profile_data.get('tax_settings', {})
-        
-        # Priority: explicit tax settings > address state > default NY
-        filing_status = tax_settings.get('filing_status') or 'mfj'
-        state = tax_settings.get('state') or address_data.get('state') or 'NY'
-
-        financial_profile = FinancialProfile(
-            person1=person1,
-            person2=person2,
-            children=children_data,
-            liquid_assets=liquid_assets_val,
-            traditional_ira=retirement_assets_val,
-            roth_ira=roth_ira or 0,
-            pension_lump_sum=0,
-            pension_annual=pension_benefit * 12,  # Convert monthly to annual
-            annual_expenses=annual_expenses,
-            target_annual_income=annual_income,
-            risk_tolerance='moderate',
-            asset_allocation={'stocks': 0.6, 'bonds': 0.4},
-            future_expenses=[],
-            investment_types=investment_types,
-            accounts=[],
-            income_streams=profile_data.get('income_streams', []),
-            home_properties=profile_data.get('home_properties', []),
-            budget=budget_data if budget_data else None,
-            annual_ira_contribution=financial_data.get('annual_ira_contribution', 0),
-            savings_allocation=profile_data.get('savings_allocation'),
-            filing_status=filing_status,
-            state=state
-        )
-
-        # Create retirement model
-        model = RetirementModel(financial_profile)
+        financial_profile, model, years = _prepare_model(profile)
+        investment_types = financial_profile.investment_types
 
-        # Calculate years for simulation
-        years = max(
-            model.calculate_life_expectancy_years(person1),
-            model.calculate_life_expectancy_years(person2)
+        # Repeat runs of the same request against an unchanged profile reuse
+        # the previous result unless the client asks for a fresh one
+        cache_key = _analysis_cache.make_key(
+            str(profile.id), profile.updated_at, json.dumps(data.dict(), sort_keys=True)
         )
-
-        # Create base market assumptions from request or use defaults
-        base_market_kwargs = {}
-        if data.market_profile:
-            base_market_kwargs = data.market_profile.dict()
-
-        # Run multiple scenarios (Conservative, Moderate, Aggressive)
-        scenarios = {
-            'conservative': {
-                'name': 'Conservative',
-                'stock_allocation': 0.30,
-                'description': '30% stocks / 70% bonds - Lower risk, lower expected returns'
-            },
-            'moderate': {
-                'name': 'Moderate',
-                'stock_allocation': 0.60,
-                'description': '60% stocks / 40% bonds - Balanced risk and returns'
-            },
-            'aggressive': {
-                'name': 'Aggressive',
-                'stock_allocation': 0.80,
-                'description': '80% stocks / 20% bonds - Higher risk, higher expected returns'
-            }
-        }
-
-        # Run simulation for each scenario
-        scenario_results = {}
-        for scenario_key, scenario_config in scenarios.items():
-            # FOR COMPARISON: Always use the scenario's stock allocation
-            target_stock = scenario_config['stock_allocation']
-            
-            # Proportional adjustment for bonds/cash based on new stock target
-            # (If stocks move from 60% to 30%, we need to scale up other assets)
-            remaining = 1.0 - target_stock
-            
-            # Start with base assumptions
-            final_assumptions = {**base_market_kwargs}
-            final_assumptions['stock_allocation'] = target_stock
-            
-            # Simple balancing of bonds/cash if they exist in base
-            if remaining > 0:
-                current_b = base_market_kwargs.get('bond_allocation', 0.4)
-                current_c = base_market_kwargs.get('cash_allocation', 0.1)
-                other_sum = current_b + current_c + base_market_kwargs.get('reit_allocation', 0) + \
-                            base_market_kwargs.get('gold_allocation', 0) + base_market_kwargs.get('crypto_allocation', 0)
-                
-                if other_sum > 0:
-                    scale = remaining / other_sum
-                    final_assumptions['bond_allocation'] = current_b * scale
-                    final_assumptions['cash_allocation'] = current_c * scale
-                    # Scale others too if they were part of the profile
-                    if 'reit_allocation' in final_assumptions: final_assumptions['reit_allocation'] *= scale
-                    if 'gold_allocation' in final_assumptions: final_assumptions['gold_allocation'] *= scale
-                    if 'crypto_allocation' in final_assumptions: final_assumptions['crypto_allocation'] *= scale
-            else:
-                final_assumptions['bond_allocation'] = 0
-                final_assumptions['cash_allocation'] = 0
-
-            market_assumptions = MarketAssumptions(**final_assumptions)
-            scenario_result = model.monte_carlo_simulation(
-                years=years,
-                simulations=data.simulations,
-                assumptions=market_assumptions,
-                spending_model=data.spending_model,
-                market_periods=data.market_periods  # Pass period-based market conditions
+        force = request.args.get('force', '').lower() == 'true'
+        scenario_results = None if force else _analysis_cache.get(cache_key)
+        cached = scenario_results is not None
+        background = not cached and request.args.get('background', '').lower() == 'true'
+        total_assets = sum(inv.get('value', 0) for inv in investment_types)
+
+        if background:
+            job_id = uuid.uuid4().hex
+            future = _analysis_pool.submit(
+                _analysis_job, model, years, data, cache_key, profile.updated_at, total_assets
             )
-            scenario_result['scenario_name'] = scenario_config['name']
-            scenario_result['description'] = scenario_config['description']
-            scenario_result['stock_allocation'] = target_stock
-            scenario_results[scenario_key] = scenario_result
-
-        # Prepare response with all scenarios
-        response = {
-            'profile_name': data.profile_name,
-            'simulations': data.simulations,
-            'timestamp': profile.updated_at,
-            'scenarios': scenario_results,
-            'total_assets': sum(inv.get('value', 0) for inv in investment_types),
-            'years_projected': years
-        }
+            _analysis_jobs.set(job_id, (current_user.id, future))
+        else:
+            if not cached:
+                scenario_results = run_scenarios(model, years, data)
+                _analysis_cache.set(cache_key, scenario_results)
+            response = _analysis_response(data, profile.updated_at, total_assets, years, scenario_results)
 
         enhanced_audit_logger.log(
             action='RUN_MONTE_CARLO_ANALYSIS',
@@ -395,12 +565,16 @@ def run_analysis():
                 'simulations': data.simulations,
                 'spending_model': data.spending_model,
                 'years_projected': years,
-                'total_assets': response['total_assets'],
-                'scenarios_run': list(scenario_results.keys())
+                'total_assets': total_assets,
+                'scenarios_run': [scenario.key for scenario in _SCENARIOS],
+                'cached': cached,
+                'background': background
             },
-            status_code=200
+            status_code=202 if background else 200
         )
-        return jsonify(response), 200
+        if background:
+            return jsonify({'job_id': job_id, 'status': 'running'}), 202
+        return _json_response(response)
 
     except KeyError as e:
         enhanced_audit_logger.log(
@@ -418,18 +592,40 @@ def run_analysis():
         return jsonify({'error': str(e)}), 500
 
 
+@analysis_bp.route('/analysis/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_analysis_job(job_id):
+    """Poll a background Monte Carlo analysis."""
+    job = _analysis_jobs.get(job_id)
+    if job is None or job[0] != current_user.id:
+        return jsonify({'error': 'Analysis job not found'}), 404
+
+    future = job[1]
+    if not future.done():
+        return jsonify({'job_id': job_id, 'status': 'running'}), 202
+    error = future.exception()
+    if error is not None:
+        enhanced_audit_logger.log(
+            action='RUN_ANALYSIS_ERROR',
+            details={'job_id': job_id, 'error': str(error)},
+            status_code=500
+        )
+        return jsonify({'error': str(error)}), 500
+    return _json_response(future.result())
+
+
 @analysis_bp.route('/analysis/cashflow-details', methods=['POST'])
 @login_required
 def get_cashflow_details():
     """Run a detailed deterministic projection for cashflow visualization."""
     try:
-        data = AnalysisRequestSchema(**request.json)
+        data = AnalysisRequestSchema.from_json(request.json)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
     try:
         # Get profile with ownership check
-        profile = Profile.get_by_name(data.profile_name, current_user.id)
+        profile = _load_profile(data.profile_name)
         if not profile:
             return jsonify({'error': 'Profile not found'}), 404
 
@@ -437,120 +633,11 @@ def get_cashflow_details():
         if not profile_data:
             return jsonify({'error': 'Profile data is empty'}), 400
 
-        # Import datetime for date conversion
-        from datetime import datetime
-
-        # Extract person data
-        financial_data = profile_data.get('financial', {})
-        spouse_data = profile_data.get('spouse') or {}
-        children_data = profile_data.get('children') or []
-
-        # Create person1
-        birth_date_str = profile.birth_date if hasattr(profile, 'birth_date') and profile.birth_date else '1980-01-01'
-        retirement_date_str = profile.retirement_date if hasattr(profile, 'retirement_date') and profile.retirement_date else '2045-01-01'
-
-        person1 = Person(
-            name=profile.name or 'Primary',
-            birth_date=datetime.fromisoformat(birth_date_str) if birth_date_str else datetime(1980, 1, 1),
-            retirement_date=datetime.fromisoformat(retirement_date_str) if retirement_date_str else datetime(2045, 1, 1),
-            social_security=financial_data.get('social_security_benefit') or 0,
-            ss_claiming_age=financial_data.get('ss_claiming_age') or 67
-        )
-
-        # Create person2
-        spouse_birth = spouse_data.get('birth_date') if spouse_data.get('birth_date') else '1980-01-01'
-        spouse_retire = spouse_data.get('retirement_date') if spouse_data.get('retirement_date') else '2045-01-01'
-
-        person2 = Person(
-            name=spouse_data.get('name', 'Spouse'),
-            birth_date=datetime.fromisoformat(spouse_birth) if spouse_birth else datetime(1980, 1, 1),
-            retirement_date=datetime.fromisoformat(spouse_retire) if spouse_retire else datetime(2045, 1, 1),
-            social_security=spouse_data.get('social_security_benefit') or 0,
-            ss_claiming_age=spouse_data.get('ss_claiming_age') or 67
-        )
-
-        # Get assets
-        assets_data = profile_data.get('assets', {})
-        investment_types = transform_assets_to_investment_types(assets_data)
-
-        liquid_assets = sum(a.get('value', 0) for a in assets_data.get('taxable_accounts', []))
-        traditional_ira = sum(a.get('value', 0) for a in assets_data.get('retirement_accounts', []) if 'traditional' in a.get('type', '').lower() or '401' in a.get('type', '').lower() or '403' in a.get('type', '').lower())
-        roth_ira = sum(a.get('value', 0) for a in assets_data.get('retirement_accounts', []) if 'roth' in a.get('type', '').lower())
-
-        pension_benefit = financial_data.get('pension_benefit') if financial_data.get('pension_benefit') is not None else 0
-        annual_expenses = financial_data.get('annual_expenses') if financial_data.get('annual_expenses') is not None else 0
-        annual_income = financial_data.get('annual_income') if financial_data.get('annual_income') is not None else 0
-        liquid_assets_val = liquid_assets if liquid_assets is not None else (financial_data.get('liquid_assets') if financial_data.get('liquid_assets') is not None else 0)
-        retirement_assets_val = traditional_ira if traditional_ira is not None else (financial_data.get('retirement_assets') if financial_data.get('retirement_assets') is not None else 0)
-
-        # Ensure budget has income section
-        budget_data = profile_data.get('budget', {})
-        if budget_data and not budget_data.get('income'):
-            income_streams = profile_data.get('income_streams', [])
-            primary_salary = 0
-            spouse_salary = 0
-            employment_types = ['salary', 'hourly', 'wages', 'bonus']
-            for stream in income_streams:
-                if stream.get('type') in employment_types:
-                    amount = stream.get('amount', 0)
-                    freq = stream.get('frequency', 'monthly')
-                    if freq == 'monthly':
-                        annual_amount = amount * 12
-                    elif freq == 'annual':
-                        annual_amount = amount
-                    else:
-                        annual_amount = amount * 12
-                    if primary_salary == 0:
-                        primary_salary = annual_amount
-                    else:
-                        spouse_salary = annual_amount
-            if primary_salary > 0 or spouse_salary > 0:
-                budget_data['income'] = {
-                    'current': {'employment': {'primary_person': primary_salary, 'spouse': spouse_salary}},
-                    'future': {}
-                }
-
-        # Get tax settings with proper address fallback
-        address_data = profile_data.get('address', {})
-        tax_settings = profile_data.get('tax_settings', {})
-        
-        # Priority: explicit tax settings > address state > default NY
-        filing_status = tax_settings.get('filing_status') or 'mfj'
-        state = tax_settings.get('state') or address_data.get('state') or 'NY'
-
-        financial_profile = FinancialProfile(
-            person1=person1,
-            person2=person2,
-            children=children_data,
-            liquid_assets=liquid_assets_val,
-            traditional_ira=retirement_assets_val,
-            roth_ira=roth_ira or 0,
-            pension_lump_sum=0,
-            pension_annual=pension_benefit * 12,
-            annual_expenses=annual_expenses,
-            target_annual_income=annual_income,
-            risk_tolerance='moderate',
-            asset_allocation={'stocks': 0.6, 'bonds': 0.4},
-            future_expenses=[],
-            investment_types=investment_types,
-            accounts=[],
-            income_streams=profile_data.get('income_streams', []),
-            home_properties=profile_data.get('home_properties', []),
-            budget=budget_data if budget_data else None,
-            annual_ira_contribution=financial_data.get('annual_ira_contribution', 0),
-            savings_allocation=profile_data.get('savings_allocation'),
-            filing_status=filing_status,
-            state=state
-        )
-
-        model = RetirementModel(financial_profile)
-        years = max(model.calculate_life_expectancy_years(person1), model.calculate_life_expectancy_years(person2))
+        _, model, years = _prepare_model(profile)
 
         # Use passed market assumptions or defaults
-        base_market_kwargs = {}
-        if data.market_profile:
-            base_market_kwargs = data.market_profile.dict()
-        
+        base_market_kwargs = _market_kwargs(data)
+
         # Use provided allocation or moderate default
         target_stock = base_market_kwargs.get('stock_allocation', 0.60)
         assumptions = MarketAssumptions(**{**base_market_kwargs, 'stock_allocation': target_stock})
@@ -574,7 +661,7 @@ def get_cashflow_details():
             details={'profile_name': data.profile_name},
             status_code=200
         )
-        return jsonify(response), 200
+        return _json_response(response)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -595,7 +682,7 @@ def analyze_social_security():
             return jsonify({'error': 'profile_name is required'}), 400
 
         # Get profile with ownership check
-        profile = Profile.get_by_name(profile_name, current_user.id)
+        profile = _load_profile(profile_name)
         if not profile:
             enhanced_audit_logger.log(
                 action='ANALYZE_SS_PROFILE_NOT_FOUND',
@@ -613,44 +700,13 @@ def analyze_social_security():
             )
             return jsonify({'error': 'Profile data is empty'}), 400
 
-        # Extract data and create model
-        person_data = profile_data.get('person', {})
-        financial_data = profile_data.get('financial', {})
-        market_data = profile_data.get('market_assumptions', {})
-
-        person = Person(
-            birth_year=person_data.get('birth_year', 1970),
-            retirement_age=person_data.get('retirement_age', 65),
-            life_expectancy=person_data.get('life_expectancy', 95),
-            current_age=person_data.get('current_age', 40)
-        )
-
-        financial_profile = FinancialProfile(
-            annual_income=financial_data.get('annual_income', 100000),
-            annual_expenses=financial_data.get('annual_expenses', 70000),
-            savings_rate=financial_data.get('savings_rate', 0.15),
-            liquid_assets=financial_data.get('liquid_assets', 100000),
-            retirement_assets=financial_data.get('retirement_assets', 500000),
-            social_security_benefit=financial_data.get('social_security_benefit', 30000),
-            pension=financial_data.get('pension', 0),
-            other_income=financial_data.get('other_income', 0)
-        )
-
-        market_assumptions = MarketAssumptions(
-            equity_return_mean=market_data.get('equity_return_mean', 0.10),
-            equity_return_std=market_data.get('equity_return_std', 0.18),
-            bond_return_mean=market_data.get('bond_return_mean', 0.04),
-            bond_return_std=market_data.get('bond_return_std', 0.06),
-            inflation_mean=market_data.get('inflation_mean', 0.03),
-            inflation_std=market_data.get('inflation_std', 0.02),
-            equity_allocation=market_data.get('equity_allocation', 0.70)
-        )
-
-        model = RetirementModel(person, financial_profile, market_assumptions)
+        _, _, _, model = build_model(profile)
 
         # Analyze Social Security claiming strategies
-        results = model.analyze_social_security_strategies()
-        results['profile_name'] = profile_name
+        results = {
+            'profile_name': profile_name,
+            'strategies': model.optimize_social_security()
+        }
 
         enhanced_audit_logger.log(
             action='ANALYZE_SOCIAL_SECURITY',
@@ -676,7 +732,6 @@ def analyze_roth_conversion():
     """Analyze Roth conversion strategies."""
     try:
         profile_name = request.json.get('profile_name')
-        conversion_amount = request.json.get('conversion_amount', 50000)
 
         if not profile_name:
             enhanced_audit_logger.log(
@@ -687,7 +742,7 @@ def analyze_roth_conversion():
             return jsonify({'error': 'profile_name is required'}), 400
 
         # Get profile with ownership check
-        profile = Profile.get_by_name(profile_name, current_user.id)
+        profile = _load_profile(profile_name)
         if not profile:
             enhanced_audit_logger.log(
                 action='ANALYZE_ROTH_PROFILE_NOT_FOUND',
@@ -705,53 +760,18 @@ def analyze_roth_conversion():
             )
             return jsonify({'error': 'Profile data is empty'}), 400
 
-        # Extract data and create model
-        person_data = profile_data.get('person', {})
-        financial_data = profile_data.get('financial', {})
-        market_data = profile_data.get('market_assumptions', {})
-
-        person = Person(
-            birth_year=person_data.get('birth_year', 1970),
-            retirement_age=person_data.get('retirement_age', 65),
-            life_expectancy=person_data.get('life_expectancy', 95),
-            current_age=person_data.get('current_age', 40)
-        )
+        _, _, _, model = build_model(profile)
 
-        financial_profile = FinancialProfile(
-            annual_income=financial_data.get('annual_income', 100000),
-            annual_expenses=financial_data.get('annual_expenses', 70000),
-            savings_rate=financial_data.get('savings_rate', 0.15),
-            liquid_assets=financial_data.get('liquid_assets', 100000),
-            retirement_assets=financial_data.get('retirement_assets', 500000),
-            social_security_benefit=financial_data.get('social_security_benefit', 30000),
-            pension=financial_data.get('pension', 0),
-            other_income=financial_data.get('other_income', 0)
-        )
-
-        market_assumptions = MarketAssumptions(
-            equity_return_mean=market_data.get('equity_return_mean', 0.10),
-            equity_return_std=market_data.get('equity_return_std', 0.18),
-            bond_return_mean=market_data.get('bond_return_mean', 0.04),
-            bond_return_std=market_data.get('bond_return_std', 0.06),
-            inflation_mean=market_data.get('inflation_mean', 0.03),
-            inflation_std=market_data.get('inflation_std', 0.02),
-            equity_allocation=market_data.get('equity_allocation', 0.70)
-        )
-
-        model = RetirementModel(person, financial_profile, market_assumptions)
-
-        # Analyze Roth conversion
-        results = model.analyze_roth_conversion(conversion_amount)
+        # Analyze Roth conversion; the model sizes the conversion itself,
+        # filling the bracket left over by the profile's retirement income
+        results = model.calculate_roth_conversion_opportunity()
         results['profile_name'] = profile_name
 
         enhanced_audit_logger.log(
             action='ANALYZE_ROTH_CONVERSION',
             table_name='profile',
             record_id=profile.id,
-            details={
-                'profile_name': profile_name,
-                'conversion_amount': conversion_amount
-            },
+            details={'profile_name': profile_name},
             status_code=200
         )
         return jsonify(results), 200
@@ -782,7 +802,7 @@ def analyze_rebalancing():
             return jsonify({'error': 'profile_name is required'}), 400
 
         # Get profile with ownership check
-        profile = Profile.get_by_name(profile_name, current_user.id)
+        profile = _load_profile(profile_name)
         if not profile:
             enhanced_audit_logger.log(
                 action='ANALYZE_REBALANCE_PROFILE_NOT_FOUND',
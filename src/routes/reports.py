@@ -8,151 +8,34 @@ from src.services.pdf import (
     generate_portfolio_report,
     generate_action_plan_report,
 )
-from src.services.retirement_model import (
-    Person, FinancialProfile, MarketAssumptions, RetirementModel
-)
+from src.routes.analysis import AnalysisRequestSchema, run_scenarios, build_model
 from src.services.enhanced_audit_logger import enhanced_audit_logger
-from datetime import datetime
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
 
-def transform_assets_to_investment_types(assets_data):
-    """Transform frontend asset structure to investment_types format."""
-    investment_types = []
-
-    ACCOUNT_MAPPING = {
-        '401k': '401k',
-        'roth_401k': 'Roth IRA',
-        'traditional_ira': 'Traditional IRA',
-        'roth_ira': 'Roth IRA',
-        'sep_ira': 'Traditional IRA',
-        'simple_ira': 'Traditional IRA',
-        '403b': '403b',
-        '457': '457b',
-        'brokerage': 'Taxable Brokerage',
-        'savings': 'Savings',
-        'checking': 'Checking',
-        'money_market': 'Savings',
-        'cd': 'Savings',
-        'cash': 'Checking',
-    }
-
-    for asset in assets_data.get('retirement_accounts', []):
-        asset_type = asset.get('type', '').lower()
-        account_name = ACCOUNT_MAPPING.get(asset_type, 'Traditional IRA')
-        investment_types.append({
-            'account': account_name,
-            'value': asset.get('value', 0),
-            'cost_basis': asset.get('cost_basis', asset.get('value', 0)),
-            'name': asset.get('name', '')
-        })
-
-    for asset in assets_data.get('taxable_accounts', []):
-        asset_type = asset.get('type', '').lower()
-        account_name = ACCOUNT_MAPPING.get(asset_type, 'Taxable Brokerage')
-        investment_types.append({
-            'account': account_name,
-            'value': asset.get('value', 0),
-            'cost_basis': asset.get('cost_basis', asset.get('value', 0)),
-            'name': asset.get('name', '')
-        })
-
-    return investment_types
-
-
 def run_analysis_for_report(profile):
-    """Run Monte Carlo analysis for PDF report generation."""
-    profile_data = profile.data_dict
-    if not profile_data:
-        return None
-
-    financial_data = profile_data.get('financial', {})
-    spouse_data = profile_data.get('spouse', {})
-    children_data = profile_data.get('children', [])
-
-    birth_date_str = profile.birth_date if hasattr(profile, 'birth_date') and profile.birth_date else '1980-01-01'
-    retirement_date_str = profile.retirement_date if hasattr(profile, 'retirement_date') and profile.retirement_date else '2045-01-01'
-
-    person1 = Person(
-        name=profile.name or 'Primary',
-        birth_date=datetime.fromisoformat(birth_date_str) if birth_date_str else datetime(1980, 1, 1),
-        retirement_date=datetime.fromisoformat(retirement_date_str) if retirement_date_str else datetime(2045, 1, 1),
-        social_security=financial_data.get('social_security_benefit', 0)
-    )
+    """Run Monte Carlo analysis for PDF report generation.
 
-    spouse_birth = spouse_data.get('birth_date') if spouse_data.get('birth_date') else '1980-01-01'
-    spouse_retire = spouse_data.get('retirement_date') if spouse_data.get('retirement_date') else '2045-01-01'
-
-    person2 = Person(
-        name=spouse_data.get('name', 'Spouse'),
-        birth_date=datetime.fromisoformat(spouse_birth) if spouse_birth else datetime(1980, 1, 1),
-        retirement_date=datetime.fromisoformat(spouse_retire) if spouse_retire else datetime(2045, 1, 1),
-        social_security=spouse_data.get('social_security_benefit', 0) if spouse_data.get('social_security_benefit') else 0
-    )
-
-    assets_data = profile_data.get('assets', {})
-    investment_types = transform_assets_to_investment_types(assets_data)
-
-    liquid_assets = sum(a.get('value', 0) for a in assets_data.get('taxable_accounts', []))
-    traditional_ira = sum(a.get('value', 0) for a in assets_data.get('retirement_accounts', [])
-                         if 'traditional' in a.get('type', '').lower() or '401' in a.get('type', '').lower())
-    roth_ira = sum(a.get('value', 0) for a in assets_data.get('retirement_accounts', [])
-                   if 'roth' in a.get('type', '').lower())
-
-    # Use explicit None checks to preserve valid zero values
-    liquid_assets_val = liquid_assets if liquid_assets is not None else (financial_data.get('liquid_assets') if financial_data.get('liquid_assets') is not None else 0)
-    traditional_ira_val = traditional_ira if traditional_ira is not None else (financial_data.get('retirement_assets') if financial_data.get('retirement_assets') is not None else 0)
-
-    financial_profile = FinancialProfile(
-        person1=person1,
-        person2=person2,
-        children=children_data,
-        liquid_assets=liquid_assets_val,
-        traditional_ira=traditional_ira_val,
-        roth_ira=roth_ira if roth_ira is not None else 0,
-        pension_lump_sum=0,
-        pension_annual=(financial_data.get('pension_benefit') or 0) * 12,
-        annual_expenses=financial_data.get('annual_expenses', 0),
-        target_annual_income=financial_data.get('annual_income', 0),
-        risk_tolerance='moderate',
-        asset_allocation={'stocks': 0.6, 'bonds': 0.4},
-        future_expenses=[],
-        investment_types=investment_types,
-        accounts=[],
-        income_streams=[],
-        home_properties=profile_data.get('home_properties', []),
-        budget=profile_data.get('budget')
-    )
+    Uses the same model and scenarios as the in-app analysis, so the report
+    matches what the user saw on screen.
+    """
+    if not profile.data_dict:
+        return None
 
-    model = RetirementModel(financial_profile)
+    _, _, financial_profile, model = build_model(profile)
+    years = model.projection_years()
 
-    years = max(
-        model.calculate_life_expectancy_years(person1),
-        model.calculate_life_expectancy_years(person2)
+    request_data = AnalysisRequestSchema(
+        profile_name=profile.name,
+        simulations=1000  # Reduced for faster PDF generation
     )
-
-    scenarios = {
-        'conservative': {'name': 'Conservative', 'stock_allocation': 0.30},
-        'moderate': {'name': 'Moderate', 'stock_allocation': 0.60},
-        'aggressive': {'name': 'Aggressive', 'stock_allocation': 0.80}
-    }
-
-    scenario_results = {}
-    for scenario_key, scenario_config in scenarios.items():
-        market_assumptions = MarketAssumptions(stock_allocation=scenario_config['stock_allocation'])
-        scenario_result = model.monte_carlo_simulation(
-            years=years,
-            simulations=1000,  # Reduced for faster PDF generation
-            assumptions=market_assumptions
-        )
-        scenario_result['scenario_name'] = scenario_config['name']
-        scenario_results[scenario_key] = scenario_result
+    scenario_results = run_scenarios(model, years, request_data)
 
     return {
-        'simulations': 1000,
+        'simulations': request_data.simulations,
         'scenarios': scenario_results,
-        'total_assets': sum(inv.get('value', 0) for inv in investment_types),
+        'total_assets': sum(inv.get('value', 0) for inv in financial_profile.investment_types),
         'years_projected': years
     }
 
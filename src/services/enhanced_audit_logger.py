@@ -1,8 +1,12 @@
 """Enhanced audit logging service with comprehensive data collection."""
+import atexit
 import json
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from flask import request, has_request_context, session
+from typing import Optional, Dict, Any, List
+from flask import request, has_request_context, has_app_context, session, current_app
 from flask_login import current_user
 from src.database.connection import db
 import re
@@ -895,7 +899,7 @@ class EnhancedAuditLogger:
 
         if not has_request_context():
             # No request context, just save basic info
-            EnhancedAuditLogger._save_audit_log(audit_data)
+            EnhancedAuditLogger._queue_audit_log(audit_data)
             return
 
         collect_config = config.get('collect', {})
@@ -1077,24 +1081,43 @@ class EnhancedAuditLogger:
                     audit_data['details'] = json.dumps({'session_metadata': session_meta})
 
         # Save to database
-        EnhancedAuditLogger._save_audit_log(audit_data)
+        EnhancedAuditLogger._queue_audit_log(audit_data)
+
+    @staticmethod
+    def _queue_audit_log(audit_data: Dict[str, Any]):
+        """Hand an entry to the background writer so the caller doesn't wait on the INSERT."""
+        # Tests write inline so rows are visible immediately. If the queue is
+        # full, write inline rather than drop the event.
+        testing = has_app_context() and current_app.testing
+        if testing or not _audit_writer.submit(audit_data):
+            EnhancedAuditLogger._save_audit_log(audit_data)
 
     @staticmethod
     def _save_audit_log(audit_data: Dict[str, Any]):
         """Save audit log entry to database."""
+        EnhancedAuditLogger._save_audit_rows([audit_data])
+
+    @staticmethod
+    def _save_audit_rows(rows: List[Dict[str, Any]]):
+        """Save a batch of audit log entries in one transaction."""
+        # Rows collect different optional fields, so group them by column set
+        by_fields = {}
+        for audit_data in rows:
+            by_fields.setdefault(tuple(audit_data.keys()), []).append(tuple(audit_data.values()))
+
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
 
-                # Build dynamic SQL based on available fields
-                fields = list(audit_data.keys())
-                placeholders = ', '.join(['?' for _ in fields])
-                field_names = ', '.join(fields)
+                for fields, values in by_fields.items():
+                    # Build dynamic SQL based on available fields
+                    placeholders = ', '.join(['?' for _ in fields])
+                    field_names = ', '.join(fields)
 
-                cursor.execute(f'''
-                    INSERT INTO enhanced_audit_log ({field_names})
-                    VALUES ({placeholders})
-                ''', tuple(audit_data.values()))
+                    cursor.executemany(f'''
+                        INSERT INTO enhanced_audit_log ({field_names})
+                        VALUES ({placeholders})
+                    ''', values)
 
                 conn.commit()
         except Exception as e:
@@ -1705,5 +1728,66 @@ class EnhancedAuditLogger:
         return unique_locations
 
 
+class AuditLogWriter:
+    """Background writer that batches audit rows off the request path.
+
+    Rows are queued by submit() and written by a daemon thread in batches of up
+    to batch_size, or whatever arrived within batch_wait seconds of the first.
+    The queue is bounded so a stalled database can't grow memory without limit.
+    """
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 50, batch_wait: float = 0.2):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, audit_data: Dict[str, Any]) -> bool:
+        """Queue a row for writing. Returns False if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(audit_data)
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self):
+        """Block until every queued row has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _ensure_started(self):
+        # Started lazily so forking servers get the thread in each worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                EnhancedAuditLogger._save_audit_rows(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_audit_writer = AuditLogWriter()
+# Don't lose queued rows on a clean shutdown
+atexit.register(_audit_writer.flush)
+
 # Global enhanced audit logger instance
 enhanced_audit_logger = EnhancedAuditLogger()
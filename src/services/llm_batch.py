@@ -0,0 +1,194 @@
+"""Submit and collect discounted provider batch jobs for document extraction.
+
+Wraps the OpenAI Batch API and Anthropic Message Batches over REST. Batches
+complete asynchronously (typically minutes, at most 24 hours) at roughly half
+the real-time token price, which suits bulk imports that don't need an
+immediate answer.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Providers with a batch endpoint
+BATCH_PROVIDERS = frozenset({'openai', 'claude'})
+
+DEFAULT_MODELS = {
+    'openai': 'gpt-5.2-instant',
+    'claude': 'claude-sonnet-4-5-20250929',
+}
+
+_OPENAI_API = 'https://api.openai.com/v1'
+_ANTHROPIC_API = 'https://api.anthropic.com/v1'
+
+# Batch statuses after which polling can stop without results
+_OPENAI_FAILED = frozenset({'failed', 'expired', 'cancelled'})
+
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+
+
+def _anthropic_headers(api_key: str) -> Dict[str, str]:
+    return {
+        'x-api-key': api_key,
+        'anthropic-version': '2023-06-01',
+        'content-type': 'application/json'
+    }
+
+
+def _openai_body(job: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """Chat-completions body for one job (same shape as the real-time call)."""
+    text = job['prompt'] if not job.get('text') else f"{job['prompt']}\n\nDATA:\n{job['text']}"
+    if job.get('image_b64'):
+        content = [
+            {'type': 'text', 'text': text},
+            {'type': 'image_url', 'image_url': {'url': f"data:{job.get('mime_type', 'image/jpeg')};base64,{job['image_b64']}"}}
+        ]
+    else:
+        content = text
+    return {'model': model, 'messages': [{'role': 'user', 'content': content}], 'max_tokens': 4000}
+
+
+def _anthropic_params(job: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """Messages params for one job; the static prompt is the cacheable system block."""
+    if job.get('image_b64'):
+        content = [{
+            'type': 'image',
+            'source': {'type': 'base64', 'media_type': job.get('mime_type', 'image/jpeg'), 'data': job['image_b64']}
+        }]
+    else:
+        content = f"DATA:\n{job.get('text', '')}"
+    return {
+        'model': model,
+        'max_tokens': 4096,
+        'system': [{'type': 'text', 'text': job['prompt'], 'cache_control': {'type': 'ephemeral'}}],
+        'messages': [{'role': 'user', 'content': content}]
+    }
+
+
+def submit_batch(provider: str, api_key: str, jobs: List[Dict[str, Any]], model: Optional[str] = None) -> str:
+    """
+    Submit extraction jobs as one provider batch.
+
+    Args:
+        provider: 'openai' or 'claude'
+        api_key: Provider API key
+        jobs: Dicts with 'custom_id' and 'prompt', plus either 'text' or
+            'image_b64' (and 'mime_type') for the document content
+        model: Model override (defaults per provider)
+
+    Returns:
+        The provider's batch id
+    """
+    if provider not in BATCH_PROVIDERS:
+        raise ValueError(f"Batch mode is not supported for provider: {provider}")
+    if not jobs:
+        raise ValueError("No jobs to submit")
+    model = model or DEFAULT_MODELS[provider]
+
+    if provider == 'claude':
+        response = _session.post(
+            f'{_ANTHROPIC_API}/messages/batches',
+            headers=_anthropic_headers(api_key),
+            json={'requests': [{'custom_id': job['custom_id'], 'params': _anthropic_params(job, model)} for job in jobs]},
+            timeout=120
+        )
+        if response.status_code != 200:
+            raise Exception(f"Claude batch error: {response.status_code} {response.text}")
+        return response.json()['id']
+
+    # OpenAI: upload the requests as a JSONL file, then create the batch from it
+    auth = {'Authorization': f'Bearer {api_key}'}
+    jsonl = '\n'.join(
+        json.dumps({
+            'custom_id': job['custom_id'],
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': _openai_body(job, model)
+        })
+        for job in jobs
+    )
+    upload = _session.post(
+        f'{_OPENAI_API}/files',
+        headers=auth,
+        data={'purpose': 'batch'},
+        files={'file': ('batch.jsonl', jsonl.encode('utf-8'), 'application/jsonl')},
+        timeout=120
+    )
+    if upload.status_code != 200:
+        raise Exception(f"OpenAI batch upload error: {upload.status_code} {upload.text}")
+
+    response = _session.post(
+        f'{_OPENAI_API}/batches',
+        headers=auth,
+        json={
+            'input_file_id': upload.json()['id'],
+            'endpoint': '/v1/chat/completions',
+            'completion_window': '24h'
+        },
+        timeout=60
+    )
+    if response.status_code != 200:
+        raise Exception(f"OpenAI batch error: {response.status_code} {response.text}")
+    return response.json()['id']
+
+
+def poll_batch(provider: str, api_key: str, batch_id: str) -> Dict[str, Any]:
+    """
+    Check a batch and collect its output once it has finished.
+
+    Returns:
+        {'status': 'in_progress' | 'completed' | 'failed', 'results': {custom_id: text}}
+        where results holds the response text of each successful job and is
+        only populated when status is 'completed'.
+    """
+    if provider not in BATCH_PROVIDERS:
+        raise ValueError(f"Batch mode is not supported for provider: {provider}")
+
+    if provider == 'claude':
+        headers = _anthropic_headers(api_key)
+        response = _session.get(f'{_ANTHROPIC_API}/messages/batches/{batch_id}', headers=headers, timeout=30)
+        if response.status_code != 200:
+            raise Exception(f"Claude batch error: {response.status_code} {response.text}")
+        batch = response.json()
+        if batch.get('processing_status') != 'ended':
+            return {'status': 'in_progress', 'results': {}}
+
+        output = _session.get(batch['results_url'], headers=headers, timeout=120)
+        if output.status_code != 200:
+            raise Exception(f"Claude batch results error: {output.status_code} {output.text}")
+        results = {}
+        for line in output.text.splitlines():
+            if not line:
+                continue
+            entry = json.loads(line)
+            result = entry.get('result', {})
+            if result.get('type') == 'succeeded':
+                results[entry['custom_id']] = result['message']['content'][0]['text']
+        return {'status': 'completed', 'results': results}
+
+    auth = {'Authorization': f'Bearer {api_key}'}
+    response = _session.get(f'{_OPENAI_API}/batches/{batch_id}', headers=auth, timeout=30)
+    if response.status_code != 200:
+        raise Exception(f"OpenAI batch error: {response.status_code} {response.text}")
+    batch = response.json()
+    status = batch.get('status')
+    if status in _OPENAI_FAILED:
+        return {'status': 'failed', 'results': {}}
+    if status != 'completed':
+        return {'status': 'in_progress', 'results': {}}
+
+    results = {}
+    if batch.get('output_file_id'):
+        output = _session.get(f"{_OPENAI_API}/files/{batch['output_file_id']}/content", headers=auth, timeout=120)
+        if output.status_code != 200:
+            raise Exception(f"OpenAI batch results error: {output.status_code} {output.text}")
+        for line in output.text.splitlines():
+            if not line:
+                continue
+            entry = json.loads(line)
+            response_data = entry.get('response') or {}
+            if response_data.get('status_code') == 200:
+                results[entry['custom_id']] = response_data['body']['choices'][0]['message']['content']
+    return {'status': 'completed', 'results': results}
@@ -0,0 +1,77 @@
+"""In-process, content-addressed cache for LLM extraction responses."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LLMResponseCache:
+    """LRU + TTL cache keyed by a SHA-256 digest of the request inputs.
+
+    Entries live only in process memory: extraction results contain financial
+    data, which the app never writes to disk unencrypted.
+    """
+
+    def __init__(self, max_entries: int = 256, default_ttl: int = 604800):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Build a cache key from request inputs (strings, bytes or None)."""
+        digest = hashlib.sha256()
+        for part in parts:
+            if part is None:
+                part = b''
+            elif isinstance(part, str):
+                part = part.encode('utf-8')
+            digest.update(part)
+            # Separator so ('ab', 'c') and ('a', 'bc') hash differently
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        """Store a value, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached entries and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+# Global cache instance
+llm_cache = LLMResponseCache()
@@ -11,6 +11,7 @@ Key Features:
 - Home equity and property management
 - Social Security and pension integration
 """
+import itertools
 import numpy as np
 from datetime import datetime
 from dataclasses import dataclass
@@ -89,6 +90,100 @@ class MarketAssumptions:
     crypto_return_std: float = 0.60
     inflation_std: float = 0.01
     ss_discount_rate: float = 0.03
+
+
+# 2024 federal income tax brackets as (lower bound, rate), by filing status
+_FEDERAL_BRACKETS = {
+    'single': ((0, 0.10), (11600, 0.12), (47150, 0.22), (100525, 0.24),
+               (191950, 0.32), (243725, 0.35), (609350, 0.37)),
+    'hoh': ((0, 0.10), (16550, 0.12), (63100, 0.22), (100500, 0.24),
+            (191950, 0.32), (243700, 0.35), (609350, 0.37)),
+    'mfj': ((0, 0.10), (23200, 0.12), (94300, 0.22), (201050, 0.24),
+            (383900, 0.32), (487450, 0.35), (731200, 0.37)),
+}
+
+
+def _federal_bracket_tables(brackets):
+    """Precompute lookup tables for _vectorized_federal_tax.
+
+    Returns (lowers, bracket_lower, bracket_base_tax, bracket_rate). An income
+    x falls in slot k = searchsorted(lowers, x, 'left') of the bracket tables,
+    where slot 0 is a zero-rate bracket for x <= 0 and bracket_base_tax is the
+    tax owed at each bracket's lower bound.
+    """
+    lowers = np.array([lower for lower, _ in brackets], dtype=float)
+    rates = np.array([rate for _, rate in brackets])
+    base_tax = np.concatenate(([0.0], np.cumsum(np.diff(lowers) * rates[:-1])))
+    return (
+        lowers,
+        np.concatenate(([0.0], lowers)),
+        np.concatenate(([0.0], base_tax)),
+        np.concatenate(([0.0], rates)),
+    )
+
+
+_FEDERAL_BRACKET_TABLES = {status: _federal_bracket_tables(b) for status, b in _FEDERAL_BRACKETS.items()}
+
+
+def _constant_real_spending(ages):
+    """Spending keeps pace with inflation at every age."""
+    return np.ones(len(ages))
+
+
+def _retirement_smile_spending(ages):
+    """Go-go / slow-go / no-go: flat to 70, down 2%/yr to 80, then up 2%/yr."""
+    return np.where(ages < 70, 1.0,
+                    np.where(ages < 80, 1.0 - (ages - 70) * 0.02, 0.8 + (ages - 80) * 0.02))
+
+
+def _conservative_decline_spending(ages):
+    """Real spending falls 1%/yr after 70, to no less than 60%."""
+    return np.where(ages > 70, np.maximum(0.6, 1.0 - (ages - 70) * 0.01), 1.0)
+
+
+# Spending model name -> function mapping an array of primary ages to that
+# year's multiplier on inflation-adjusted spending
+SPENDING_MODELS = {
+    'constant_real': _constant_real_spending,
+    'retirement_smile': _retirement_smile_spending,
+    'conservative_decline': _conservative_decline_spending,
+}
+
+# Income stream types counted as employment income rather than other
+# taxable income
+EMPLOYMENT_INCOME_TYPES = frozenset({'salary', 'hourly', 'wages', 'bonus'})
+
+
+# Market shocks and the stored per-year paths only feed percentile
+# statistics, where single precision is ample; running balances and taxes
+# stay in float64. Halving these (years, n_paths) arrays halves the memory
+# traffic of the simulation's elementwise passes.
+_SHOCK_DTYPE = np.float32
+
+
+def _scale_shared_shocks(rng, mean, std, simulations):
+    """Draw one (years, simulations) block of standard-normal shocks and apply
+    each scenario's mean/std to it.
+
+    mean and std are (years, n_scenarios); std may also be a scalar. Returns a
+    (years, n_scenarios * simulations) _SHOCK_DTYPE array with scenarios side
+    by side. For one scenario this is distributed as
+    rng.normal(mean, std, (years, simulations)).
+    """
+    years, n_scenarios = mean.shape
+    if isinstance(rng, np.random.Generator):
+        shocks = rng.standard_normal((years, 1, simulations), dtype=_SHOCK_DTYPE)
+    else:
+        # The legacy np.random module (used when no seed is given, so that
+        # np.random.seed() still applies) cannot draw float32 directly
+        shocks = rng.standard_normal((years, 1, simulations)).astype(_SHOCK_DTYPE)
+    mean = np.asarray(mean, dtype=_SHOCK_DTYPE)
+    std = np.asarray(std, dtype=_SHOCK_DTYPE)
+    if std.ndim:
+        std = std[:, :, None]
+    return (mean[:, :, None] + std * shocks).reshape(years, n_scenarios * simulations)
+
+
 class RetirementModel:
     def __init__(self, profile: FinancialProfile):
         self.profile = profile
@@ -97,6 +192,13 @@ class RetirementModel:
         age_now = (datetime.now() - person.birth_date).days / 365.25
         return int(target_age - age_now)
 
+    def projection_years(self) -> int:
+        """Years to project: until the longer-lived of the two people reaches 90."""
+        return max(
+            self.calculate_life_expectancy_years(self.profile.person1),
+            self.calculate_life_expectancy_years(self.profile.person2)
+        )
+
     def get_standard_deduction(self, current_cpi: np.ndarray = 1.0) -> np.ndarray:
         """Get inflation-adjusted standard deduction based on filing status."""
         filing_status = getattr(self.profile, 'filing_status', 'mfj')
@@ -126,47 +228,17 @@ class RetirementModel:
         if filing_status is None:
             filing_status = getattr(self.profile, 'filing_status', 'mfj')
 
-        # 2024 MFJ brackets (default) - can be extended for other statuses
-        if filing_status == 'single':
-            brackets = [
-                (0, 11600, 0.10),
-                (11600, 47150, 0.12),
-                (47150, 100525, 0.22),
-                (100525, 191950, 0.24),
-                (191950, 243725, 0.32),
-                (243725, 609350, 0.35),
-                (609350, float('inf'), 0.37),
-            ]
-        elif filing_status == 'hoh':
-            brackets = [
-                (0, 16550, 0.10),
-                (16550, 63100, 0.12),
-                (63100, 100500, 0.22),
-                (100500, 191950, 0.24),
-                (191950, 243700, 0.32),
-                (243700, 609350, 0.35),
-                (609350, float('inf'), 0.37),
-            ]
-        else:  # MFJ (default for retired couples)
-            brackets = [
-                (0, 23200, 0.10),
-                (23200, 94300, 0.12),
-                (94300, 201050, 0.22),
-                (201050, 383900, 0.24),
-                (383900, 487450, 0.32),
-                (487450, 731200, 0.35),
-                (731200, float('inf'), 0.37),
-            ]
-
-        total_tax = np.zeros_like(taxable_income, dtype=float)
-        marginal_rate = np.zeros_like(taxable_income, dtype=float)
+        # 2024 brackets; anything else (mfj, mfs) uses MFJ (default for retired couples)
+        lowers, bracket_lower, bracket_base_tax, bracket_rate = _FEDERAL_BRACKET_TABLES.get(
+            filing_status, _FEDERAL_BRACKET_TABLES['mfj'])
 
-        for lower, upper, rate in brackets:
-            # Income in this bracket
-            in_bracket = np.clip(taxable_income - lower, 0, upper - lower)
-            total_tax += in_bracket * rate
-            # Update marginal rate for incomes above this bracket's lower bound
-            marginal_rate = np.where(taxable_income > lower, rate, marginal_rate)
+        # Look up each income's bracket directly instead of clipping the income
+        # against every bracket in turn. Slot 0 of the bracket tables is a
+        # zero-rate bracket, so non-positive income owes nothing.
+        taxable_income = np.asarray(taxable_income, dtype=float)
+        idx = np.searchsorted(lowers, taxable_income, side='left')
+        marginal_rate = bracket_rate[idx]
+        total_tax = bracket_base_tax[idx] + (taxable_income - bracket_lower[idx]) * marginal_rate
 
         return total_tax, marginal_rate
 
@@ -563,9 +635,12 @@ class RetirementModel:
 
         return year_assumptions
 
-    def monte_carlo_simulation(self, years: int, simulations: int = 10000, assumptions: MarketAssumptions = None, effective_tax_rate: float = 0.22, spending_model: str = 'constant_real', market_periods: Dict = None):
+    def monte_carlo_simulation(self, years: int, simulations: int = 10000, assumptions: MarketAssumptions = None, effective_tax_rate: float = 0.22, spending_model: str = 'constant_real', market_periods: Dict = None, seed=None):
         """Run Monte Carlo simulation using vectorized NumPy operations for high performance.
 
+        All random draws are made up front as (years, simulations) arrays, so the
+        yearly loop only indexes pre-sampled rows.
+
         Args:
             years: Number of years to simulate
             simulations: Number of Monte Carlo simulations to run
@@ -573,19 +648,47 @@ class RetirementModel:
             effective_tax_rate: Effective tax rate for calculations
             spending_model: Spending pattern model ('constant_real', 'retirement_smile', 'conservative_decline')
             market_periods: Optional period-based market conditions (timeline or cycle)
+            seed: Optional seed or np.random.Generator for reproducible runs. When
+                omitted, draws come from the global np.random state.
         """
-        if assumptions is None:
-            assumptions = MarketAssumptions()
+        return self.monte_carlo_simulation_multi(
+            years, simulations, [assumptions or MarketAssumptions()], effective_tax_rate,
+            spending_model, market_periods, seed
+        )[0]
+
+    def monte_carlo_simulation_multi(self, years: int, simulations: int = 10000, assumptions_list: List[MarketAssumptions] = None, effective_tax_rate: float = 0.22, spending_model: str = 'constant_real', market_periods: Dict = None, seed=None) -> List[Dict]:
+        """Run the Monte Carlo simulation for several market assumptions at once.
 
-        base_stock_pct = assumptions.stock_allocation
+        Every scenario sees the same market, inflation and home-price shocks, so
+        differences between results come from the assumptions alone. Scenarios
+        are laid side by side along the path axis (scenario k owns paths
+        k*simulations to (k+1)*simulations - 1) and simulated in one yearly loop.
+        With a single scenario this is exactly monte_carlo_simulation.
+
+        Args:
+            assumptions_list: Market assumptions per scenario (defaults to one
+                MarketAssumptions())
+            Other arguments as for monte_carlo_simulation.
+
+        Returns:
+            One result dict per entry of assumptions_list, in the same order.
+        """
+        assumptions_list = list(assumptions_list or [MarketAssumptions()])
+        n_scenarios = len(assumptions_list)
+        n_paths = n_scenarios * simulations
+
+        rng = np.random.default_rng(seed) if seed is not None else np.random
 
         # Validate market periods and collect warnings
         period_warnings = self._validate_market_periods(years, market_periods)
 
-        # Build year-by-year market assumptions lookup
-        period_assumptions = self._build_period_assumptions_lookup(years, market_periods, assumptions)
+        # Build year-by-year market assumptions lookup per scenario
+        period_lookups = [
+            self._build_period_assumptions_lookup(years, market_periods, assumptions)
+            for assumptions in assumptions_list
+        ]
         
-        # 1. Initialize Account Vectors (shape: (simulations,))
+        # 1. Initialize Account Vectors (shape: (n_paths,))
         start_cash = 0.0
         start_taxable_val = 0.0
         start_taxable_basis = 0.0
@@ -614,23 +717,84 @@ class RetirementModel:
                 start_pretax_std += val  # Lump sum opportunity
 
         # Initialize vectors
-        cash = np.full(simulations, start_cash)
-        taxable_val = np.full(simulations, start_taxable_val)
-        taxable_basis = np.full(simulations, start_taxable_basis)
-        pretax_std = np.full(simulations, start_pretax_std)
-        pretax_457 = np.full(simulations, start_pretax_457)
-        roth = np.full(simulations, start_roth)
-
-        # 2. Pre-calculate Market Factors (shape: (simulations, years))
-        # Inflation - now period-specific
-        inflation_rates = np.zeros((simulations, years))
-        for year_idx in range(years):
-            year_assumptions = period_assumptions.get(year_idx, assumptions)
-            inflation_rates[:, year_idx] = np.random.normal(year_assumptions.inflation_mean, year_assumptions.inflation_std, simulations)
-        
-        # Calculate Returns per year (Dynamic stock pct based on glide path)
+        cash = np.full(n_paths, start_cash)
+        taxable_val = np.full(n_paths, start_taxable_val)
+        taxable_basis = np.full(n_paths, start_taxable_basis)
+        pretax_std = np.full(n_paths, start_pretax_std)
+        pretax_457 = np.full(n_paths, start_pretax_457)
+        roth = np.full(n_paths, start_roth)
+
+        # 2. Pre-calculate Market Factors (shape: (years, n_scenarios))
+        p1_birth_year = self.profile.person1.birth_date.year
+        inflation_mean = np.empty((years, n_scenarios))
+        inflation_std = np.empty((years, n_scenarios))
+        ret_mean = np.empty((years, n_scenarios))
+        ret_std = np.empty((years, n_scenarios))
+        for year_idx, scenario_idx in itertools.product(range(years), range(n_scenarios)):
+            p1_age = (self.current_year + year_idx) - p1_birth_year
+
+            # Get market assumptions for this specific year (period-specific)
+            year_assumptions = period_lookups[scenario_idx].get(year_idx, assumptions_list[scenario_idx])
+            inflation_mean[year_idx, scenario_idx] = year_assumptions.inflation_mean
+            inflation_std[year_idx, scenario_idx] = year_assumptions.inflation_std
+
+            # --- Multi-Asset Portfolio Calculation ---
+            # Basic allocation from assumptions
+            allocs = {
+                'stock': year_assumptions.stock_allocation,
+                'bond': year_assumptions.bond_allocation,
+                'cash': year_assumptions.cash_allocation,
+                'reit': year_assumptions.reit_allocation,
+                'gold': year_assumptions.gold_allocation,
+                'crypto': year_assumptions.crypto_allocation
+            }
+
+            # Apply Dynamic Glide Path (Equity reduction after 65)
+            # Reduce stock pct by 1% each year after 65, down to min 20%
+            if p1_age > 65:
+                reduction = (p1_age - 65) * 0.01
+                old_stock = allocs['stock']
+                new_stock = max(0.20, old_stock - reduction)
+                allocs['stock'] = new_stock
+
+                # Re-distribute the reduction to bonds (conservative shift)
+                allocs['bond'] += (old_stock - new_stock)
+
+            # Calculate Portfolio Mean Return
+            ret_mean[year_idx, scenario_idx] = (
+                allocs['stock'] * year_assumptions.stock_return_mean +
+                allocs['bond'] * year_assumptions.bond_return_mean +
+                allocs['cash'] * year_assumptions.cash_return_mean +
+                allocs['reit'] * year_assumptions.reit_return_mean +
+                allocs['gold'] * year_assumptions.gold_return_mean +
+                allocs['crypto'] * year_assumptions.crypto_return_mean
+            )
+
+            # Calculate Portfolio Volatility (Variance-Covariance)
+            # Simplification: Use weighted average of variances for additional assets
+            # to avoid huge correlation matrix requirement.
+            # Stock/Bond correlation remains 0.3.
+            stock_var = (allocs['stock'] * year_assumptions.stock_return_std) ** 2
+            bond_var = (allocs['bond'] * year_assumptions.bond_return_std) ** 2
+            sb_cov = 2 * allocs['stock'] * allocs['bond'] * 0.3 * year_assumptions.stock_return_std * year_assumptions.bond_return_std
+
+            other_var = (
+                (allocs['cash'] * year_assumptions.cash_return_std) ** 2 +
+                (allocs['reit'] * year_assumptions.reit_return_std) ** 2 +
+                (allocs['gold'] * year_assumptions.gold_return_std) ** 2 +
+                (allocs['crypto'] * year_assumptions.crypto_return_std) ** 2
+            )
+
+            ret_std[year_idx, scenario_idx] = np.sqrt(stock_var + bond_var + sb_cov + other_var)
+
+        # One draw per array instead of one per year; rows are contiguous per
+        # year. The standard-normal shocks are shared by all scenarios and
+        # scaled per scenario, giving (years, n_paths) arrays.
+        inflation_rates = _scale_shared_shocks(rng, inflation_mean, inflation_std, simulations)
+        portfolio_returns = _scale_shared_shocks(rng, ret_mean, ret_std, simulations)
+
         # cpi[:, 0] is 1.0. cpi[:, t] = product(1+inf) up to t-1
-        current_cpi = np.ones(simulations)
+        current_cpi = np.ones(n_paths)
 
         # 3. Income & Expense Constants
         base_ss = (self.profile.person1.social_security + self.profile.person2.social_security) * 12
@@ -669,46 +833,41 @@ class RetirementModel:
                         sale_year = datetime.fromisoformat(prop['planned_sale_date']).year
                     except: pass
 
+                appreciation_rates = np.array([
+                    safe_float(prop.get('appreciation_rate') or assumptions.inflation_mean)
+                    for assumptions in assumptions_list
+                ])
                 home_props_state.append({
-                    'values': np.full(simulations, prop_val),
-                    'mortgages': np.full(simulations, prop_mort),
-                    'annual_costs': np.full(simulations, prop_costs),
-                    'appreciation_rate': safe_float(prop.get('appreciation_rate') or assumptions.inflation_mean),
+                    'values': np.full(n_paths, prop_val),
+                    'mortgages': np.full(n_paths, prop_mort),
+                    'annual_costs': np.full(n_paths, prop_costs),
+                    'appreciation': _scale_shared_shocks(
+                        rng, np.broadcast_to(appreciation_rates, (years, n_scenarios)), 0.05, simulations
+                    ),
                     'sale_year': sale_year,
                     'purchase_price': safe_float(prop.get('purchase_price') or prop_val),
                     'property_type': prop.get('property_type', 'Primary Residence'),
                     'replacement_cost': safe_float(prop.get('replacement_value', 0)),
-                    'is_sold': np.zeros(simulations, dtype=bool) # Track sold state
+                    'is_sold': np.zeros(n_paths, dtype=bool) # Track sold state
                 })
 
+        # Cash earns its scenario's mean cash return
+        cash_growth = np.repeat([1 + a.cash_return_mean for a in assumptions_list], simulations)
+
         # Constants
         EARLY_PENALTY = 0.10
         CASH_INTEREST = 0.015
         STANDARD_DEDUCTION_BASE = 29200  # 2024 MFJ standard deduction
         
         # Result Storage
-        all_paths = np.zeros((simulations, years))
-        p1_birth_year = self.profile.person1.birth_date.year
+        all_paths = np.zeros((n_paths, years), dtype=_SHOCK_DTYPE)
         p2_birth_year = self.profile.person2.birth_date.year
         p1_retirement_year = self.profile.person1.retirement_date.year
         p2_retirement_year = self.profile.person2.retirement_date.year
 
         # Pre-calculate Spending Multipliers based on Model
-        spending_multipliers = np.ones(years)
-        if spending_model == 'retirement_smile':
-            for i in range(years):
-                age = (self.current_year + i) - p1_birth_year
-                if age < 70:
-                    spending_multipliers[i] = 1.0
-                elif 70 <= age < 80:
-                    spending_multipliers[i] = 1.0 - ((age - 70) * 0.02)
-                else: 
-                    spending_multipliers[i] = 0.8 + ((age - 80) * 0.02)
-        elif spending_model == 'conservative_decline':
-            for i in range(years):
-                age = (self.current_year + i) - p1_birth_year
-                if age > 70:
-                    spending_multipliers[i] = max(0.6, 1.0 - ((age - 70) * 0.01))
+        p1_ages = self.current_year + np.arange(years) - p1_birth_year
+        spending_multipliers = SPENDING_MODELS.get(spending_model, _constant_real_spending)(p1_ages)
 
         # 4. Simulation Loop (Year by Year)
         for year_idx in range(years):
@@ -716,65 +875,7 @@ class RetirementModel:
             p1_age = simulation_year - p1_birth_year
             p2_age = simulation_year - p2_birth_year
             
-            # Dynamic Asset Allocation (Glide Path)
-            # Reduce stock pct by 1% each year after 65, down to min 20%
-            stock_pct = base_stock_pct
-            if p1_age > 65:
-                reduction = (p1_age - 65) * 0.01
-                stock_pct = max(0.20, base_stock_pct - reduction)
-
-            # Get market assumptions for this specific year
-            year_assumptions = period_assumptions.get(year_idx, assumptions)
-
-            # --- Multi-Asset Portfolio Calculation ---
-            # Basic allocation from assumptions
-            allocs = {
-                'stock': year_assumptions.stock_allocation,
-                'bond': year_assumptions.bond_allocation,
-                'cash': year_assumptions.cash_allocation,
-                'reit': year_assumptions.reit_allocation,
-                'gold': year_assumptions.gold_allocation,
-                'crypto': year_assumptions.crypto_allocation
-            }
-            
-            # Apply Dynamic Glide Path (Equity reduction after 65)
-            if p1_age > 65:
-                reduction = (p1_age - 65) * 0.01
-                old_stock = allocs['stock']
-                new_stock = max(0.20, old_stock - reduction)
-                allocs['stock'] = new_stock
-                
-                # Re-distribute the reduction to bonds (conservative shift)
-                allocs['bond'] += (old_stock - new_stock)
-
-            # Calculate Portfolio Mean Return
-            ret_mean = (
-                allocs['stock'] * year_assumptions.stock_return_mean +
-                allocs['bond'] * year_assumptions.bond_return_mean +
-                allocs['cash'] * year_assumptions.cash_return_mean +
-                allocs['reit'] * year_assumptions.reit_return_mean +
-                allocs['gold'] * year_assumptions.gold_return_mean +
-                allocs['crypto'] * year_assumptions.crypto_return_mean
-            )
-
-            # Calculate Portfolio Volatility (Variance-Covariance)
-            # Simplification: Use weighted average of variances for additional assets 
-            # to avoid huge correlation matrix requirement. 
-            # Stock/Bond correlation remains 0.3.
-            stock_var = (allocs['stock'] * year_assumptions.stock_return_std) ** 2
-            bond_var = (allocs['bond'] * year_assumptions.bond_return_std) ** 2
-            sb_cov = 2 * allocs['stock'] * allocs['bond'] * 0.3 * year_assumptions.stock_return_std * year_assumptions.bond_return_std
-            
-            other_var = (
-                (allocs['cash'] * year_assumptions.cash_return_std) ** 2 +
-                (allocs['reit'] * year_assumptions.reit_return_std) ** 2 +
-                (allocs['gold'] * year_assumptions.gold_return_std) ** 2 +
-                (allocs['crypto'] * year_assumptions.crypto_return_std) ** 2
-            )
-            
-            ret_std = np.sqrt(stock_var + bond_var + sb_cov + other_var)
-
-            annual_returns = np.random.normal(ret_mean, ret_std, simulations)
+            annual_returns = portfolio_returns[year_idx]
 
             # Independent Retirement Tracking
             p1_retired = simulation_year >= p1_retirement_year
@@ -782,7 +883,7 @@ class RetirementModel:
             
             # A. Update CPI (except year 0)
             if year_idx > 0:
-                current_cpi *= (1 + inflation_rates[:, year_idx])
+                current_cpi *= (1 + inflation_rates[year_idx])
 
             # Inflation-indexed tax thresholds (prevent bracket creep)
             std_deduction = self.get_standard_deduction(current_cpi)
@@ -802,20 +903,19 @@ class RetirementModel:
             active_pension = (base_pension if p1_retired else 0) * current_cpi
 
             # B3. Other Income Streams (pensions, annuities, salary - taxable)
-            other_taxable_income = np.zeros(simulations)
-            employment_income_from_streams = np.zeros(simulations)
-            employment_types = ['salary', 'hourly', 'wages', 'bonus']
+            other_taxable_income = np.zeros(n_paths)
+            employment_income_from_streams = np.zeros(n_paths)
             for stream in income_streams_data:
                 if simulation_year >= stream['start_year']:
                     amount = stream['amount'] * (current_cpi if stream['inflation_adjusted'] else 1.0)
-                    if stream.get('type') in employment_types:
+                    if stream.get('type') in EMPLOYMENT_INCOME_TYPES:
                         employment_income_from_streams += amount
                     else:
                         other_taxable_income += amount
 
             # B4. Budget Income (employment, rental, etc.)
-            employment_income_from_budget = np.zeros(simulations)
-            budget_income_other = np.zeros(simulations)
+            employment_income_from_budget = np.zeros(n_paths)
+            budget_income_other = np.zeros(n_paths)
             if self.profile.budget:
                 budget_income_total, employment_income_from_budget = self.calculate_budget_income(simulation_year, current_cpi, p1_retired, p2_retired)
                 # Budget income that is not employment (rental, etc.)
@@ -827,8 +927,8 @@ class RetirementModel:
             other_ordinary_income_gross = active_pension + other_taxable_income + budget_income_other
 
             # --- Tax step 1: FICA and State Tax (Applied to gross income) ---
-            fica_tax = np.zeros(simulations)
-            state_tax_paid = np.zeros(simulations)
+            fica_tax = np.zeros(n_paths)
+            state_tax_paid = np.zeros(n_paths)
             
             # FICA only on employment income
             if np.any(employment_income_gross > 0):
@@ -851,7 +951,7 @@ class RetirementModel:
             fed_tax_paid, _ = self._vectorized_federal_tax(taxable_income_federal)
 
             # --- Tax Step 4: IRMAA ---
-            irmaa_expense = np.zeros(simulations)
+            irmaa_expense = np.zeros(n_paths)
             if p1_age >= 65 or p2_age >= 65:
                 # MAGI ≈ AGI (Total Ordinary Taxable Gross)
                 both_on_medicare = (p1_age >= 65) and (p2_age >= 65)
@@ -866,7 +966,7 @@ class RetirementModel:
 
 
             # C. Calculate Expenses
-            current_housing_costs = np.zeros(simulations)
+            current_housing_costs = np.zeros(n_paths)
             for prop in home_props_state:
                 unsold_mask = ~prop['is_sold']
                 current_housing_costs += np.where(unsold_mask, prop['annual_costs'], 0)
@@ -975,7 +1075,7 @@ class RetirementModel:
                         prop['values'] = np.where(active_mask, 0, prop['values'])
 
             # F. RMD Logic (Age 73+ for either spouse)
-            total_rmd = np.zeros(simulations)
+            total_rmd = np.zeros(n_paths)
             original_pretax = pretax_std.copy()
             rmd_factors = {
                 73: 26.5, 74: 25.5, 75: 24.6, 76: 23.7, 77: 22.9,
@@ -1039,7 +1139,8 @@ class RetirementModel:
                 
                 net_withdrawal = withdrawal - (actual_fed_tax + actual_state_tax)
                 cumulative_ordinary_gross += withdrawal
-                shortfall -= net_withdrawal
+                # Estimated tax can overshoot; never carry a negative need forward
+                shortfall = np.maximum(0, shortfall - net_withdrawal)
 
             # 3. Taxable Brokerage (Pay capital gains tax stacked on ordinary income)
             mask = shortfall > 0
@@ -1065,7 +1166,8 @@ class RetirementModel:
 
                 taxable_val -= withdrawal
                 taxable_basis -= basis_reduction
-                shortfall -= net_withdrawal
+                # Estimated tax can overshoot; never carry a negative need forward
+                shortfall = np.maximum(0, shortfall - net_withdrawal)
 
             # 4. Pre-Tax (Traditional IRA/401k) - Subject to Ordinary Income Tax
             mask = shortfall > 0
@@ -1090,7 +1192,8 @@ class RetirementModel:
                 
                 net_withdrawal = withdrawal - (actual_fed_tax + actual_state_tax)
                 cumulative_ordinary_gross += withdrawal
-                shortfall -= net_withdrawal
+                # Estimated tax can overshoot; never carry a negative need forward
+                shortfall = np.maximum(0, shortfall - net_withdrawal)
 
             # 5. Roth Assets (Tax-free, last resort to preserve tax-free growth)
             mask = shortfall > 0
@@ -1103,7 +1206,7 @@ class RetirementModel:
             # Apply growth
             year_returns = annual_returns
 
-            cash *= (1 + assumptions.cash_return_mean)
+            cash *= cash_growth
 
             # Taxable accounts: Apply tax drag
             TAX_DRAG_RATE = 0.15
@@ -1119,10 +1222,7 @@ class RetirementModel:
             
             # Grow homes
             for prop in home_props_state:
-                apprec_mean = prop['appreciation_rate']
-                apprec_std = 0.05
-                apprec_vec = np.random.normal(apprec_mean, apprec_std, simulations)
-                
+                apprec_vec = prop['appreciation'][year_idx]
                 mask_unsold = ~prop['is_sold']
                 prop['values'] = np.where(mask_unsold, prop['values'] * (1 + apprec_vec), 0)
 
@@ -1132,33 +1232,39 @@ class RetirementModel:
             total_portfolio = np.maximum(0, total_portfolio)
             all_paths[:, year_idx] = total_portfolio
 
-        # 5. Final Statistics
-        ending_balances = all_paths[:, -1]
-        success_count = np.sum(ending_balances > 0)
-        success_rate = success_count / simulations
-
+        # 5. Final Statistics (per scenario)
         # Add market period warnings to any other warnings
         all_warnings = period_warnings.copy() if period_warnings else []
-
-        return {
-            'success_rate': float(success_rate),
-            'median_final_balance': float(np.median(ending_balances)),
-            'percentile_10': float(np.percentile(ending_balances, 10)),
-            'percentile_90': float(np.percentile(ending_balances, 90)),
-            'expected_value': float(np.mean(ending_balances)),
-            'std_deviation': float(np.std(ending_balances)),
-            'starting_portfolio': float(start_cash + start_taxable_val + start_pretax_std + start_pretax_457 + start_roth),
-            'annual_withdrawal_need': float(self.profile.target_annual_income - (base_ss + base_pension)),
-            'simulations': simulations,
-            'timeline': {
-                'years': list(range(self.current_year, self.current_year + years)),
-                'p5': np.percentile(all_paths, 5, axis=0).tolist(),
-                'median': np.median(all_paths, axis=0).tolist(),
-                'p95': np.percentile(all_paths, 95, axis=0).tolist()
-            },
-            'warnings': all_warnings,
-            'recommendations': []
-        }
+        starting_portfolio = float(start_cash + start_taxable_val + start_pretax_std + start_pretax_457 + start_roth)
+        annual_withdrawal_need = float(self.profile.target_annual_income - (base_ss + base_pension))
+        timeline_years = list(range(self.current_year, self.current_year + years))
+
+        results = []
+        for scenario_paths in all_paths.reshape(n_scenarios, simulations, years):
+            ending_balances = scenario_paths[:, -1]
+            success_count = np.sum(ending_balances > 0)
+            success_rate = success_count / simulations
+
+            results.append({
+                'success_rate': float(success_rate),
+                'median_final_balance': float(np.median(ending_balances)),
+                'percentile_10': float(np.percentile(ending_balances, 10)),
+                'percentile_90': float(np.percentile(ending_balances, 90)),
+                'expected_value': float(np.mean(ending_balances, dtype=np.float64)),
+                'std_deviation': float(np.std(ending_balances, dtype=np.float64)),
+                'starting_portfolio': starting_portfolio,
+                'annual_withdrawal_need': annual_withdrawal_need,
+                'simulations': simulations,
+                'timeline': {
+                    'years': timeline_years,
+                    'p5': np.percentile(scenario_paths, 5, axis=0).tolist(),
+                    'median': np.median(scenario_paths, axis=0).tolist(),
+                    'p95': np.percentile(scenario_paths, 95, axis=0).tolist()
+                },
+                'warnings': list(all_warnings),
+                'recommendations': []
+            })
+        return results
 
     def run_detailed_projection(self, years: int, assumptions: MarketAssumptions = None, spending_model: str = 'constant_real'):
         """
@@ -1173,12 +1279,12 @@ class RetirementModel:
         
         # 1. Initialize Balances (Standardized with monte_carlo_simulation)
         # Use aggregate fields from FinancialProfile for robustness
-        cash = np.full(simulations, self.profile.liquid_assets * 0.10)
-        taxable_val = np.full(simulations, self.profile.liquid_assets * 0.90)
-        taxable_basis = np.full(simulations, self.profile.liquid_assets * 0.90 * 0.80) # Assume 20% gains
-        pretax_std = np.full(simulations, self.profile.traditional_ira)
+        cash = np.full(simulations, self.profile.liquid_assets * 0.10, dtype=float)
+        taxable_val = np.full(simulations, self.profile.liquid_assets * 0.90, dtype=float)
+        taxable_basis = np.full(simulations, self.profile.liquid_assets * 0.90 * 0.80, dtype=float) # Assume 20% gains
+        pretax_std = np.full(simulations, self.profile.traditional_ira, dtype=float)
         pretax_457 = np.zeros(simulations)
-        roth = np.full(simulations, self.profile.roth_ira)
+        roth = np.full(simulations, self.profile.roth_ira, dtype=float)
 
         # Refine with investment_types details if available
         inv_types = self.profile.investment_types or []
@@ -1305,11 +1411,10 @@ class RetirementModel:
             
             other_taxable_annual = 0
             employment_streams_annual = 0
-            employment_types = ['salary', 'hourly', 'wages', 'bonus']
             for stream in income_streams_data:
                 if simulation_year >= stream['start_year']:
                     amt = stream['amount_annual'] * (current_cpi if stream['inflation_adjusted'] else 1.0)
-                    if stream.get('type') in employment_types:
+                    if stream.get('type') in EMPLOYMENT_INCOME_TYPES:
                         employment_streams_annual += amt
                     else:
                         other_taxable_annual += amt
@@ -31,6 +31,8 @@ export const analysisAPI = {
 
     /**
      * Get Social Security optimization
+     * Resolves to { profile_name, strategies }, with strategies ranked by
+     * lifetime_benefit_npv, highest first
      */
     async optimizeSocialSecurity(profileName) {
         return apiClient.post(API_ENDPOINTS.ANALYSIS_SS, {
@@ -40,12 +42,12 @@ export const analysisAPI = {
 
     /**
      * Analyze Roth conversion
+     * The conversion amount is sized server-side from the profile; for
+     * user-chosen amounts use taxOptimizationAPI.analyzeRothConversion
      */
-    async analyzeRothConversion(profileName, conversionAmount, conversionAge) {
+    async analyzeRothConversion(profileName) {
         return apiClient.post(API_ENDPOINTS.ANALYSIS_ROTH, {
-            profile_name: profileName,
-            conversion_amount: conversionAmount,
-            conversion_age: conversionAge
+            profile_name: profileName
         });
     },
 
@@ -357,6 +357,10 @@ export function showAIImportModal(type, profileName, onComplete) {
 
                     hideModalError();
                     showPreview();
+
+                    if (finalResponse.failed_chunks > 0) {
+                        showModalError(`${finalResponse.failed_chunks} section(s) of this document could not be analyzed. Review the results below for missing items.`);
+                    }
                 } catch (error) {
                     console.error('AI Extraction error:', error);
                     if (error.message === 'TIMEOUT') {
@@ -16,6 +16,7 @@ from src.database.connection import Database
 from src.auth.models import User
 from src.models.profile import Profile
 from src.services.encryption_service import EncryptionService
+from src.services.llm_cache import llm_cache
 
 
 @pytest.fixture(scope='session')
@@ -62,6 +63,8 @@ def test_db(test_db_dir, request):
         importlib.reload(sys.modules['src.models.scenario'])
     if 'src.models.conversation' in sys.modules:
         importlib.reload(sys.modules['src.models.conversation'])
+    if 'src.models.extract_history' in sys.modules:
+        importlib.reload(sys.modules['src.models.extract_history'])
     if 'src.models.group' in sys.modules:
         importlib.reload(sys.modules['src.models.group'])
     if 'src.services.user_backup_service' in sys.modules:
@@ -172,6 +175,23 @@ def test_db(test_db_dir, request):
             )
         ''')
 
+        # Extraction history table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS extract_history (
+                user_id INTEGER NOT NULL,
+                file_sha256 TEXT NOT NULL,
+                item_type TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL DEFAULT '',
+                prompt_version TEXT NOT NULL,
+                items TEXT NOT NULL,
+                items_iv TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (user_id, file_sha256, item_type, provider, model),
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+        ''')
+
         # Audit log table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS audit_log (
@@ -395,6 +415,7 @@ def app(test_db):
     app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for testing
     app.config['RATELIMIT_ENABLED'] = False # Disable Rate Limiting for testing
     app.config['RATELIMIT_STORAGE_URI'] = 'memory://' # Use memory storage for testing
+    llm_cache.clear()  # Don't let cached LLM responses leak between tests
     return app
 
 
@@ -53,7 +53,7 @@ def mock_auth(monkeypatch):
     monkeypatch.setattr("src.routes.ai_services.current_user", user)
     return user
 
-@patch("requests.post")
+@patch("src.routes.ai_services._SESSION.post")
 def test_advisor_chat_multi_provider(mock_post, client, mock_profile_data, mock_auth):
     # Mock OpenAI response
     mock_response = MagicMock()
@@ -64,8 +64,8 @@ def test_advisor_chat_multi_provider(mock_post, client, mock_profile_data, mock_
     mock_post.return_value = mock_response
 
     # Mock Conversation methods
-    with patch("src.models.conversation.Conversation.list_by_profile", return_value=[]), \
-         patch("src.models.conversation.Conversation.save", return_value=None):
+    with patch("src.routes.ai_services.Conversation.list_by_profile", return_value=[]), \
+         patch("src.routes.ai_services.Conversation.save_many", return_value=None):
         
         response = client.post("/api/advisor/chat", json={
             "profile_name": "test_profile",
@@ -1,10 +1,13 @@
 
 import pytest
+import time
 from unittest.mock import MagicMock, patch
 import json
+import requests
 from src.models.profile import Profile
 from src.models.conversation import Conversation
 from src.auth.models import User
+from src.routes.ai_services import resilient_parse_llm_json, process_pdf_content, sanitize_url, fitz, _hedged_first_success, _sniff_mime, _StreamedItemParser, stream_llm, process_pdf_content_cached, _ollama_post, call_claude_with_vision
 
 @pytest.fixture
 def auth_headers(client, test_user):
@@ -18,7 +21,7 @@ def auth_headers(client, test_user):
 
 class TestAIServices:
     
-    @patch('src.routes.ai_services.requests.post')
+    @patch('src.routes.ai_services._SESSION.post')
     def test_call_gemini_fallback_success(self, mock_post, client, test_user, test_profile, encryption_service):
         """Test call_gemini_with_fallback succeeds with first model."""
         
@@ -53,7 +56,7 @@ class TestAIServices:
         args, kwargs = mock_post.call_args
         assert 'gemini-2.0-flash' in args[0]
 
-    @patch('src.routes.ai_services.requests.post')
+    @patch('src.routes.ai_services._SESSION.post')
     def test_call_gemini_specific_model(self, mock_post, client, test_user, test_profile, encryption_service):
         """Test extract-items with a specific requested model."""
         
@@ -89,7 +92,7 @@ class TestAIServices:
         args, kwargs = mock_post.call_args
         assert 'gemini-1.5-pro' in args[0]
 
-    @patch('src.routes.ai_services.requests.post')
+    @patch('src.routes.ai_services._SESSION.post')
     def test_call_gemini_fallback_failover(self, mock_post, client, test_user, test_profile, encryption_service):
         """Test call_gemini_with_fallback fails over to next model."""
         
@@ -167,6 +170,76 @@ class TestAIServices:
         # Content is encrypted in the object, assume to_dict decrypts it
         assert msgs[1].to_dict()['content'] == "Here is some financial advice."
 
+    @patch('src.routes.ai_services.ADVISOR_LLM_TIMEOUT', 0.1)
+    @patch('src.routes.ai_services.call_llm')
+    def test_advisor_chat_timeout(self, mock_call_llm, client, test_user, test_profile, encryption_service):
+        """Test advisor_chat returns 504 when the provider exceeds the deadline."""
+        mock_call_llm.side_effect = lambda *args, **kwargs: time.sleep(1) or 'late'
+
+        test_profile.data = {'api_keys': {'gemini_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/advisor/chat', json={
+            'profile_name': test_profile.name,
+            'message': 'Should I retire?'
+        })
+
+        assert response.status_code == 504
+        assert 'did not respond' in response.get_json()['error']
+
+        # The user's side of the turn is still kept
+        msgs = Conversation.list_by_profile(test_user.id, test_profile.id)
+        assert [m.role for m in msgs] == ['user']
+
+    @patch('src.routes.ai_services.genai')
+    def test_advisor_chat_stream(self, mock_genai, client, test_user, test_profile, encryption_service):
+        """Test advisor_chat streams SSE deltas and saves the full reply."""
+
+        mock_client_instance = MagicMock()
+        mock_genai.Client.return_value = mock_client_instance
+        mock_client_instance.models.generate_content_stream.return_value = [
+            MagicMock(text="Here is "), MagicMock(text="some advice.")
+        ]
+
+        test_profile.data = {
+            'api_keys': {'gemini_api_key': 'test_key'},
+            'financial': {'annual_income': 100000}
+        }
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/advisor/chat', json={
+            'profile_name': test_profile.name,
+            'message': 'Should I retire?',
+            'stream': True
+        })
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = [json.loads(line[len('data: '):])
+                  for line in response.get_data(as_text=True).splitlines() if line.startswith('data: ')]
+        assert [e['delta'] for e in events if 'delta' in e] == ["Here is ", "some advice."]
+        assert events[-1]['done'] is True
+
+        msgs = Conversation.list_by_profile(test_user.id, test_profile.id)
+        assert len(msgs) == 2
+        assert msgs[1].to_dict()['content'] == "Here is some advice."
+
+    @patch('src.routes.ai_services.genai')
+    def test_gemini_client_reused_per_api_key(self, mock_genai):
+        """Test call_gemini builds one client per API key and reuses it."""
+        from src.routes.ai_services import call_gemini
+        mock_genai.Client.return_value.models.generate_content.return_value = MagicMock(text="ok")
+
+        assert call_gemini("hi", "reuse-key") == "ok"
+        assert call_gemini("again", "reuse-key") == "ok"
+        call_gemini("hi", "other-key")
+
+        assert mock_genai.Client.call_count == 2
+
     def test_advisor_chat_no_api_key(self, client, test_user, test_profile):
         """Test advisor_chat fails gracefully without API key."""
         
@@ -188,6 +261,244 @@ class TestAIServices:
         data = response.get_json()
         assert 'configure in AI Settings' in data['error']
 
+    @patch('src.routes.ai_services.call_gemini_with_fallback')
+    @patch('src.routes.ai_services.process_pdf_content')
+    def test_extract_pdf_chunks_keep_page_order(self, mock_pdf, mock_gemini, client, test_user, test_profile, encryption_service):
+        """Test PDF chunks are extracted concurrently but merged in page order."""
+        mock_pdf.return_value = (['page one', 'page two', 'page three'], 'text')
+        mock_gemini.side_effect = lambda p, *args, **kwargs: json.dumps(
+            [{'name': p.rsplit('\n', 1)[-1], 'value': 1}]
+        )
+
+        test_profile.data = {'api_keys': {'gemini_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'JVBERi0xLjQ=',
+            'mime_type': 'application/pdf',
+            'llm_provider': 'gemini',
+            'profile_name': test_profile.name
+        })
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+        assert lines[-1]['status'] == 'complete'
+        assert [a['name'] for a in lines[-1]['assets']] == ['page one', 'page two', 'page three']
+        assert mock_gemini.call_count == 3
+
+    @patch('src.routes.ai_services.stream_llm')
+    def test_extract_text_file_streams_items(self, mock_stream, client, test_user, test_profile, encryption_service):
+        """Test text extraction reports each item as soon as its JSON completes."""
+        mock_stream.return_value = iter(['[{"name": "Che', 'cking", "value": 1},', ' {"name": "IRA", "value": 2}]'])
+
+        test_profile.data = {'api_keys': {'claude_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'bmFtZSx2YWx1ZQ==',
+            'mime_type': 'text/csv',
+            'llm_provider': 'claude',
+            'profile_name': test_profile.name
+        })
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+        assert [line['partial_item']['name'] for line in lines if 'partial_item' in line] == ['Checking', 'IRA']
+        assert lines[-1]['status'] == 'complete'
+        assert [a['name'] for a in lines[-1]['assets']] == ['Checking', 'IRA']
+
+    @patch('src.routes.ai_services._SESSION.post')
+    def test_extract_text_file_falls_back_across_claude_models(self, mock_post, client, test_user, test_profile,
+                                                               encryption_service):
+        """Test streamed text extraction moves to the next Claude model when the first one fails."""
+        failed = MagicMock(status_code=529, text='overloaded')
+        ok = MagicMock(status_code=200)
+        ok.iter_lines.return_value = [
+            'data: ' + json.dumps({'type': 'content_block_delta', 'delta': {'text': '[{"name": "IRA", "value": 2}]'}}),
+        ]
+        mock_post.return_value.__enter__.side_effect = [failed, ok]
+
+        test_profile.data = {'api_keys': {'claude_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'bmFtZSx2YWx1ZQ==',
+            'mime_type': 'text/csv',
+            'llm_provider': 'claude',
+            'profile_name': test_profile.name
+        })
+
+        assert response.headers['X-Accel-Buffering'] == 'no'
+        final = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line][-1]
+        assert final['assets'] == [{'name': 'IRA', 'value': 2}]
+        assert mock_post.call_count == 2
+
+    @patch('src.routes.ai_services.stream_llm')
+    def test_extract_reupload_served_from_history(self, mock_stream, client, test_user, test_profile, encryption_service):
+        """Test re-uploading an already extracted file is answered from history without the LLM."""
+        mock_stream.return_value = iter(['[{"name": "Checking", "value": 1}]'])
+
+        test_profile.data = {'api_keys': {'claude_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+        request_body = {
+            'image': 'bmFtZSx2YWx1ZQ==',
+            'mime_type': 'text/csv',
+            'llm_provider': 'claude',
+            'profile_name': test_profile.name
+        }
+
+        first = client.post('/api/extract-items/assets', json=request_body)
+        assert json.loads(first.get_data(as_text=True).splitlines()[-1])['assets'][0]['name'] == 'Checking'
+
+        second = client.post('/api/extract-items/assets', json=request_body)
+        final = json.loads(second.get_data(as_text=True).splitlines()[-1])
+        assert final['cached'] is True
+        assert final['assets'] == [{'name': 'Checking', 'value': 1}]
+        assert mock_stream.call_count == 1
+
+    @patch('src.routes.ai_services.stream_llm')
+    def test_extract_history_bypassed_by_force_and_other_models(self, mock_stream, client, test_user, test_profile, encryption_service):
+        """Test force=true and a different provider/model both re-extract instead of reusing history."""
+        mock_stream.side_effect = lambda *args, **kwargs: iter(['[{"name": "Checking", "value": 1}]'])
+
+        test_profile.data = {'api_keys': {'claude_api_key': 'test_key', 'openai_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+        request_body = {
+            'image': 'bmFtZSx2YWx1ZQ==',
+            'mime_type': 'text/csv',
+            'llm_provider': 'claude',
+            'profile_name': test_profile.name
+        }
+
+        client.post('/api/extract-items/assets', json=request_body)
+        assert mock_stream.call_count == 1
+
+        forced = client.post('/api/extract-items/assets', json={**request_body, 'force': True})
+        assert json.loads(forced.get_data(as_text=True).splitlines()[-1]).get('cached') is not True
+        assert mock_stream.call_count == 2
+
+        client.post('/api/extract-items/assets', json={**request_body, 'llm_provider': 'openai'})
+        assert mock_stream.call_count == 3
+
+    @patch('src.routes.ai_services.call_gemini_with_fallback')
+    @patch('src.routes.ai_services.process_pdf_content')
+    def test_extract_pdf_partial_chunk_failure(self, mock_pdf, mock_gemini, client, test_user, test_profile, encryption_service):
+        """Test a failing chunk is reported without discarding the others."""
+        mock_pdf.return_value = (['page one', 'page two'], 'text')
+
+        def fake_gemini(p, *args, **kwargs):
+            if p.endswith('page two'):
+                raise Exception('503 upstream error')
+            return json.dumps([{'name': 'Checking', 'value': 10}])
+        mock_gemini.side_effect = fake_gemini
+
+        test_profile.data = {'api_keys': {'gemini_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'JVBERi0xLjUK',
+            'mime_type': 'application/pdf',
+            'llm_provider': 'gemini',
+            'profile_name': test_profile.name
+        })
+
+        final = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line][-1]
+        assert final['status'] == 'complete'
+        assert final['failed_chunks'] == 1
+        assert [a['name'] for a in final['assets']] == ['Checking']
+
+        # Retrying reuses the cached good chunk and only re-sends the failed one
+        mock_gemini.reset_mock()
+        mock_gemini.side_effect = lambda p, *args, **kwargs: json.dumps([{'name': 'Savings', 'value': 20}])
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'JVBERi0xLjUK',
+            'mime_type': 'application/pdf',
+            'llm_provider': 'gemini',
+            'profile_name': test_profile.name
+        })
+
+        final = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line][-1]
+        assert final['failed_chunks'] == 0
+        assert [a['name'] for a in final['assets']] == ['Checking', 'Savings']
+        assert mock_gemini.call_count == 1
+
+    @patch('src.routes.ai_services.call_gemini_with_fallback')
+    @patch('src.routes.ai_services.process_pdf_content')
+    def test_extract_pdf_chunk_cache_is_per_user(self, mock_pdf, mock_gemini, client, test_user, test_admin,
+                                                 test_profile, encryption_service):
+        """Test another user uploading the same PDF does not get the first user's cached pages."""
+        mock_pdf.return_value = (['page one'], 'text')
+        mock_gemini.return_value = json.dumps([{'name': 'Checking', 'value': 10}])
+        request_body = {
+            'image': 'JVBERi0xLjYK',
+            'mime_type': 'application/pdf',
+            'llm_provider': 'gemini',
+        }
+
+        test_profile.data = {'api_keys': {'gemini_api_key': 'test_key'}}
+        test_profile.save()
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+        client.post('/api/extract-items/assets', json={**request_body, 'profile_name': test_profile.name})
+        client.post('/api/auth/logout')
+
+        Profile(user_id=test_admin.id, name='Admin Profile',
+                data={'api_keys': {'gemini_api_key': 'admin_key'}}).save()
+        client.post('/api/auth/login', json={'username': 'admin', 'password': 'AdminPass123'})
+        response = client.post('/api/extract-items/assets', json={**request_body, 'profile_name': 'Admin Profile'})
+
+        final = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line][-1]
+        assert final['assets'] == [{'name': 'Checking', 'value': 10}]
+        assert mock_gemini.call_count == 2
+
+    @patch('src.routes.ai_services.poll_batch')
+    @patch('src.routes.ai_services.submit_batch')
+    def test_extract_batch_mode(self, mock_submit, mock_poll, client, test_user, test_profile, encryption_service):
+        """Test batch mode submits jobs and the status endpoint returns parsed items."""
+        mock_submit.return_value = 'msgbatch_1'
+
+        test_profile.data = {'api_keys': {'claude_api_key': 'test_key'}}
+        test_profile.save()
+
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'SVJBIDEwMDA=',
+            'mime_type': 'text/plain',
+            'llm_provider': 'claude',
+            'profile_name': test_profile.name,
+            'batch_mode': True
+        })
+        assert response.status_code == 202
+        assert response.get_json()['batch_id'] == 'msgbatch_1'
+        jobs = mock_submit.call_args[0][2]
+        assert [job['text'] for job in jobs] == ['IRA 1000']
+
+        query = {'item_type': 'assets', 'profile_name': test_profile.name, 'provider': 'claude'}
+        mock_poll.return_value = {'status': 'in_progress', 'results': {}}
+        response = client.get('/api/extract-items/status/msgbatch_1', query_string=query)
+        assert response.get_json()['status'] == 'in_progress'
+
+        mock_poll.return_value = {'status': 'completed', 'results': {
+            'page_1': '[{"name": "Roth", "value": 2}]',
+            'page_0': '[{"name": "IRA", "value": 1000}]'
+        }}
+        response = client.get('/api/extract-items/status/msgbatch_1', query_string=query)
+        data = response.get_json()
+        assert data['status'] == 'complete'
+        assert [a['name'] for a in data['assets']] == ['IRA', 'Roth']
+
     def test_extract_assets_input_validation(self, client, test_user):
         """Test validation for extract-items."""
         client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
@@ -205,3 +516,250 @@ class TestAIServices:
         })
         assert response.status_code == 400
         assert 'required' in response.get_json()['error']
+
+    def test_extract_rejects_unsupported_provider(self, client, test_user, test_profile):
+        """Test unsupported providers are rejected before the upload is decoded."""
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'not base64 at all',
+            'llm_provider': 'bogus',
+            'profile_name': test_profile.name
+        })
+        assert response.status_code == 400
+        assert 'Unsupported AI provider' in response.get_json()['error']
+
+    @patch('src.routes.ai_services.MAX_UPLOAD_B64_CHARS', 8)
+    def test_extract_rejects_oversized_upload(self, client, test_user, test_profile):
+        """Test oversized uploads are rejected with 413."""
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        response = client.post('/api/extract-items/assets', json={
+            'image': 'SGVsbG8gV29ybGQ=',
+            'llm_provider': 'gemini',
+            'profile_name': test_profile.name
+        })
+        assert response.status_code == 413
+
+
+class TestResilientParse:
+
+    def test_plain_json_array(self):
+        """Test a clean JSON array parses directly."""
+        assert resilient_parse_llm_json('[{"name": "a", "value": 1}]', 'assets') == [{'name': 'a', 'value': 1}]
+
+    def test_object_with_trailing_text(self):
+        """Test the first balanced object is extracted from surrounding prose."""
+        text = 'Sure! {"assets": [{"name": "IRA", "note": "has } brace"}]} Hope that helps {}'
+        assert resilient_parse_llm_json(text, 'assets') == [{'name': 'IRA', 'note': 'has } brace'}]
+
+    def test_object_with_escaped_quotes(self):
+        """Test escaped quotes inside strings don't break brace matching."""
+        text = 'Result: {"name": "Bob\\"s \\"Bank\\" {x}", "value": 5} end'
+        assert resilient_parse_llm_json(text, 'assets') == [{'name': 'Bob"s "Bank" {x}', 'value': 5}]
+
+    def test_field_fallback_for_plain_text(self):
+        """Test labelled plain-text fields are mapped to a single item."""
+        text = 'Name: Chase Savings\nBalance: 12,500.50\n"type": "savings"\n"frequency": "annual"'
+        assert resilient_parse_llm_json(text, 'assets') == [{
+            'name': 'Chase Savings',
+            'amount': 12500.5,
+            'value': 12500.5,
+            'type': 'savings',
+            'category': 'savings',
+            'frequency': 'annual'
+        }]
+
+    def test_unparseable_returns_empty(self):
+        """Test non-JSON, field-less text returns an empty list."""
+        assert resilient_parse_llm_json('no data here {', 'assets') == []
+
+    def test_streamed_items_from_wrapped_array(self):
+        """Test items are emitted as they complete, across arbitrary piece boundaries."""
+        text = 'Here: ```json\n{"assets": [{"name": "a\\"}[", "lots": [{"x": 1}]}, {"name": "b"}]}\n```'
+        parser = _StreamedItemParser()
+        items = []
+        for i in range(0, len(text), 3):
+            items.extend(parser.feed(text[i:i + 3]))
+        assert items == [{'name': 'a"}[', 'lots': [{'x': 1}]}, {'name': 'b'}]
+
+
+@pytest.mark.skipif(fitz is None, reason="PyMuPDF not installed")
+class TestProcessPdfContent:
+
+    @staticmethod
+    def _text_pdf(pages, text_per_page):
+        doc = fitz.open()
+        for i in range(pages):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"{text_per_page} {i}")
+        return doc.tobytes()
+
+    def test_text_chunks_close_every_50_pages(self):
+        """Test text chunks are split at 50 pages and keep page order."""
+        chunks, content_type = process_pdf_content(self._text_pdf(60, 'Balance 1000'))
+
+        assert content_type == 'text'
+        assert len(chunks) == 2
+        assert chunks[0].startswith('--- Page 1 ---')
+        assert '--- Page 50 ---' in chunks[0] and '--- Page 51 ---' not in chunks[0]
+        assert chunks[1].startswith('--- Page 51 ---')
+
+    def test_short_text_falls_back_to_images(self):
+        """Test a PDF with almost no text is rendered to JPEG page images."""
+        chunks, content_type = process_pdf_content(self._text_pdf(2, 'x'))
+
+        assert content_type == 'images'
+        assert len(chunks) == 2
+        assert chunks[0][:2] == b'\xff\xd8'  # JPEG SOI marker
+
+    def test_accepts_file_path(self, tmp_path):
+        """Test a PDF on disk is processed the same as its bytes."""
+        pdf_bytes = self._text_pdf(3, 'Balance 1000')
+        pdf_path = tmp_path / 'statement.pdf'
+        pdf_path.write_bytes(pdf_bytes)
+
+        assert process_pdf_content(str(pdf_path)) == process_pdf_content(pdf_bytes)
+
+    def test_stream_renders_scanned_pages_lazily(self):
+        """Test stream=True yields the same page images one at a time."""
+        pdf_bytes = self._text_pdf(2, 'x')
+        pages, content_type = process_pdf_content(pdf_bytes, stream=True)
+
+        assert content_type == 'images'
+        assert not isinstance(pages, list)
+        assert list(pages) == process_pdf_content(pdf_bytes)[0]
+
+    def test_cached_chunks_returned_as_iterator(self):
+        """Test a cache hit returns the same kind of iterator as the miss that filled it."""
+        pdf_bytes = self._text_pdf(2, 'cached')
+        first, _ = process_pdf_content_cached(pdf_bytes)
+        first = list(first)
+        second, content_type = process_pdf_content_cached(pdf_bytes)
+
+        assert content_type == 'images'
+        assert not isinstance(second, list)
+        assert list(second) == first
+
+
+@pytest.mark.parametrize('head,expected', [
+    (b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n\x00\x00\x00\r', 'image/png'),
+    (b'RIFF\x24\x00\x00\x00WEBP', 'image/webp'),
+    (b'%PDF-1.7\n%\xe2\xe3', 'application/pdf'),
+    (b'Hello', 'image/png'),
+    (b'', 'image/png'),
+])
+def test_sniff_mime(head, expected):
+    assert _sniff_mime(head) == expected
+
+
+def test_sanitize_url_rejects_masked_urls():
+    """Test masked or mojibake URLs fall back to the default."""
+    assert sanitize_url('http://localhost:11434', 'd') == 'http://localhost:11434'
+    assert sanitize_url('http://••••', 'd') == 'd'
+    assert sanitize_url('http://●●', 'd') == 'd'
+    assert sanitize_url('http://â€¢', 'd') == 'd'
+    assert sanitize_url(None, 'd') == 'd'
+
+
+@pytest.mark.parametrize('error_name,expected', [
+    ('ConnectError', requests.exceptions.ConnectionError),
+    ('ConnectTimeout', requests.exceptions.ConnectTimeout),
+    ('ReadTimeout', requests.exceptions.Timeout),
+    ('RemoteProtocolError', requests.exceptions.RequestException),
+])
+def test_ollama_http2_errors_raised_as_requests_errors(error_name, expected):
+    """Test httpx failures on the HTTP/2 transport surface as requests exceptions."""
+    httpx = pytest.importorskip('httpx')
+    http2_client = MagicMock()
+    http2_client.post.side_effect = getattr(httpx, error_name)('failed')
+
+    with patch('src.routes.ai_services._OLLAMA_HTTP2_CLIENT', http2_client):
+        with pytest.raises(expected):
+            _ollama_post('https://ollama.example/v1/chat/completions', json={})
+
+
+@pytest.mark.parametrize('mime_type', ['image/png', 'text/csv'])
+def test_claude_vision_prompt_stays_in_user_turn(mime_type):
+    """Test the extraction prompt is the cached first block of the user message, not a system prompt."""
+    with patch('src.routes.ai_services._post_json') as mock_post:
+        mock_post.return_value = MagicMock(status_code=200, json=lambda: {'content': [{'text': '[]'}]})
+        call_claude_with_vision('Extract assets', 'key', 'bmFtZSx2YWx1ZQ==', mime_type)
+
+    payload = mock_post.call_args.args[1]
+    assert 'system' not in payload
+    first_block = payload['messages'][0]['content'][0]
+    assert first_block == {'type': 'text', 'text': 'Extract assets', 'cache_control': {'type': 'ephemeral'}}
+
+
+class TestHedgedFirstSuccess:
+
+    def test_slow_primary_is_hedged(self):
+        """A slow first model is raced by the next one; the faster answer wins."""
+        def attempt(model):
+            if model == 'slow':
+                time.sleep(2)
+            return model
+
+        with patch('src.routes.ai_services.GEMINI_HEDGE_DELAY', 0.05):
+            assert _hedged_first_success(['slow', 'fast'], attempt) == 'fast'
+
+    def test_failure_falls_through_in_order(self):
+        calls = []
+
+        def attempt(model):
+            calls.append(model)
+            if model != 'c':
+                raise Exception('429 quota')
+            return model
+
+        assert _hedged_first_success(['a', 'b', 'c'], attempt) == 'c'
+        assert calls == ['a', 'b', 'c']
+
+    def test_non_fallback_error_is_raised(self):
+        def attempt(model):
+            raise ValueError('bad request')
+
+        with pytest.raises(ValueError):
+            _hedged_first_success(['a', 'b'], attempt, should_fallback=lambda e: False)
+
+
+class TestStreamLlmFallback:
+
+    @patch('src.routes.ai_services.genai')
+    def test_rate_limited_gemini_model_falls_back(self, mock_genai):
+        """A rate-limited model hands the stream to the next one in call_gemini's list."""
+        models = []
+
+        def generate_content_stream(model, contents, config):
+            models.append(model)
+            if model == 'models/gemini-2.5-flash':
+                raise Exception('429 RESOURCE_EXHAUSTED')
+            return iter([MagicMock(text='ok')])
+
+        mock_genai.Client.return_value.models.generate_content_stream.side_effect = generate_content_stream
+
+        assert list(stream_llm('gemini', 'hi', 'fallback_key')) == ['ok']
+        assert models == ['models/gemini-2.5-flash', 'models/gemini-2.0-flash']
+
+    @patch('src.routes.ai_services.genai')
+    def test_other_gemini_errors_are_raised(self, mock_genai):
+        mock_genai.Client.return_value.models.generate_content_stream.side_effect = ValueError('bad request')
+
+        with pytest.raises(ValueError):
+            list(stream_llm('gemini', 'hi', 'error_key'))
+
+    @patch('src.routes.ai_services._SESSION.post')
+    def test_claude_falls_back_on_error(self, mock_post):
+        """A failing Claude model moves on, starting from the requested one."""
+        failed = MagicMock(status_code=529, text='overloaded')
+        ok = MagicMock(status_code=200)
+        ok.iter_lines.return_value = [
+            'data: {"type": "content_block_delta", "delta": {"text": "fine"}}',
+        ]
+        mock_post.return_value.__enter__.side_effect = [failed, ok]
+
+        assert list(stream_llm('claude', 'hi', 'key', model='claude-sonnet-4-20250514')) == ['fine']
+        assert [c.kwargs['json']['model'] for c in mock_post.call_args_list] == [
+            'claude-sonnet-4-20250514', 'claude-opus-4-5-20251101']
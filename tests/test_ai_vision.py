@@ -61,7 +61,7 @@ def test_extract_assets_ollama(auth_client):
         }
     }
     
-    with patch('requests.post', return_value=mock_response):
+    with patch('src.routes.ai_services._SESSION.post', return_value=mock_response):
         response = auth_client.post('/api/extract-assets', json={
             'image': base64.b64encode(b'fake-image-data').decode('utf-8'),
             'mime_type': 'image/png',
@@ -0,0 +1,46 @@
+"""
+Unit tests for Conversation model with encryption
+"""
+import pytest
+from src.models.conversation import Conversation
+
+
+def test_save_many_persists_all_messages(test_db, test_user, test_profile):
+    """Test saving a user/assistant turn in one transaction."""
+    user_msg = Conversation(
+        user_id=test_user.id,
+        profile_id=test_profile.id,
+        role='user',
+        content='How much should I save?'
+    )
+    assistant_msg = Conversation(
+        user_id=test_user.id,
+        profile_id=test_profile.id,
+        role='assistant',
+        content='Aim for 15% of income.'
+    )
+    Conversation.save_many([user_msg, assistant_msg])
+
+    assert user_msg.id is not None
+    assert assistant_msg.id is not None
+
+    history = Conversation.list_by_profile(test_user.id, test_profile.id)
+    assert [m.role for m in history] == ['user', 'assistant']
+    assert history[0].to_dict()['content'] == 'How much should I save?'
+    assert history[1].to_dict()['content'] == 'Aim for 15% of income.'
+
+
+def test_save_many_encrypts_content(test_db, test_user, test_profile):
+    """Test that batch-saved messages are encrypted at rest."""
+    msg = Conversation(
+        user_id=test_user.id,
+        profile_id=test_profile.id,
+        role='user',
+        content='secret question'
+    )
+    Conversation.save_many([msg])
+
+    stored = Conversation.get_by_id(msg.id, test_user.id)
+    assert stored.content != 'secret question'
+    assert stored.content_iv is not None
+    assert stored.to_dict()['content'] == 'secret question'
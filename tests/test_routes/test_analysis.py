@@ -2,8 +2,11 @@
 
 import pytest
 import json
+import sys
 from datetime import datetime
-from src.routes.analysis import AnalysisRequestSchema
+from flask_login import login_user
+from src.routes import analysis
+from src.routes.analysis import AnalysisRequestSchema, build_model
 
 
 class TestAnalysisRequestSchema:
@@ -37,6 +40,33 @@ class TestAnalysisRequestSchema:
                 simulations=100000  # Above maximum of 50,000
             )
 
+    @pytest.mark.parametrize('simulations', [float('inf'), float('nan'), '1e400', 'many', 500.5])
+    def test_non_integer_simulations_rejected(self, simulations):
+        """Values int() cannot represent are validation errors, not crashes."""
+        with pytest.raises(ValueError, match='simulations must be an integer'):
+            AnalysisRequestSchema(profile_name='test', simulations=simulations)
+
+    def test_unknown_spending_model_rejected(self):
+        """Only the spending models the simulation implements are accepted."""
+        request = AnalysisRequestSchema(profile_name='test', spending_model='retirement_smile')
+        assert request.spending_model == 'retirement_smile'
+
+        with pytest.raises(ValueError):
+            AnalysisRequestSchema(profile_name='test', spending_model='guyton_klinger')
+
+    def test_from_json_ignores_unknown_fields(self):
+        """Request bodies may carry extra keys; profile_name is required."""
+        request = AnalysisRequestSchema.from_json({
+            'profile_name': 'test_profile',
+            'simulations': '500',
+            'client_version': '2.1'
+        })
+        assert request.simulations == 500
+        assert request.spending_model == 'constant_real'
+
+        with pytest.raises(ValueError):
+            AnalysisRequestSchema.from_json({'simulations': 500})
+
     def test_market_profile_accepted(self):
         """Market profile should be accepted and stored."""
         data = {
@@ -133,6 +163,166 @@ class TestAnalysisRequestSchema:
         assert len(request.market_periods['pattern']) == 2
 
 
-# Integration tests would go here if we had Flask test client setup
-# These would test the full /api/analysis endpoint with market periods
-# For now, schema validation tests above ensure the API contract is correct
+def _login(client):
+    client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'TestPass123'
+    })
+
+
+class TestAnalysisEndpoints:
+    """Integration tests for the analysis endpoints."""
+
+    def test_run_analysis(self, client, test_user, test_profile):
+        """Analysis should return all three allocation scenarios."""
+        _login(client)
+        response = client.post('/api/analysis', json={
+            'profile_name': 'Test Profile',
+            'simulations': 100
+        })
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert set(data['scenarios']) == {'conservative', 'moderate', 'aggressive'}
+        assert data['years_projected'] > 0
+
+    def test_repeat_analysis_served_from_cache(self, client, test_user, test_profile, mocker):
+        """Repeat requests reuse the last result unless force=true."""
+        _login(client)
+        spy = mocker.spy(analysis, 'run_scenarios')
+        payload = {'profile_name': 'Test Profile', 'simulations': 100}
+
+        first = client.post('/api/analysis', json=payload).get_json()
+        second = client.post('/api/analysis', json=payload).get_json()
+        assert spy.call_count == 1
+        assert second['scenarios'] == first['scenarios']
+
+        response = client.post('/api/analysis?force=true', json=payload)
+        assert response.status_code == 200
+        assert spy.call_count == 2
+
+    def test_background_analysis_polled_by_job_id(self, client, test_user, test_profile):
+        """background=true returns a job id whose result matches a direct run."""
+        _login(client)
+        payload = {'profile_name': 'Test Profile', 'simulations': 100}
+
+        queued = client.post('/api/analysis?background=true', json=payload)
+        assert queued.status_code == 202
+        job_id = queued.get_json()['job_id']
+
+        analysis._analysis_jobs.get(job_id)[1].result(timeout=30)
+        response = client.get(f'/api/analysis/jobs/{job_id}')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert set(data['scenarios']) == {'conservative', 'moderate', 'aggressive'}
+
+        # The finished job also primed the result cache
+        direct = client.post('/api/analysis', json=payload).get_json()
+        assert direct['scenarios'] == data['scenarios']
+
+        assert client.get('/api/analysis/jobs/unknown').status_code == 404
+
+    def test_build_model_reused_until_profile_saved(self, test_profile):
+        """Unchanged profiles reuse the cached model; saving rebuilds it."""
+        first = build_model(test_profile)
+        assert build_model(test_profile) is first
+
+        test_profile.updated_at = '2000-01-01T00:00:00'
+        assert build_model(test_profile) is not first
+
+    def test_build_model_totals_accounts_in_one_pass(self, test_profile):
+        """Retirement accounts are classified once; null values and types count as zero."""
+        data = test_profile.data_dict
+        data['assets'] = {
+            'retirement_accounts': [
+                {'type': '401k', 'value': 100000},
+                {'type': 'roth_401k', 'value': 40000},
+                {'type': 'roth_ira', 'value': 10000},
+                {'type': None, 'value': 5000},
+                {'type': 'traditional_ira', 'value': None},
+            ],
+            'taxable_accounts': [{'type': 'brokerage', 'value': 25000}, {'type': 'savings', 'value': None}],
+        }
+        test_profile.data_dict = data
+        test_profile.updated_at = '2001-01-01T00:00:00'
+
+        _, _, financial_profile, _ = build_model(test_profile)
+        assert financial_profile.traditional_ira == 100000
+        assert financial_profile.roth_ira == 50000
+        assert financial_profile.liquid_assets == 25000
+
+    def test_profile_loaded_once_per_request(self, app, test_user, test_profile, mocker):
+        """Repeat lookups in one request reuse the profile and its decrypted data."""
+        decrypt = mocker.spy(sys.modules[analysis.Profile.__module__], 'decrypt_dict')
+
+        with app.app_context(), app.test_request_context():
+            login_user(test_user)
+            first = analysis._load_profile('Test Profile')
+            first.data_dict
+            second = analysis._load_profile('Test Profile')
+            second.data_dict
+            assert second is first
+        assert decrypt.call_count == 1
+
+        with app.app_context(), app.test_request_context():
+            login_user(test_user)
+            assert analysis._load_profile('Test Profile') is not first
+
+    def test_derived_budget_income_not_written_to_profile_data(self, test_profile):
+        """Income filled in from income_streams stays out of the stored profile data."""
+        data = test_profile.data_dict
+        data['budget'] = {'expenses': {}}
+        data['income_streams'] = [{'type': 'salary', 'amount': 5000, 'frequency': 'monthly'}]
+        test_profile.data_dict = data
+        test_profile.updated_at = '2002-01-01T00:00:00'
+
+        _, _, financial_profile, _ = build_model(test_profile)
+        assert financial_profile.budget['income']['current']['employment']['primary_person'] == 60000
+        assert 'income' not in test_profile.data_dict['budget']
+
+    def test_infinite_simulations_is_bad_request(self, client, test_user, test_profile):
+        """A JSON Infinity for simulations is rejected with a 400."""
+        _login(client)
+        response = client.post('/api/analysis', data='{"profile_name": "Test Profile", "simulations": Infinity}',
+                               content_type='application/json')
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'simulations must be an integer'
+
+    def test_cashflow_details(self, client, test_user, test_profile):
+        """Cashflow details should return a JSON ledger with one row per year."""
+        _login(client)
+        response = client.post('/api/analysis/cashflow-details', json={
+            'profile_name': 'Test Profile'
+        })
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/json'
+        data = response.get_json()
+        assert data['profile_name'] == 'Test Profile'
+        assert len(data['ledger']) > 0
+
+    def test_social_security_analysis(self, client, test_user, test_profile):
+        """Social Security analysis should rank claiming strategies."""
+        _login(client)
+        response = client.post('/api/analysis/social-security', json={
+            'profile_name': 'Test Profile'
+        })
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['profile_name'] == 'Test Profile'
+        npvs = [s['lifetime_benefit_npv'] for s in data['strategies']]
+        assert npvs == sorted(npvs, reverse=True)
+
+    def test_roth_conversion_analysis(self, client, test_user, test_profile):
+        """Roth analysis sizes conversions from the profile; the request body only names it."""
+        _login(client)
+        response = client.post('/api/analysis/roth-conversion', json={
+            'profile_name': 'Test Profile'
+        })
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['profile_name'] == 'Test Profile'
+        assert data['opportunity'] == 'excellent'
+        assert data['annual_conversion_12_bracket'] > 0
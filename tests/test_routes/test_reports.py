@@ -0,0 +1,56 @@
+"""Tests for the Monte Carlo analysis behind PDF reports."""
+
+import numpy as np
+from src.routes.reports import run_analysis_for_report
+
+
+def _with_assets(profile, income_streams=None, updated_at='2003-01-01T00:00:00'):
+    data = profile.data_dict
+    data['assets'] = {'taxable_accounts': [{'type': 'brokerage', 'value': 600000}]}
+    data['income_streams'] = income_streams or []
+    profile.data_dict = data
+    profile.updated_at = updated_at
+    return profile
+
+
+class TestReportAnalysis:
+    """run_analysis_for_report runs the same simulation as the analysis page."""
+
+    def test_report_matches_analysis_endpoint(self, client, test_user, test_profile):
+        """The report's scenarios match an in-app run on the same draws."""
+        _with_assets(test_profile)
+        test_profile.save()
+        client.post('/api/auth/login', json={'username': 'testuser', 'password': 'TestPass123'})
+
+        np.random.seed(11)
+        response = client.post('/api/analysis?force=true', json={
+            'profile_name': test_profile.name,
+            'simulations': 1000
+        })
+        assert response.status_code == 200
+        in_app = response.get_json()
+
+        np.random.seed(11)
+        report = run_analysis_for_report(test_profile)
+
+        assert report['years_projected'] == in_app['years_projected']
+        assert report['total_assets'] == in_app['total_assets']
+        for key, scenario in report['scenarios'].items():
+            assert scenario['success_rate'] == in_app['scenarios'][key]['success_rate']
+            assert scenario['median_final_balance'] == in_app['scenarios'][key]['median_final_balance']
+
+    def test_report_counts_income_streams(self, test_profile):
+        """Income streams on the profile now feed the report's simulation."""
+        np.random.seed(5)
+        without = run_analysis_for_report(_with_assets(test_profile))
+
+        pension = [{'type': 'pension', 'amount': 90000, 'frequency': 'annual',
+                    'start_date': '2020-01-01', 'inflation_adjusted': True}]
+        np.random.seed(5)
+        with_pension = run_analysis_for_report(
+            _with_assets(test_profile, pension, updated_at='2004-01-01T00:00:00'))
+
+        for key in ('conservative', 'moderate', 'aggressive'):
+            # Median balance five years out
+            assert (with_pension['scenarios'][key]['timeline']['median'][4]
+                    > without['scenarios'][key]['timeline']['median'][4])
@@ -153,3 +153,24 @@ def test_tax_optimization_missing_profile(client, test_user):
     })
 
     assert response.status_code == 404
+
+
+def test_tax_analysis_error_hides_details(client, test_user, test_profile, mocker):
+    """Unexpected analysis failures return a generic JSON 500."""
+    client.post('/api/auth/login', json={
+        'username': 'testuser',
+        'password': 'TestPass123'
+    })
+    mocker.patch(
+        'src.routes.tax_optimization.TaxOptimizationService.get_comprehensive_analysis',
+        side_effect=RuntimeError('secret internals')
+    )
+
+    response = client.post('/api/tax-optimization/analyze', json={
+        'profile_name': 'Test Profile'
+    })
+
+    assert response.status_code == 500
+    assert response.get_json() == {
+        'error': 'Tax analysis failed. Please check your inputs and try again.'
+    }
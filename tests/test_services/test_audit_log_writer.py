@@ -0,0 +1,43 @@
+"""
+Unit tests for the background audit log writer
+"""
+from src.services.enhanced_audit_logger import AuditLogWriter, EnhancedAuditLogger
+
+
+def test_rows_are_written_in_batches(monkeypatch):
+    """Test queued rows are flushed together in one batch write."""
+    batches = []
+    monkeypatch.setattr(EnhancedAuditLogger, '_save_audit_rows', staticmethod(batches.append))
+
+    writer = AuditLogWriter(batch_size=50, batch_wait=0.5)
+    for i in range(3):
+        assert writer.submit({'action': f'TEST_{i}'})
+    writer.flush()
+
+    assert [row['action'] for batch in batches for row in batch] == ['TEST_0', 'TEST_1', 'TEST_2']
+    assert len(batches) == 1
+
+
+def test_full_queue_rejects_submission(monkeypatch):
+    """Test a full queue reports failure so the caller can write inline."""
+    writer = AuditLogWriter(max_size=1)
+    # Keep the writer thread from draining the queue
+    monkeypatch.setattr(writer, '_ensure_started', lambda: None)
+
+    assert writer.submit({'action': 'FIRST'})
+    assert not writer.submit({'action': 'SECOND'})
+
+
+def test_save_audit_rows_groups_by_columns(test_db, monkeypatch):
+    """Test rows with different column sets are all inserted."""
+    import src.services.enhanced_audit_logger as audit_module
+    monkeypatch.setattr(audit_module, 'db', test_db)
+
+    EnhancedAuditLogger._save_audit_rows([
+        {'action': 'A', 'created_at': '2026-01-01T00:00:00'},
+        {'action': 'B', 'status_code': 200, 'created_at': '2026-01-01T00:00:01'},
+        {'action': 'C', 'created_at': '2026-01-01T00:00:02'},
+    ])
+
+    rows = test_db.execute('SELECT action FROM enhanced_audit_log ORDER BY action')
+    assert [row['action'] for row in rows] == ['A', 'B', 'C']
@@ -0,0 +1,77 @@
+"""
+Unit tests for provider batch submission and collection
+"""
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from src.services.llm_batch import submit_batch, poll_batch
+
+
+def _response(status_code=200, body=None, text=''):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = body or {}
+    response.text = text
+    return response
+
+
+JOBS = [
+    {'custom_id': 'page_0', 'prompt': 'Extract assets', 'text': 'IRA 1000'},
+    {'custom_id': 'page_1', 'prompt': 'Extract assets', 'image_b64': 'abc', 'mime_type': 'image/jpeg'},
+]
+
+
+def test_unsupported_provider_rejected():
+    """Test providers without a batch API are refused up front."""
+    with pytest.raises(ValueError):
+        submit_batch('gemini', 'key', JOBS)
+
+
+@patch('src.services.llm_batch._session')
+def test_submit_claude_batch(mock_session):
+    """Test Claude jobs are sent as one Message Batches request."""
+    mock_session.post.return_value = _response(body={'id': 'msgbatch_1'})
+
+    assert submit_batch('claude', 'key', JOBS) == 'msgbatch_1'
+
+    requests_sent = mock_session.post.call_args.kwargs['json']['requests']
+    assert [r['custom_id'] for r in requests_sent] == ['page_0', 'page_1']
+    assert requests_sent[0]['params']['system'][0]['text'] == 'Extract assets'
+    assert requests_sent[1]['params']['messages'][0]['content'][0]['type'] == 'image'
+
+
+@patch('src.services.llm_batch._session')
+def test_submit_openai_batch_uploads_jsonl(mock_session):
+    """Test OpenAI jobs are uploaded as JSONL and a batch is created from the file."""
+    mock_session.post.side_effect = [_response(body={'id': 'file_1'}), _response(body={'id': 'batch_1'})]
+
+    assert submit_batch('openai', 'key', JOBS) == 'batch_1'
+
+    upload_kwargs = mock_session.post.call_args_list[0].kwargs
+    lines = upload_kwargs['files']['file'][1].decode('utf-8').splitlines()
+    assert [json.loads(line)['custom_id'] for line in lines] == ['page_0', 'page_1']
+    assert mock_session.post.call_args_list[1].kwargs['json']['input_file_id'] == 'file_1'
+
+
+@patch('src.services.llm_batch._session')
+def test_poll_openai_in_progress(mock_session):
+    """Test an unfinished batch reports in_progress without fetching output."""
+    mock_session.get.return_value = _response(body={'status': 'in_progress'})
+
+    assert poll_batch('openai', 'key', 'batch_1') == {'status': 'in_progress', 'results': {}}
+    assert mock_session.get.call_count == 1
+
+
+@patch('src.services.llm_batch._session')
+def test_poll_claude_collects_succeeded_results(mock_session):
+    """Test finished Claude batches return text for succeeded requests only."""
+    output = '\n'.join([
+        json.dumps({'custom_id': 'page_0', 'result': {'type': 'succeeded', 'message': {'content': [{'text': '[1]'}]}}}),
+        json.dumps({'custom_id': 'page_1', 'result': {'type': 'errored'}}),
+    ])
+    mock_session.get.side_effect = [
+        _response(body={'processing_status': 'ended', 'results_url': 'https://example.test/results'}),
+        _response(text=output),
+    ]
+
+    assert poll_batch('claude', 'key', 'msgbatch_1') == {'status': 'completed', 'results': {'page_0': '[1]'}}
@@ -0,0 +1,52 @@
+"""
+Unit tests for the LLM response cache
+"""
+import pytest
+from src.services.llm_cache import LLMResponseCache
+
+
+def test_make_key_is_stable_and_separates_parts():
+    """Test keys are deterministic and field boundaries matter."""
+    assert LLMResponseCache.make_key('a', 'b') == LLMResponseCache.make_key('a', 'b')
+    assert LLMResponseCache.make_key('ab', 'c') != LLMResponseCache.make_key('a', 'bc')
+    assert LLMResponseCache.make_key('x', None) == LLMResponseCache.make_key('x', '')
+
+
+def test_get_set_roundtrip():
+    """Test stored values can be read back."""
+    cache = LLMResponseCache()
+    cache.set('k', '[1, 2]')
+    assert cache.get('k') == '[1, 2]'
+    assert cache.get('missing') is None
+
+
+def test_expired_entries_are_dropped():
+    """Test entries past their TTL are not returned."""
+    cache = LLMResponseCache()
+    cache.set('k', 'v', ttl=-1)
+    assert cache.get('k') is None
+
+
+def test_lru_eviction():
+    """Test least recently used entry is evicted when full."""
+    cache = LLMResponseCache(max_entries=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')  # 'b' is now least recently used
+    cache.set('c', '3')
+    assert cache.get('a') == '1'
+    assert cache.get('b') is None
+    assert cache.get('c') == '3'
+
+
+def test_stats_count_hits_and_misses():
+    """Test hit/miss counters and that clear() resets them."""
+    cache = LLMResponseCache()
+    cache.set('k', 'v')
+    cache.get('k')
+    cache.get('k')
+    cache.get('missing')
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'entries': 1}
+
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'entries': 0}
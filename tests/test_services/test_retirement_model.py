@@ -2,8 +2,9 @@
 
 from datetime import datetime
 import numpy as np
+import pytest
 from src.services.retirement_model import (
-    Person, FinancialProfile, RetirementModel, MarketAssumptions
+    Person, FinancialProfile, RetirementModel, MarketAssumptions, SPENDING_MODELS
 )
 
 
@@ -84,6 +85,19 @@ def test_monte_carlo_with_budget():
     assert result['starting_portfolio'] == 100000
 
 
+def test_projection_years_follows_younger_person():
+    model = _create_basic_model()
+    assert model.projection_years() == model.calculate_life_expectancy_years(model.profile.person2)
+    assert model.projection_years() > model.calculate_life_expectancy_years(model.profile.person1)
+
+
+def test_spending_model_multipliers():
+    ages = np.array([65, 75, 80, 90, 120])
+    assert SPENDING_MODELS['constant_real'](ages).tolist() == [1.0] * 5
+    assert np.allclose(SPENDING_MODELS['retirement_smile'](ages), [1.0, 0.9, 0.8, 1.0, 1.6])
+    assert np.allclose(SPENDING_MODELS['conservative_decline'](ages), [1.0, 0.95, 0.9, 0.8, 0.6])
+
+
 # =========================================================================
 # Tax Function Tests
 # =========================================================================
@@ -353,6 +367,66 @@ class TestFullSimulationIntegration:
         assert result['success_rate'] >= 0
         assert result['median_final_balance'] >= 0
 
+    def test_seed_makes_results_reproducible(self):
+        """The same seed should reproduce a run exactly."""
+        model = _create_basic_model()
+
+        first = model.monte_carlo_simulation(years=20, simulations=200, seed=7)
+        second = model.monte_carlo_simulation(years=20, simulations=200, seed=7)
+        other = model.monte_carlo_simulation(years=20, simulations=200, seed=8)
+
+        assert first['timeline'] == second['timeline']
+        assert first['timeline']['median'] != other['timeline']['median']
+
+    def test_multi_scenario_matches_separate_runs(self):
+        """Scenarios simulated together should match separate runs on the same draws."""
+        model = _create_basic_model()
+        scenarios = [MarketAssumptions(stock_allocation=0.3, bond_allocation=0.6),
+                     MarketAssumptions(stock_allocation=0.8, bond_allocation=0.15)]
+
+        combined = model.monte_carlo_simulation_multi(years=20, simulations=200,
+                                                      assumptions_list=scenarios, seed=7)
+        separate = [model.monte_carlo_simulation(years=20, simulations=200, assumptions=a, seed=7)
+                    for a in scenarios]
+
+        assert len(combined) == 2
+        for together, alone in zip(combined, separate):
+            assert together['timeline'] == alone['timeline']
+            assert together['success_rate'] == alone['success_rate']
+        assert combined[0]['timeline']['median'] != combined[1]['timeline']['median']
+
+    def test_overshooting_withdrawal_tax_does_not_leak_across_paths(self):
+        """A path whose taxed withdrawal overshoots its need must not be credited by later blocks run for other paths."""
+        model = _create_basic_model()
+        model.profile.annual_expenses = model.profile.target_annual_income = 90000
+        scenarios = [MarketAssumptions(stock_allocation=0.3, bond_allocation=0.6),
+                     MarketAssumptions(stock_allocation=0.8, bond_allocation=0.15)]
+
+        # Before the clamp the conservative scenario drifted once the
+        # aggressive paths kept the later withdrawal blocks running
+        combined = model.monte_carlo_simulation_multi(years=30, simulations=200,
+                                                      assumptions_list=scenarios, seed=7)
+        for together, assumptions in zip(combined, scenarios):
+            alone = model.monte_carlo_simulation(years=30, simulations=200, assumptions=assumptions, seed=7)
+            assert together['timeline'] == alone['timeline']
+            assert together['success_rate'] == alone['success_rate']
+
+    def test_single_precision_shocks_match_double(self, monkeypatch):
+        """float32 shocks and paths should agree with float64 to well under a dollar in 10k."""
+        model = _create_basic_model()
+        assumptions = MarketAssumptions(stock_allocation=0.6, bond_allocation=0.4)
+
+        np.random.seed(3)
+        single = model.monte_carlo_simulation(years=30, simulations=500, assumptions=assumptions)
+        monkeypatch.setitem(RetirementModel.monte_carlo_simulation_multi.__globals__, '_SHOCK_DTYPE', np.float64)
+        np.random.seed(3)
+        double = model.monte_carlo_simulation(years=30, simulations=500, assumptions=assumptions)
+
+        assert single['success_rate'] == double['success_rate']
+        for key in ('median_final_balance', 'percentile_10', 'percentile_90', 'expected_value'):
+            assert single[key] == pytest.approx(double[key], rel=1e-4, abs=1.0)
+        assert np.allclose(single['timeline']['median'], double['timeline']['median'], rtol=1e-4, atol=1.0)
+
 
 # =========================================================================
 # Market Periods Tests (Version 3.10.0)